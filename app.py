@@ -1,12 +1,15 @@
 import streamlit as st
-from auth import show_restricted_access, logout, is_authenticated, login_required
-import firebase_admin
-from firebase_admin import firestore
+import time
+from contextlib import nullcontext
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from auth import show_restricted_access, logout, is_authenticated, login_required, is_admin, init_session_state
 from firebase_init import get_db
 from components.ctf_page import show_ctf_page
-
-# Initialize Firebase
-db = get_db()
+from components.admin_panel import show_admin_panel
+from utils import metrics, warmup
+from utils.json_logging import setup_logging
+from utils.team_registry import get_team_registry
+from utils.profiler import RerunProfiler, profiling_requested
 
 # Hide sidebar and other default elements
 st.markdown("""
@@ -131,32 +134,85 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+def show_warming_up():
+    """Show a lightweight placeholder until the server has warmed up"""
+    state = warmup.status()
+    if state['status'] == warmup.FAILED:
+        st.error(f"Could not reach the challenge server: {state['error']}")
+        if st.button("Retry"):
+            warmup.start()
+            st.rerun()
+        return
+    
+    st.info("⏳ Warming up the challenge server... this only takes a moment.")
+    
+    def poll():
+        if warmup.is_ready() or warmup.status()['status'] == warmup.FAILED:
+            st.rerun()
+    
+    fragment = getattr(st, 'fragment', None)
+    if fragment is None:
+        time.sleep(1)
+        poll()
+    else:
+        fragment(run_every=1)(poll)()
+
+def show_team_selection():
+    """Team picker backed by the shared team registry"""
+    st.markdown("### 👥 Select Your Team")
+    registry = get_team_registry(get_db())
+    # Only the matching teams are sent to the browser, not the whole list
+    query = st.text_input("Search teams", placeholder="Type your team name or ID")
+    teams = registry.search(query)
+    if not teams:
+        st.warning("No team matches your search.")
+        return
+    if len(registry) > len(teams):
+        st.caption(f"Showing {len(teams)} of {len(registry)} teams; type to narrow the list.")
+    team_id = st.selectbox("Choose your team", teams, format_func=registry.label)
+    if st.button("Confirm Team"):
+        st.session_state.team_id = team_id
+        st.rerun()
+
 @login_required
 def home_page():
     st.markdown('<h1 class="main-title">TechIgnite 2.O</h1>', unsafe_allow_html=True)
     
-    # Team selection
-    if "team_id" not in st.session_state:
-        st.markdown("### 👥 Select Your Team")
-        teams = [f"TEAM{i}" for i in range(1, 31)]
-        team_id = st.selectbox("Choose your team", teams)
-        if st.button("Confirm Team"):
-            st.session_state.team_id = team_id
-            st.experimental_rerun()
+    if not warmup.wait(0.5):
+        show_warming_up()
+    elif "team_id" not in st.session_state:
+        show_team_selection()
     else:
-        show_ctf_page(db)
+        show_ctf_page(get_db())
         
         # Add logout button
         if st.button("Logout"):
             logout()
-            st.experimental_rerun()
+            st.rerun()
 
 # Main app
 def main():
-    if not is_authenticated():
-        show_restricted_access()
-    else:
-        home_page()
+    init_session_state()
+    setup_logging()
+    warmup.start()
+    ctx = get_script_run_ctx()
+    admin = is_admin()
+    metrics.start_exporter()
+    metrics.start_rerun(ctx.session_id if ctx else None)
+    profiler = RerunProfiler() if profiling_requested(st.query_params, admin) else nullcontext()
+    try:
+        with profiler:
+            if not is_authenticated():
+                show_restricted_access()
+            else:
+                home_page()
+        
+        if admin:
+            show_admin_panel()
+            if isinstance(profiler, RerunProfiler) and profiler.paths:
+                st.caption(f"Profiled rerun written to {profiler.paths['speedscope']}")
+    finally:
+        metrics.end_rerun()
 
 if __name__ == "__main__":
     main()
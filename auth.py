@@ -1,11 +1,7 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import firestore, auth
+import hmac
+import os
 from functools import wraps
-from firebase_init import get_db
-
-# Initialize Firestore
-db = get_db()
 
 def init_session_state():
     """Initialize session state variables"""
@@ -14,12 +10,23 @@ def init_session_state():
     if "user_info" not in st.session_state:
         st.session_state["user_info"] = None
 
-init_session_state()
-
 def is_authenticated():
     """Check if user is authenticated"""
     return st.session_state.get("authenticated", False)
 
+def is_admin():
+    """Check for the admin token in the ?admin= query parameter"""
+    token = os.environ.get("CTF_ADMIN_TOKEN")
+    if not token:
+        try:
+            token = st.secrets.get("admin", {}).get("token")
+        except Exception:
+            token = None
+    supplied = st.query_params.get("admin")
+    if not token or not supplied:
+        return False
+    return hmac.compare_digest(str(supplied), str(token))
+
 def login_required(func):
     """Decorator to require login for certain pages"""
     @wraps(func)
@@ -71,11 +78,9 @@ def logout():
     """Handle logout"""
     st.session_state["authenticated"] = False
     st.session_state["user_info"] = None
-    st.experimental_rerun()
+    st.rerun()
 
 def init_auth():
     """Initialize authentication state"""
     if not is_authenticated():
         show_restricted_access()
-
-init_auth()
@@ -0,0 +1,67 @@
+"""
+Burst-solve benchmark against the Firestore emulator.
+
+Seeds one question and N teams, then has every team solve the question at
+the same moment through utils.solve_pipeline.record_solve. Reports
+wall time, solves/second and checks the sharded solve count.
+
+    gcloud emulators firestore start --host-port=localhost:8080
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmarks/bench_burst_solves.py --teams 100
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import firestore
+from utils.sharded_counter import solve_counter, NUM_SHARDS
+from utils.solve_pipeline import record_solve, SOLVED
+from utils.repository import allocate_bits, question_doc, question_ref, team_doc, team_ref
+
+def seed(db, qid, teams):
+    """Create the benchmark question and teams"""
+    bit, = allocate_bits(db, 1)
+    batch = db.batch()
+    batch.set(question_ref(db, qid), question_doc(qid, 'CTF{bench}', bit=bit))
+    for team_id in teams:
+        batch.set(team_ref(db, team_id), team_doc(team_id))
+    batch.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Burst-solve benchmark (Firestore emulator only)')
+    parser.add_argument('--teams', type=int, default=100, help='Teams solving at once')
+    parser.add_argument('--workers', type=int, default=32, help='Concurrent solver threads')
+    args = parser.parse_args()
+
+    if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        print("FIRESTORE_EMULATOR_HOST is not set; refusing to run against a live project")
+        return 1
+
+    db = firestore.Client(project='demo-techignite')
+    qid = f"QBENCH{int(time.time())}"
+    teams = [f"BENCH{i}" for i in range(1, args.teams + 1)]
+    seed(db, qid, teams)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda team_id: record_solve(db, team_id, qid), teams))
+    elapsed = time.perf_counter() - start
+
+    solved = results.count(SOLVED)
+    counter = solve_counter(db, qid)
+    counter._cached = None
+    total = counter.value()
+
+    print(f"Teams:          {args.teams} ({args.workers} workers, {NUM_SHARDS} shards)")
+    print(f"Solved:         {solved}")
+    print(f"Wall time:      {elapsed:.2f}s")
+    print(f"Throughput:     {solved / elapsed:.1f} solves/s")
+    print(f"Sharded count:  {total} ({'OK' if total == solved else 'MISMATCH'})")
+    return 0 if total == solved else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Streamlit rerun cost benchmarks.
+
+Runs app.py under streamlit.testing AppTest against the in-memory
+Firestore fake and measures, per rerun: script wall time, Firestore
+operations and the number of emitted elements. Each flow (team
+selection, flag submit, logout) is run for catalogs of 10, 100 and 1000
+questions.
+
+    python benchmarks/bench_reruns.py                   # compare with baseline
+    python benchmarks/bench_reruns.py --update-baseline # record new baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add parent directory to path to import the app modules
+sys.path.append(ROOT)
+
+from streamlit.testing.v1 import AppTest
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.load_test import seed
+from utils.question_catalog import get_question_catalog
+from utils.scoreboard_hub import get_scoreboard_hub
+from utils.team_views import get_team_views
+from utils.teams_feed import get_teams_feed
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'reruns.json')
+CATALOG_SIZES = (10, 100, 1000)
+# A case regresses when even its fastest run is this much slower than the
+# baseline median; single runs vary by about 30%
+WALL_TOLERANCE = 0.5
+# Absolute slack (ms) on top, for the small cases where scheduler noise
+# outweighs the relative tolerance
+WALL_SLACK_MS = 10
+# Cache TTLs for the whole suite, so no cache expires mid-run and
+# Firestore counts don't depend on how long the suite takes
+PINNED_TTL = 24 * 3600
+
+def count_elements(node):
+    """Count the elements below an AppTest tree node"""
+    children = getattr(node, 'children', None)
+    if not children:
+        return 1
+    return 1 + sum(count_elements(child) for child in children.values())
+
+def new_app(db, team_id=None):
+    """Return an authenticated AppTest bound to ``db``"""
+    import firebase_init
+    firebase_init._db = db
+
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.session_state['authenticated'] = True
+    if team_id:
+        at.session_state['team_id'] = team_id
+    return at
+
+def measure(db, at, action):
+    """Run one rerun triggered by ``action(at)`` and return its costs"""
+    before = db.counters()
+    start = time.perf_counter()
+    action(at).run()
+    wall = time.perf_counter() - start
+    after = db.counters()
+    if at.exception:
+        raise RuntimeError(f"App raised during rerun: {at.exception[0].message}")
+    return {
+        'wall_ms': wall * 1000,
+        'firestore_ops': sum(after[key] - before[key] for key in ('reads', 'writes', 'deletes')),
+        'elements': count_elements(at.main)
+    }
+
+def flow_team_selection(db):
+    at = new_app(db)
+    at.run()
+    return measure(db, at, lambda at: (at.selectbox[0].set_value('TEAM1'), at.button[0].click())[1])
+
+def flow_flag_submit(db):
+    at = new_app(db, 'TEAM1')
+    at.run()
+
+    def submit(at):
+        at.text_input[0].set_value('Q1')
+        at.text_input[1].set_value('CTF{wrong}')
+        return at.button(key='FormSubmitter:flag_submission-Submit Flag').click()
+    return measure(db, at, submit)
+
+def flow_logout(db):
+    at = new_app(db, 'TEAM1')
+    at.run()
+    return measure(db, at, lambda at: [button for button in at.button if button.label == 'Logout'][0].click())
+
+def flow_idle_rerun(db):
+    at = new_app(db, 'TEAM1')
+    at.run()
+    return measure(db, at, lambda at: at)
+
+FLOWS = {
+    'team_selection': flow_team_selection,
+    'flag_submit': flow_flag_submit,
+    'logout': flow_logout,
+    'idle_rerun': flow_idle_rerun
+}
+
+def pin_ttls(db):
+    """Start ``db``'s process-wide caches with PINNED_TTL instead of their wall-clock TTLs"""
+    for cache in (get_question_catalog(db), get_teams_feed(db), get_scoreboard_hub(db), get_team_views(db)):
+        cache.ttl = PINNED_TTL
+
+def summarize(samples):
+    """Median of every metric, plus the fastest wall time as 'wall_min_ms'"""
+    summary = {metric: round(statistics.median(sample[metric] for sample in samples), 3) for metric in samples[0]}
+    summary['wall_min_ms'] = round(min(sample['wall_ms'] for sample in samples), 3)
+    return summary
+
+def run_suite(repeat):
+    """Return {'flow@size': summarize(samples)} for every flow and catalog size"""
+    results = {}
+    for size in CATALOG_SIZES:
+        db = FakeFirestore()
+        seed(db, teams=30, questions=size)
+        pin_ttls(db)
+        for name, flow in FLOWS.items():
+            # The first run warms process-wide caches (catalog, flag index)
+            flow(db)
+            results[f"{name}@{size}"] = summarize([flow(db) for _ in range(repeat)])
+    return results
+
+def compare(results, baseline):
+    """Print per-case diffs against ``baseline``; return the number of regressions"""
+    regressions = 0
+    for case, metrics in sorted(results.items()):
+        base = baseline.get(case)
+        if base is None:
+            print(f"{case:<28} new case")
+            continue
+        parts = []
+        regressed = False
+        for metric, value in metrics.items():
+            old = base.get(metric)
+            if old is None or metric == 'wall_min_ms':
+                continue
+            parts.append(f"{metric} {old} -> {value}")
+            if metric == 'wall_ms':
+                regressed |= metrics['wall_min_ms'] > old * (1 + WALL_TOLERANCE) + WALL_SLACK_MS
+            else:
+                regressed |= value > old
+        regressions += regressed
+        print(f"{case:<28} {'REGRESSED ' if regressed else ''}{', '.join(parts)}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Streamlit rerun cost')
+    parser.add_argument('--repeat', type=int, default=5, help='Measured runs per flow')
+    parser.add_argument('--update-baseline', action='store_true', help='Overwrite the stored baseline')
+    args = parser.parse_args()
+
+    results = run_suite(args.repeat)
+
+    if args.update_baseline or not os.path.exists(BASELINE_PATH):
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(json.dumps(results, indent=2, sort_keys=True))
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    with open(BASELINE_PATH) as f:
+        baseline = json.load(f)
+    return 1 if compare(results, baseline) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
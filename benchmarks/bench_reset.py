@@ -0,0 +1,73 @@
+"""
+Reset benchmark against the Firestore emulator.
+
+Seeds --docs documents across a few collections, with a subcollection
+under every tenth one, then deletes them all with
+utils.reset_database.delete_collections. Reports wall time and
+deletes/second, and fails if the rate is below --target or anything is
+left behind.
+
+    gcloud emulators firestore start --host-port=localhost:8080
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmarks/bench_reset.py --docs 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import firestore
+from utils.reset_database import bulk_writer, count_documents, delete_collections
+
+COLLECTIONS = ('BenchTeams', 'BenchSubmissions', 'BenchViews')
+# Deletes per second the reset has to sustain on the emulator
+TARGET_RATE = 2000
+
+def seed(db, docs):
+    """Create ``docs`` documents, every tenth with a two-document subcollection"""
+    writer = bulk_writer(db)
+    written = 0
+    i = 0
+    while written < docs:
+        ref = db.collection(COLLECTIONS[i % len(COLLECTIONS)]).document(f"DOC{i}")
+        writer.set(ref, {'index': i, 'payload': 'x' * 200})
+        written += 1
+        if i % 10 == 0:
+            for j in range(2):
+                writer.set(ref.collection('Solves').document(f"S{j}"), {'index': j})
+                written += 1
+        i += 1
+    writer.close()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description='Reset benchmark (Firestore emulator only)')
+    parser.add_argument('--docs', type=int, default=20000, help='Documents to seed and delete')
+    parser.add_argument('--target', type=float, default=TARGET_RATE, help='Minimum deletes per second')
+    args = parser.parse_args()
+
+    if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+        print("FIRESTORE_EMULATOR_HOST is not set; refusing to run against a live project")
+        return 1
+
+    db = firestore.Client(project='demo-techignite')
+    seeded = seed(db, args.docs)
+    counted = sum(count_documents(db, COLLECTIONS).values())
+
+    start = time.perf_counter()
+    deleted, failed = delete_collections(db, COLLECTIONS, total=counted)
+    elapsed = time.perf_counter() - start
+    remaining = sum(count_documents(db, COLLECTIONS).values())
+    rate = deleted / elapsed
+
+    print(f"Seeded:         {seeded} ({counted} counted)")
+    print(f"Deleted:        {deleted} ({failed} failed, {remaining} remaining)")
+    print(f"Wall time:      {elapsed:.2f}s")
+    print(f"Throughput:     {rate:.0f} deletes/s (target {args.target:.0f})")
+    ok = not failed and not remaining and counted == seeded and rate >= args.target
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Cold-start benchmark for the Streamlit entry point.
+
+Imports app.py in a fresh interpreter under ``python -X importtime``,
+reports the slowest imports and fails if the import exceeds the budget
+or pulls in the Firebase/Firestore SDKs, which must stay deferred until
+first use so /script-health-check answers quickly after a restart.
+
+    python benchmarks/bench_startup.py --budget-ms 1500
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must not be imported just by loading the app
+DEFERRED_MODULES = ('firebase_admin', 'google.cloud.firestore', 'grpc', 'pyrebase', 'numpy')
+
+PROBE = (
+    "import sys, app; "
+    f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+)
+
+def import_once():
+    """Return (app import ms, {module: cumulative ms}, eagerly imported SDKs)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative) / 1000.0
+    lines = result.stdout.strip().splitlines()
+    eager = [m for m in lines[-1].split(',') if m] if lines else []
+    return modules.get('app', 0.0), modules, eager
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure app import time against a budget')
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='Maximum median import time of app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    args = parser.parse_args()
+
+    runs = [import_once() for _ in range(args.runs)]
+    median = statistics.median(run[0] for run in runs)
+    _, modules, eager = runs[-1]
+
+    print(f"app import: median {median:.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print(f"\nSlowest imports (cumulative ms, last run):")
+    for name, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{ms:10.1f}  {name}")
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: imported at startup, should be deferred: {', '.join(eager)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"\nFAIL: import time {median:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
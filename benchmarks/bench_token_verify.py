@@ -0,0 +1,122 @@
+"""
+ID-token verification cost, offline.
+
+Signs Firebase-style ID tokens with a locally generated RSA key and
+certificate, serves that certificate to utils.token_cache through an
+injected fetcher, checks that bad tokens are rejected, and times cold
+(signature-checking) and cached verifications:
+
+    python benchmarks/bench_token_verify.py --tokens 200
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path to import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+from utils.token_cache import CertStore, TokenVerifier, ISSUER_PREFIX
+
+PROJECT_ID = 'demo-techignite'
+KEY_ID = 'local-test-key'
+
+def make_signing_key(key_id=KEY_ID):
+    """Return (signer, {key_id: certificate pem}) for a fresh RSA key"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'securetoken.local')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    key_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                serialization.NoEncryption())
+    signer = crypt.RSASigner.from_string(key_pem, key_id=key_id)
+    return signer, {key_id: cert.public_bytes(serialization.Encoding.PEM).decode('ascii')}
+
+def make_token(signer, uid, ttl=3600, **overrides):
+    now = int(time.time())
+    claims = {
+        'iss': ISSUER_PREFIX + PROJECT_ID,
+        'aud': PROJECT_ID,
+        'sub': uid,
+        'iat': now,
+        'exp': now + ttl,
+        'auth_time': now
+    }
+    claims.update(overrides)
+    return jwt.encode(signer, claims).decode('ascii')
+
+def bad_tokens(signer):
+    """Return {name: token} for tokens a verifier must reject"""
+    good = make_token(signer, 'team-a')
+    return {
+        'expired': make_token(signer, 'team-a', ttl=-3600, iat=int(time.time()) - 7200),
+        'wrong_audience': make_token(signer, 'team-a', aud='other-project'),
+        'wrong_issuer': make_token(signer, 'team-a', iss=ISSUER_PREFIX + 'other-project'),
+        'empty_subject': make_token(signer, ''),
+        'tampered': good[:-4] + ('AAAA' if not good.endswith('AAAA') else 'BBBB')
+    }
+
+def check_rejections(verifier, signer):
+    """Return the names of bad tokens the verifier wrongly accepted"""
+    accepted = []
+    for name, token in bad_tokens(signer).items():
+        try:
+            verifier.verify(token)
+            accepted.append(name)
+        except Exception:
+            pass
+    return accepted
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cached ID-token verification offline')
+    parser.add_argument('--tokens', type=int, default=200, help='Distinct tokens to verify')
+    parser.add_argument('--repeat', type=int, default=20, help='Cached checks per token')
+    args = parser.parse_args()
+
+    signer, certs = make_signing_key()
+    fetches = []
+
+    def fetch():
+        fetches.append(time.time())
+        return certs, 3600
+
+    verifier = TokenVerifier(PROJECT_ID, CertStore(fetch=fetch))
+    tokens = [make_token(signer, f"team-{i}") for i in range(args.tokens)]
+
+    start = time.perf_counter()
+    for token in tokens:
+        verifier.verify(token)
+    cold = (time.perf_counter() - start) / len(tokens)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for token in tokens:
+            verifier.verify(token)
+    cached = (time.perf_counter() - start) / (len(tokens) * args.repeat)
+
+    wrongly_accepted = check_rejections(verifier, signer)
+    report = {
+        'cold_us': round(cold * 1e6, 2),
+        'cached_us': round(cached * 1e6, 2),
+        'speedup': round(cold / cached, 1) if cached else None,
+        'cert_fetches': len(fetches),
+        'wrongly_accepted': wrongly_accepted
+    }
+    print(json.dumps(report, indent=2))
+    return 1 if wrongly_accepted or len(fetches) != 1 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
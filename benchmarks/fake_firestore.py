@@ -0,0 +1,316 @@
+"""
+In-memory stand-in for the subset of the Firestore client the app uses.
+
+Counts document reads, writes and deletes, can add simulated round-trip
+latency, and runs transactions with optimistic concurrency (reads are
+versioned and the commit retries if any of them changed), so load tests
+see contention the way the real backend reports it.
+"""
+import copy
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from google.cloud.firestore_v1 import transforms
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+class FakeDocument:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name):
+        return FakeCollection(self._client, f"{self.path}/{name}")
+
+    def collections(self):
+        return [FakeCollection(self._client, path) for path in self._client._subcollections(self.path)]
+
+    def get(self, transaction=None, **kwargs):
+        if transaction is not None:
+            return transaction.get(self)
+        return self._client._read(self.path)
+
+    def set(self, data, merge=False, **kwargs):
+        self._client._commit([('set', self.path, data, merge)])
+
+    def create(self, data, **kwargs):
+        self._client._commit([('create', self.path, data, False)])
+
+    def update(self, data, **kwargs):
+        self._client._commit([('update', self.path, data, False)])
+
+    def delete(self, **kwargs):
+        self._client._commit([('delete', self.path, None, False)])
+
+class FakeQuery:
+    """Documents are always returned in ID order (path order for recursive
+    queries); only ``__name__`` and snapshot cursors are supported"""
+
+    def __init__(self, client, path, limit=None, start_after=None, recursive=False):
+        self._client = client
+        self._path = path
+        self._limit = limit
+        self._start_after = start_after
+        self._recursive = recursive
+
+    def limit(self, count):
+        return FakeQuery(self._client, self._path, count, self._start_after, self._recursive)
+
+    def start_after(self, values):
+        cursor = values.reference.path if isinstance(values, FakeSnapshot) else f"{self._path}/{values['__name__']}"
+        return FakeQuery(self._client, self._path, self._limit, cursor, self._recursive)
+
+    def recursive(self):
+        """Also return the documents of every subcollection below this one"""
+        return FakeQuery(self._client, self._path, self._limit, self._start_after, True)
+
+    def select(self, field_paths):
+        return self
+
+    def order_by(self, field_path, **kwargs):
+        return self
+
+    def get(self, transaction=None, **kwargs):
+        return list(self.stream())
+
+    def stream(self, transaction=None, **kwargs):
+        paths = self._client._children(self._path, self._recursive)
+        if self._start_after is not None:
+            paths = [path for path in paths if path > self._start_after]
+        if self._limit is not None:
+            paths = paths[:self._limit]
+        return [self._client._read(path) for path in paths]
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+        self.id = path.rsplit('/', 1)[-1]
+
+    def document(self, document_id=None):
+        return FakeDocument(self._client, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def list_documents(self, page_size=None):
+        return [FakeDocument(self._client, path) for path in self._client._children(self._path)]
+
+    def add(self, data, **kwargs):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+class FakeBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('set', reference.path, data, merge))
+
+    def create(self, reference, data):
+        self._writes.append(('create', reference.path, data, False))
+
+    def update(self, reference, data):
+        self._writes.append(('update', reference.path, data, False))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference.path, None, False))
+
+    def commit(self, **kwargs):
+        self._client._commit(self._writes)
+        self._writes = []
+
+class FakeTransaction(FakeBatch):
+    def __init__(self, client):
+        super().__init__(client)
+        self._read_versions = {}
+
+    def get(self, reference, **kwargs):
+        snapshot, version = self._client._read_versioned(reference.path)
+        self._read_versions[reference.path] = version
+        return snapshot
+
+class FakeBulkWriter:
+    """Commits each write as it's queued; callbacks run on the caller's thread"""
+
+    def __init__(self, client):
+        self._client = client
+        self._on_result = None
+
+    def on_write_result(self, callback):
+        self._on_result = callback
+
+    def on_write_error(self, callback):
+        pass
+
+    def _write(self, op, reference, data=None, merge=False):
+        self._client._commit([(op, reference.path, data, merge)])
+        if self._on_result is not None:
+            self._on_result(reference, None, self)
+
+    def set(self, reference, data, merge=False):
+        self._write('set', reference, data, merge)
+
+    def create(self, reference, data):
+        self._write('create', reference, data)
+
+    def delete(self, reference):
+        self._write('delete', reference)
+
+    def close(self):
+        pass
+
+class TransactionConflict(Exception):
+    pass
+
+class FakeFirestore:
+    """Thread-safe in-memory Firestore with operation counters"""
+
+    def __init__(self, latency_ms=0.0, max_attempts=5):
+        self.latency = latency_ms / 1000.0
+        self.max_attempts = max_attempts
+        self._docs = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.conflicts = 0
+
+    # Client API
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def collections(self):
+        return [FakeCollection(self, path) for path in self._subcollections('')]
+
+    def document(self, path):
+        return FakeDocument(self, path)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def bulk_writer(self, options=None):
+        return FakeBulkWriter(self)
+
+    def get_all(self, references, transaction=None, **kwargs):
+        if transaction is not None:
+            return [transaction.get(reference) for reference in references]
+        return [self._read(reference.path) for reference in references]
+
+    def run_transaction(self, fn):
+        """Run ``fn(transaction)``, retrying when a document it read has changed"""
+        for _ in range(self.max_attempts):
+            transaction = FakeTransaction(self)
+            result = fn(transaction)
+            try:
+                self._commit(transaction._writes, transaction._read_versions)
+                return result
+            except TransactionConflict:
+                with self._lock:
+                    self.conflicts += 1
+        raise TransactionConflict(f"Transaction failed after {self.max_attempts} attempts")
+
+    def close(self):
+        pass
+
+    def counters(self):
+        """Return a copy of the operation counters"""
+        with self._lock:
+            return {'reads': self.reads, 'writes': self.writes, 'deletes': self.deletes, 'conflicts': self.conflicts}
+
+    # Storage
+
+    def _round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _read(self, path):
+        return self._read_versioned(path)[0]
+
+    def _read_versioned(self, path):
+        self._round_trip()
+        with self._lock:
+            self.reads += 1
+            data = copy.deepcopy(self._docs.get(path))
+            version = self._versions.get(path, 0)
+        return FakeSnapshot(FakeDocument(self, path), data), version
+
+    def _children(self, collection_path, recursive=False):
+        prefix = collection_path + '/'
+        self._round_trip()
+        with self._lock:
+            return sorted(path for path in self._docs
+                          if path.startswith(prefix) and (recursive or '/' not in path[len(prefix):]))
+
+    def _subcollections(self, doc_path):
+        prefix = doc_path + '/' if doc_path else ''
+        with self._lock:
+            names = {path[len(prefix):].split('/', 1)[0] for path in self._docs if path.startswith(prefix)}
+        return sorted(prefix + name for name in names)
+
+    def _commit(self, writes, read_versions=None):
+        self._round_trip()
+        with self._lock:
+            for path, version in (read_versions or {}).items():
+                if self._versions.get(path, 0) != version:
+                    raise TransactionConflict(path)
+            # Validate every write first so a failed commit applies nothing
+            for op, path, data, merge in writes:
+                if op == 'create' and path in self._docs:
+                    raise ValueError(f"Document already exists: {path}")
+                if op == 'update' and path not in self._docs:
+                    raise ValueError(f"No document to update: {path}")
+            for op, path, data, merge in writes:
+                current = self._docs.get(path)
+                if op == 'delete':
+                    self.deletes += 1
+                    self._docs.pop(path, None)
+                else:
+                    self.writes += 1
+                    base = copy.deepcopy(current) if (merge or op == 'update') and current else {}
+                    self._docs[path] = _apply(base, data, dotted=(op == 'update'))
+                self._versions[path] = self._versions.get(path, 0) + 1
+
+def _apply(target, data, dotted=False):
+    for key, value in data.items():
+        parts = key.split('.') if dotted else [key]
+        parent = target
+        for part in parts[:-1]:
+            parent = parent.setdefault(part, {})
+        _set_field(parent, parts[-1], value)
+    return target
+
+def _set_field(parent, key, value):
+    if value is transforms.DELETE_FIELD:
+        parent.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        parent[key] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        parent[key] = parent.get(key, 0) + value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        current = list(parent.get(key) or [])
+        parent[key] = current + [item for item in value.values if item not in current]
+    elif isinstance(value, transforms.ArrayRemove):
+        parent[key] = [item for item in parent.get(key) or [] if item not in value.values]
+    elif isinstance(value, dict):
+        existing = parent.get(key)
+        parent[key] = _apply(existing if isinstance(existing, dict) else {}, value)
+    else:
+        parent[key] = copy.deepcopy(value)
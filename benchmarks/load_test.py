@@ -0,0 +1,228 @@
+"""
+Concurrent load generator for the flag submission path.
+
+Drives utils.handle_submission.handle_flag_submission or
+manage_db.verify_flag with many teams submitting at once, against an
+in-memory fake of the Firestore client (default) or the Firestore
+emulator, and prints a JSON report:
+
+    python benchmarks/load_test.py --teams 30 --questions 40 --submissions 3000 \
+        --correct-ratio 0.2 --concurrency 30 --latency-ms 20
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python benchmarks/load_test.py --emulator
+    python benchmarks/load_test.py --fault-error-rate 0.3 --fault-hang-rate 0.01
+
+With fault injection, solves queued while the circuit is open are
+replayed before lost updates are counted.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import the app modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, teams, questions):
+    """Create ``teams`` teams and ``questions`` questions; returns (team_ids, flags)"""
+    from utils.repository import allocate_bits, question_doc, question_ref, team_doc, team_ref
+    team_ids = [f"TEAM{i}" for i in range(1, teams + 1)]
+    flags = {f"Q{i}": f"CTF{{load_test_{i}}}" for i in range(1, questions + 1)}
+    writes = [(team_ref(db, team_id), team_doc(team_id)) for team_id in team_ids]
+    bits = allocate_bits(db, len(flags))
+    writes += [(question_ref(db, qid), question_doc(qid, flag, bit=bit)) for (qid, flag), bit in zip(flags.items(), bits)]
+
+    for start in range(0, len(writes), 500):
+        batch = db.batch()
+        for ref, data in writes[start:start + 500]:
+            batch.set(ref, data)
+        batch.commit()
+    return team_ids, flags
+
+def build_workload(team_ids, flags, submissions, correct_ratio, rng):
+    """Return a list of (team_id, qid, flag, is_correct) submissions"""
+    qids = list(flags)
+    workload = []
+    for _ in range(submissions):
+        qid = rng.choice(qids)
+        correct = rng.random() < correct_ratio
+        flag = flags[qid] if correct else f"CTF{{wrong_{rng.randrange(1 << 30)}}}"
+        workload.append((rng.choice(team_ids), qid, flag, correct))
+    return workload
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+def count_lost_updates(db, team_ids, qids, accepted):
+    """Compare stored solve state with the solves the callers were told succeeded"""
+    from utils.sharded_counter import ShardedCounter
+    from utils.question_catalog import get_question_catalog
+    from utils.repository import get_team, question_ref
+    from utils.solve_bitmap import bit_for, has_bit
+
+    catalog = get_question_catalog(db)
+    # A solve accepted while pending can be accepted again before it lands
+    accepted = set(accepted)
+    lost = 0
+    for team_id in team_ids:
+        team = get_team(db, team_id)
+        expected = {qid for (solver, qid) in accepted if solver == team_id}
+        stored = {qid for qid in qids if has_bit(team.solved_bits, bit_for(catalog, qid))} | set(team.unbitted)
+        lost += len(expected - stored)
+        lost += abs(team.total_count - len(stored))
+    for qid in qids:
+        expected = sum(1 for (_, solved) in accepted if solved == qid)
+        stored = ShardedCounter(question_ref(db, qid)).value()
+        lost += abs(expected - stored)
+    return lost
+
+def read_counters(db):
+    """Return operation totals from the fake, or from the metrics wrapper"""
+    counters = getattr(db, 'counters', None)
+    if counters is not None:
+        return counters()
+    from utils.metrics import ops_snapshot
+    ops = ops_snapshot()
+    return {'reads': ops['read'], 'writes': ops['write'], 'deletes': ops['delete']}
+
+def make_submitter(db, target):
+    """Return ``submit(team_id, qid, flag) -> success`` for the chosen code path"""
+    if target == 'handle_flag_submission':
+        from utils.handle_submission import handle_flag_submission
+        return lambda team_id, qid, flag: handle_flag_submission(db, team_id, qid, flag)[0]
+
+    import firebase_init
+    from manage_db import verify_flag
+    # verify_flag resolves the client through the process-wide singleton
+    firebase_init._db = db
+    return lambda team_id, qid, flag: verify_flag(team_id, qid, flag)[0]
+
+def run(args):
+    rng = random.Random(args.seed)
+
+    if args.emulator:
+        if not os.environ.get('FIRESTORE_EMULATOR_HOST'):
+            raise SystemExit("FIRESTORE_EMULATOR_HOST is not set; refusing to run against a live project")
+        from google.cloud import firestore
+        from utils.metrics import instrument_client
+        db = instrument_client(firestore.Client(project='demo-techignite'))
+    else:
+        from benchmarks.fake_firestore import FakeFirestore
+        db = FakeFirestore(latency_ms=args.latency_ms)
+
+    team_ids, flags = seed(db, args.teams, args.questions)
+    workload = build_workload(team_ids, flags, args.submissions, args.correct_ratio, rng)
+    submit = make_submitter(db, args.target)
+
+    # Build the question catalog and flag index before timing starts
+    from utils.flag_index import get_flag_index
+    from utils import resilience
+    get_flag_index(db)
+    resilience.faults.configure(error_rate=args.fault_error_rate, latency_ms=args.fault_latency_ms,
+                                hang_rate=args.fault_hang_rate)
+    opened_before = resilience.breaker.opened
+
+    before = read_counters(db)
+
+    latencies = []
+    accepted = []
+    errors = 0
+    lock = threading.Lock()
+
+    def one(item):
+        nonlocal errors
+        team_id, qid, flag, _ = item
+        start = time.perf_counter()
+        try:
+            success = submit(team_id, qid, flag)
+        except Exception:
+            success = None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if success is None:
+                errors += 1
+            elif success:
+                accepted.append((team_id, qid))
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, workload))
+    wall = time.perf_counter() - wall_start
+
+    # Recover and replay solves queued while Firestore was "unavailable"
+    resilience.faults.configure()
+    resilience.breaker.reset()
+    retry_queue = resilience.get_retry_queue(db)
+    pending_solves = retry_queue.pending()
+    retry_queue.drain()
+
+    # Drain the write-behind submission log so its writes are counted
+    from utils.submission_log import get_submission_log
+    get_submission_log(db).stop()
+    after = read_counters(db)
+
+    latencies.sort()
+    report = {
+        'target': args.target,
+        'backend': 'emulator' if args.emulator else 'fake',
+        'teams': args.teams,
+        'questions': args.questions,
+        'submissions': args.submissions,
+        'correct_ratio': args.correct_ratio,
+        'concurrency': args.concurrency,
+        'wall_seconds': round(wall, 4),
+        'throughput_per_second': round(len(workload) / wall, 2) if wall else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0
+        },
+        'accepted_solves': len(accepted),
+        'errors': errors,
+        'pending_solves': pending_solves,
+        'circuit_opened': resilience.breaker.opened - opened_before,
+        'lost_updates': count_lost_updates(db, team_ids, list(flags), accepted)
+    }
+    report['per_submission'] = {
+        key: round((after[key] - before[key]) / len(workload), 4)
+        for key in ('reads', 'writes', 'deletes')
+    }
+    if 'conflicts' in before:
+        report['transaction_conflicts'] = after['conflicts'] - before['conflicts']
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the flag submission path')
+    parser.add_argument('--target', choices=['handle_flag_submission', 'verify_flag'], default='handle_flag_submission')
+    parser.add_argument('--teams', type=int, default=30)
+    parser.add_argument('--questions', type=int, default=40)
+    parser.add_argument('--submissions', type=int, default=3000)
+    parser.add_argument('--correct-ratio', type=float, default=0.2)
+    parser.add_argument('--concurrency', type=int, default=30)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Simulated round trip per operation (fake backend)')
+    parser.add_argument('--emulator', action='store_true', help='Use the Firestore emulator instead of the in-memory fake')
+    parser.add_argument('--fault-error-rate', type=float, default=0.0, help='Fraction of Firestore calls failing with a transient error')
+    parser.add_argument('--fault-latency-ms', type=float, default=0.0, help='Latency injected into every Firestore call')
+    parser.add_argument('--fault-hang-rate', type=float, default=0.0, help='Fraction of Firestore calls hanging past their deadline')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write the JSON report to this file as well as stdout')
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+if __name__ == "__main__":
+    main()
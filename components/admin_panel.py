@@ -0,0 +1,64 @@
+import streamlit as st
+from utils import metrics, resilience, warmup
+
+def show_admin_panel():
+    """Show rolling hot-path metrics (admin only)"""
+    with st.expander("🛠️ Admin: Performance Metrics"):
+        data = metrics.snapshot()
+        
+        cols = st.columns(4)
+        cols[0].metric("Reruns", data['reruns'])
+        cols[1].metric("Reads", data['ops']['read'])
+        cols[2].metric("Writes", data['ops']['write'])
+        cols[3].metric("Deletes", data['ops']['delete'])
+        st.caption(f"Sampled {data['sampled_reruns']} reruns at rate {metrics.SAMPLE_RATE}")
+        
+        state = warmup.status()
+        st.markdown(f"**Warm-up:** {state['status']} {state['timings']}")
+        if state['error']:
+            st.error(state['error'])
+        
+        circuit = resilience.status()
+        st.markdown(f"**Firestore circuit:** {circuit['state']} (opened {circuit['opened']}x, "
+                    f"{circuit['pending_writes']} queued writes, {circuit['failed_writes']} failed{', fault injection on' if circuit['faults'] else ''})")
+        
+        st.markdown("**Latency (ms)**")
+        st.dataframe([
+            {
+                'name': name,
+                'count': h['count'],
+                'mean': round(h['sum'] / h['count'] * 1000, 2) if h['count'] else 0,
+                'p50 ≤': h['p50'] * 1000,
+                'p95 ≤': h['p95'] * 1000,
+                'p99 ≤': h['p99'] * 1000
+            }
+            for name, h in sorted(data['latency'].items())
+        ], use_container_width=True)
+        
+        st.markdown("**Recent reruns**")
+        st.dataframe([
+            {
+                'session': rerun['session'][:8],
+                'ms': round(rerun['seconds'] * 1000, 1),
+                'reads': rerun['ops']['read'],
+                'writes': rerun['ops']['write'],
+                'deletes': rerun['ops']['delete']
+            }
+            for rerun in reversed(data['recent'][-50:])
+        ], use_container_width=True)
+        
+        st.markdown("**Per session**")
+        st.dataframe([
+            {
+                'session': sid[:8],
+                'reruns': session['reruns'],
+                'ms/rerun': round(session['seconds'] / session['reruns'] * 1000, 1),
+                'reads': session['ops']['read'],
+                'writes': session['ops']['write']
+            }
+            for sid, session in data['sessions'].items()
+        ], use_container_width=True)
+        
+        prometheus = metrics.render_prometheus()
+        st.download_button("Download Prometheus metrics", prometheus, file_name="metrics.prom", mime="text/plain")
+        st.code(prometheus, language="text")
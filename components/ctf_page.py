@@ -1,6 +1,12 @@
 import streamlit as st
 from components.team_progress import show_team_progress, handle_flag_submission_ui
+from components.scoreboard import show_scoreboard
+from utils.question_catalog import get_question_catalog
+from utils.solve_bitmap import solved_qids
+from utils.metrics import timed
+from utils import resilience
 
+@timed('show_ctf_page')
 def show_ctf_page(db):
     """Display the CTF challenges page"""
     st.markdown("<h1>🚩 CTF Challenges</h1>", unsafe_allow_html=True)
@@ -11,8 +17,14 @@ def show_ctf_page(db):
         st.error("Please select your team first!")
         return
     
-    # Show team progress
-    show_team_progress(db, team_id)
+    if resilience.breaker.is_open():
+        st.warning("⚠️ The database is having trouble. Progress may be out of date; correct flags are still accepted and recorded once it recovers.")
+    
+    # Show team progress (one cached TeamViews read renders the page)
+    view = show_team_progress(db, team_id)
+    
+    # Show live scoreboard
+    show_scoreboard(db, team_id)
     
     # Flag submission form
     st.markdown("### 🎯 Submit Flag")
@@ -26,19 +38,26 @@ def show_ctf_page(db):
                 st.error("Please enter both Question ID and Flag!")
             else:
                 # Handle submission without any flag modification
-                handle_flag_submission_ui(db, team_id, qid, flag)
+                view = handle_flag_submission_ui(db, team_id, qid, flag) or view
                 
     # Show available questions
     st.markdown("### 📝 Available Questions")
-    questions = db.collection('Questions').get()
+    catalog = get_question_catalog(db)
+    questions = catalog.questions()
+    solved_questions = solved_qids(view, catalog) if view else set()
+    solves = (view or {}).get('solves') or {}
+    # Imported here so NumPy loads in the warm-up thread, not at app import
+    from utils.scoring import get_scoring_engine
+    values = get_scoring_engine(db).values()
     
     # Create columns for questions
     cols = st.columns(3)
-    for idx, q in enumerate(questions):
-        q_data = q.to_dict()
+    for idx, (question_id, question) in enumerate(questions):
         with cols[idx % 3]:
-            solved = team_id in q_data.get('solvedBy', [])
+            solved = question_id in solved_questions
             status = "✅" if solved else "❌"
+            if question_id in solves:
+                status += f" (+{solves[question_id].get('points', 0)})"
             st.markdown(f"""
                 <div style='background: rgba(0, 255, 157, 0.1); 
                            padding: 1rem; 
@@ -46,7 +65,8 @@ def show_ctf_page(db):
                            border: 1px solid #00ff9d;
                            margin-bottom: 1rem;
                            text-align: center;'>
-                    <h4 style='color: #00ff9d; margin: 0;'>{q_data['qid']}</h4>
+                    <h4 style='color: #00ff9d; margin: 0;'>{question.qid}</h4>
+                    <p style='color: #b3b3b3; margin: 0.5rem 0;'>Points: {values.get(question_id, 0)}</p>
                     <p style='color: #b3b3b3; margin: 0.5rem 0;'>Status: {status}</p>
                 </div>
             """, unsafe_allow_html=True)
@@ -0,0 +1,32 @@
+import streamlit as st
+from utils.scoreboard_hub import get_scoreboard_hub
+
+# Seconds between scoreboard refreshes in each browser session
+REFRESH_SECONDS = 5
+
+def _render_scoreboard(db, team_id, limit):
+    hub = get_scoreboard_hub(db)
+    index = hub.index()
+    
+    st.markdown("### 🏆 Scoreboard")
+    rows = index.top(limit)
+    if not rows:
+        st.info("No solves yet. Be the first! 🚀")
+        return
+    
+    for rank, row_team, score in rows:
+        marker = " 👈" if row_team == team_id else ""
+        st.markdown(f"**#{rank}** {row_team} — {score}{marker}")
+    
+    rank = index.rank(team_id)
+    if rank is not None and rank > limit:
+        st.markdown(f"**#{rank}** {team_id} — {index.score(team_id)} 👈")
+
+def show_scoreboard(db, team_id, limit=10):
+    """Show the live scoreboard, refreshed from shared server memory"""
+    # st.fragment reruns only this block; older Streamlit renders it once per rerun
+    fragment = getattr(st, 'fragment', None)
+    if fragment is None:
+        _render_scoreboard(db, team_id, limit)
+        return
+    fragment(run_every=REFRESH_SECONDS)(_render_scoreboard)(db, team_id, limit)
@@ -1,43 +1,66 @@
 import streamlit as st
-from firebase_admin import firestore
 from utils.handle_submission import handle_flag_submission
+from utils.leaderboard import get_rank_index
+from utils.metrics import timed
+from utils import resilience
+from utils.dedupe import idempotency_key
+from utils.question_catalog import get_question_catalog
+from utils.team_views import get_team_views
+from utils.solve_bitmap import solved_qids
 
-def show_team_progress(db, team_id):
-    """Show team's progress"""
-    # Get team data
-    team_ref = db.collection('Teams').document(team_id)
-    team = team_ref.get()
+@timed('show_team_progress')
+def show_team_progress(db, team_id, view=None):
+    """Show team's progress and return its view (None if unavailable).
+
+    ``view`` is a TeamViews document already at hand, e.g. returned by a
+    submission; otherwise the cached view is used.
+    """
+    if view is None:
+        try:
+            # Falls back to the last snapshot read while Firestore is unavailable
+            view = get_team_views(db).get(team_id)
+        except resilience.Unavailable:
+            st.warning("Team progress is temporarily unavailable. Please try again shortly.")
+            return None
     
-    if not team.exists:
+    if view is None:
         st.error("Team not found!")
-        return
+        return None
         
-    team_data = team.to_dict()
-    questions_solved = team_data.get('questionsSolved', [])
-    total_solved = team_data.get('totalCount', 0)
+    questions_solved = solved_qids(view, get_question_catalog(db))
+    total_solved = view.get('totalCount', 0)
     
     # Display progress
     st.markdown(f"### 📊 Team Progress")
     st.markdown(f"**Team ID:** {team_id}")
     st.markdown(f"**Questions Solved:** {total_solved}")
+    rank = get_rank_index(db).rank(team_id)
+    if rank is not None:
+        st.markdown(f"**Score:** {view.get('score', 0)}")
+        st.markdown(f"**Rank:** #{rank}")
     
     if questions_solved:
         st.markdown("**Solved Questions:**")
         # Create a grid layout for solved questions
         cols = st.columns(5)  # 5 questions per row
-        for idx, qid in enumerate(sorted(questions_solved)):
+        for idx, qid in enumerate(sorted(questions_solved, key=lambda q: (len(q), q))):
             cols[idx % 5].markdown(f"✅ {qid}")
     else:
         st.info("No questions solved yet. Keep trying! 💪")
+    
+    return view
 
 def handle_flag_submission_ui(db, team_id, qid, flag):
-    """Handle flag submission and show UI feedback"""
-    success, message = handle_flag_submission(db, team_id, qid, flag)
+    """Handle flag submission, show UI feedback and return the updated team view"""
+    # Double clicks and resubmissions after a timeout reuse the key
+    key = idempotency_key(st.session_state, team_id, qid, flag)
+    success, message, view = handle_flag_submission(db, team_id, qid, flag, key)
     
     if success:
         st.balloons()  # Show celebration animation
         st.success(message)
-        # Update progress display
-        show_team_progress(db, team_id)
-    else:
-        st.error(message)
+        # Update progress display from the view the submission returned
+        return show_team_progress(db, team_id, view) if view is not None else None
+    
+    st.error(message)
+    return None
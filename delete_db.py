@@ -1,7 +1,7 @@
 import firebase_admin
 from firebase_admin import credentials, firestore
-import time
 import streamlit as st
+from utils.reset_database import delete_collections
 
 def init_firebase():
     """Initialize Firebase with credentials from Streamlit secrets"""
@@ -16,33 +16,17 @@ def init_firebase():
             return None
     return firestore.client()
 
-def delete_collection(coll_ref, batch_size=100):
-    """Delete a collection by batches to avoid timeout"""
-    docs = coll_ref.limit(batch_size).stream()
-    deleted = 0
-
-    for doc in docs:
-        print(f"Deleting doc {doc.id} => {doc.to_dict()}")
-        doc.reference.delete()
-        deleted = deleted + 1
-
-    if deleted >= batch_size:
-        return delete_collection(coll_ref, batch_size)
-
 def delete_all_collections():
     """Delete all collections in the database"""
     db = init_firebase()
     if db is None:
         print("Failed to initialize Firebase. Exiting.")
         return
-    collections = db.collections()
+    names = sorted(collection.id for collection in db.collections())
     
-    print("Starting database cleanup...")
-    for collection in collections:
-        print(f"\nDeleting collection: {collection.id}")
-        delete_collection(collection)
-        time.sleep(1)  # Small delay to avoid rate limiting
-    print("\nDatabase cleanup completed!")
+    print(f"Starting database cleanup: {', '.join(names)}")
+    deleted, failed = delete_collections(db, names)
+    print(f"Database cleanup completed! Deleted {deleted} documents ({failed} failed)")
 
 if __name__ == "__main__":
     delete_all_collections()
@@ -1,9 +1,7 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, auth as firebase_auth, firestore
-import pyrebase
-import json
-import os
+import atexit
+import threading
+from utils.metrics import instrument_client
 
 # Firebase configuration for web app
 firebase_config = {
@@ -16,35 +14,96 @@ firebase_config = {
     "databaseURL": ""  # Add empty databaseURL for Pyrebase compatibility
 }
 
-def get_db():
-    """Initialize Firebase and return Firestore client"""
-    # Check if Firebase is already initialized
+# One Firestore client (and gRPC channel) per server process, shared by every
+# Streamlit session and module. Created lazily on first use.
+_db = None
+_db_lock = threading.Lock()
+_token_verifier = None
+
+def _init_app():
+    """Initialize the default Firebase app from Streamlit secrets"""
+    # The Firebase/Firestore SDKs are heavy; import them on first use only
+    import firebase_admin
+    from firebase_admin import credentials
+    
     if not firebase_admin._apps:
-        try:
-            # Get Firebase credentials from Streamlit secrets
-            firebase_config = dict(st.secrets["firebase"])
-            
-            # Initialize Firebase
-            cred = credentials.Certificate(firebase_config)
-            firebase_admin.initialize_app(cred)
-            
-        except Exception as e:
-            st.error(f"Error initializing Firebase: {str(e)}")
-            st.error("Please make sure you have set up your Firebase credentials in .streamlit/secrets.toml")
-            return None
+        # Get Firebase credentials from Streamlit secrets
+        firebase_config = dict(st.secrets["firebase"])
+        
+        # Initialize Firebase
+        cred = credentials.Certificate(firebase_config)
+        firebase_admin.initialize_app(cred)
+
+def get_db():
+    """Return the process-wide Firestore client, creating it on first use"""
+    global _db
+    if _db is not None:
+        return _db
+    
+    with _db_lock:
+        if _db is None:
+            try:
+                _init_app()
+                from firebase_admin import firestore
+                _db = instrument_client(firestore.client())
+            except Exception as e:
+                st.error(f"Error initializing Firebase: {str(e)}")
+                st.error("Please make sure you have set up your Firebase credentials in .streamlit/secrets.toml")
+                return None
+    return _db
+
+def warm_up():
+    """Create the shared client and open its channel with a cheap read"""
+    return health_check()
+
+def health_check():
+    """Return True if the shared client can reach Firestore"""
+    db = get_db()
+    if db is None:
+        return False
+    try:
+        from utils.repository import questions_collection
+        questions_collection(db).limit(1).get()
+        return True
+    except Exception as e:
+        print(f"Firestore health check failed: {str(e)}")
+        return False
+
+def shutdown():
+    """Close the shared client and release its gRPC channel.
     
-    return firestore.client()
+    Registered with atexit so the channel is closed when the server process
+    exits; safe to call more than once.
+    """
+    global _db
+    with _db_lock:
+        if _db is not None:
+            try:
+                _db.close()
+            except Exception as e:
+                print(f"Error closing Firestore client: {str(e)}")
+            _db = None
+
+atexit.register(shutdown)
+
+def get_token_verifier():
+    """Return the process-wide ID-token verifier"""
+    global _token_verifier
+    if _token_verifier is None:
+        from utils.token_cache import TokenVerifier
+        try:
+            project_id = st.secrets["firebase"]["project_id"]
+        except Exception:
+            project_id = firebase_config["projectId"]
+        with _db_lock:
+            if _token_verifier is None:
+                _token_verifier = TokenVerifier(project_id)
+    return _token_verifier
 
 def verify_token(id_token):
-    """Verify Firebase ID token"""
+    """Verify Firebase ID token (cached until the token expires)"""
     try:
-        if not firebase_admin._apps:
-            get_db()
-        decoded_token = firebase_auth.verify_id_token(id_token)
-        return decoded_token
+        return get_token_verifier().verify(id_token)
     except Exception as e:
         print(f"Token verification error: {str(e)}")
         return None
-
-# Initialize Firebase on module load
-get_db()
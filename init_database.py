@@ -2,6 +2,8 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 import json
 import streamlit as st
+from utils.repository import allocate_bits, question_doc, questions_collection, team_doc, teams_collection
+from utils.reset_database import EVENT_COLLECTIONS, delete_collections
 
 def init_firebase():
     """Initialize Firebase with credentials from Streamlit secrets"""
@@ -24,64 +26,30 @@ if db is None:
 
 def init_database():
     # Sample data for demonstration
-    sample_teams = [
-        {
-            "team_id": "team1",
-            "total_ques_solved": 0,
-            "ques_id": []
-        },
-        {
-            "team_id": "team2",
-            "total_ques_solved": 0,
-            "ques_id": []
-        }
-    ]
+    sample_teams = ["TEAM1", "TEAM2"]
 
-    sample_questions = [
-        {
-            "q_id": "q1",
-            "Flag": "flag{this_is_question_1}",
-            "solved_by": []
-        },
-        {
-            "q_id": "q2",
-            "Flag": "flag{this_is_question_2}",
-            "solved_by": []
-        }
-    ]
+    sample_questions = {
+        "Q1": "flag{this_is_question_1}",
+        "Q2": "flag{this_is_question_2}"
+    }
 
     # Initialize Teams collection
-    teams_ref = db.collection('Teams')
-    for team in sample_teams:
-        doc_ref = teams_ref.document(team["team_id"])
-        doc_ref.set({
-            "total_ques_solved": team["total_ques_solved"],
-            "ques_id": team["ques_id"]
-        })
-        print(f"Added team: {team['team_id']}")
+    teams_ref = teams_collection(db)
+    for team_id in sample_teams:
+        teams_ref.document(team_id).set(team_doc(team_id))
+        print(f"Added team: {team_id}")
 
     # Initialize Questions collection
-    questions_ref = db.collection('Questions')
-    for question in sample_questions:
-        doc_ref = questions_ref.document(question["q_id"])
-        doc_ref.set({
-            "Flag": question["Flag"],
-            "solved_by": question["solved_by"]
-        })
-        print(f"Added question: {question['q_id']}")
+    questions_ref = questions_collection(db)
+    bits = allocate_bits(db, len(sample_questions))
+    for (qid, flag), bit in zip(sample_questions.items(), bits):
+        questions_ref.document(qid).set(question_doc(qid, flag, bit=bit))
+        print(f"Added question: {qid}")
 
 def clear_database():
-    # Delete all documents in Teams collection
-    teams_ref = db.collection('Teams')
-    for doc in teams_ref.stream():
-        doc.reference.delete()
-        print(f"Deleted team: {doc.id}")
-
-    # Delete all documents in Questions collection
-    questions_ref = db.collection('Questions')
-    for doc in questions_ref.stream():
-        doc.reference.delete()
-        print(f"Deleted question: {doc.id}")
+    # Delete the seeded collections and everything derived from them
+    deleted, failed = delete_collections(db, EVENT_COLLECTIONS)
+    print(f"Deleted {deleted} documents ({failed} failed)")
 
 if __name__ == "__main__":
     # First clear the existing data
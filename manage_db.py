@@ -1,122 +1,85 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
 import argparse
 from datetime import datetime
-import streamlit as st
+import firebase_init
+from utils.flag_index import get_flag_index, CORRECT
+from utils.question_catalog import get_question_catalog
+from utils.submission_log import get_submission_log
+from utils.solve_pipeline import record_solve, submit_solve, SOLVED, ALREADY_SOLVED, TEAM_NOT_FOUND, PENDING
+from utils.metrics import timed
+from utils.dedupe import submit_once
+from utils.repository import question_doc
+from utils.question_sync import sync_questions, sync_teams
 
-def init_firebase():
-    """Initialize Firebase with credentials from service account"""
-    if not firebase_admin._apps:
-        try:
-            # Use the centralized firebase initialization
-            from firebase_init import init_firebase as init_firebase_auth
-            auth = init_firebase_auth()
-            if not auth:
-                print("Failed to initialize Firebase Authentication")
-                return None
-            return firestore.client()
-        except Exception as e:
-            print(f"Firebase initialization error: {str(e)}")
-            return None
-    return firestore.client()
+SOLVED_MESSAGE = " Congratulations! Flag captured successfully! "
+INCORRECT_MESSAGE = "Incorrect flag. Keep trying!"
+ALREADY_SOLVED_MESSAGE = "You've already solved this question!"
+# Outcomes replayed for a resubmitted idempotency key; anything else
+# (unknown question, queued solve, errors) is checked again on retry
+FINAL_MESSAGES = (SOLVED_MESSAGE, INCORRECT_MESSAGE, ALREADY_SOLVED_MESSAGE)
 
 def get_db():
-    """Get Firestore database instance"""
-    if 'db' not in st.session_state:
-        st.session_state.db = init_firebase()
-    return st.session_state.db
+    """Get the shared Firestore database instance"""
+    return firebase_init.get_db()
 
-def verify_flag(team_id, question_id, submitted_flag):
-    """Verify a submitted flag and update stats if correct"""
+@timed('verify_flag')
+def verify_flag(team_id, question_id, submitted_flag, idempotency_key=None):
+    """Verify a submitted flag and update stats if correct.
+
+    Concurrent identical submissions share one verification, and a
+    resubmission with the same ``idempotency_key`` returns the first result.
+    """
+    return submit_once(team_id, question_id, submitted_flag, idempotency_key,
+                       lambda: _verify_flag(team_id, question_id, submitted_flag, idempotency_key),
+                       lambda result: result[1] in FINAL_MESSAGES)
+
+def _verify_flag(team_id, question_id, submitted_flag, idempotency_key):
     db = get_db()
     
-    # Check if question exists and flag matches
-    question_ref = db.collection('Questions').document(question_id)
-    question_doc = question_ref.get()
+    # Check question and flag against the local index before any reads
+    catalog = get_question_catalog(db)
+    result = get_flag_index(db).check(question_id, submitted_flag)
+    question_data = catalog.get(question_id)
     
-    if not question_doc.exists:
+    if question_data is None:
         return False, "Question not found", None
     
-    question_data = question_doc.to_dict()
-    
-    # Check if team has already solved this question
-    team_ref = db.collection('Teams').document(team_id)
-    team_doc = team_ref.get()
-    
-    if not team_doc.exists:
-        return False, "Team not found", None
-        
-    team_data = team_doc.to_dict()
-    if question_id in team_data.get('solvedQuestions', []):
-        return False, "You've already solved this question!", None
-        
     # Verify flag
-    if question_data.get('flag') != submitted_flag:
+    if result is not CORRECT:
         # Record wrong submission
-        record_submission(team_id, question_id, False)
-        return False, "Incorrect flag. Keep trying!", None
-    
-    # Update statistics for correct submission
-    success = update_stats(team_id, question_id)
-    if success:
-        # Record successful submission
-        record_submission(team_id, question_id, True)
-        return True, " Congratulations! Flag captured successfully! ", question_data.get('points', 0)
+        record_submission(team_id, question_id, False, idempotency_key)
+        return False, INCORRECT_MESSAGE, None
+    
+    # Update statistics for correct submission (team, question and
+    # submission record are written in one commit)
+    result = submit_solve(db, team_id, question_id, idempotency_key)
+    if result in (SOLVED, PENDING):
+        from utils.scoring import get_scoring_engine
+        points = get_scoring_engine(db).value(question_id)
+    if result == SOLVED:
+        return True, SOLVED_MESSAGE, points
+    if result == PENDING:
+        return True, " Flag captured! Your solve will be recorded once the database is reachable. ", points
+    
+    if result == ALREADY_SOLVED:
+        return False, ALREADY_SOLVED_MESSAGE, None
+    if result == TEAM_NOT_FOUND:
+        return False, "Team not found", None
     
     return False, "Error updating statistics", None
 
 def update_stats(team_id, question_id):
     """Update team and question statistics after successful flag submission"""
-    db = get_db()
-    current_time = datetime.now()
-    
-    # Update team stats
-    team_ref = db.collection('Teams').document(team_id)
-    team_doc = team_ref.get()
-    
-    if not team_doc.exists:
-        return False
-    
-    team_data = team_doc.to_dict()
-    
-    # Initialize if not exists
-    if 'solvedQuestions' not in team_data:
-        team_data['solvedQuestions'] = []
-    if 'totalCount' not in team_data:
-        team_data['totalCount'] = 0
-    
-    # Update team's solved questions and count
-    if question_id not in team_data['solvedQuestions']:
-        team_data['solvedQuestions'].append(question_id)
-        team_data['totalCount'] = len(team_data['solvedQuestions'])
-        team_data['timestamp'] = current_time
-        team_ref.set(team_data)
-        
-        # Update question's solved_by list
-        question_ref = db.collection('Questions').document(question_id)
-        question_doc = question_ref.get()
-        
-        if question_doc.exists:
-            question_data = question_doc.to_dict()
-            if 'solvedBy' not in question_data:
-                question_data['solvedBy'] = []
-            
-            if team_id not in question_data['solvedBy']:
-                question_data['solvedBy'].append(team_id)
-                question_ref.set(question_data)
-        
-        return True
-    
-    return False
+    return record_solve(get_db(), team_id, question_id) == SOLVED
 
-def record_submission(team_id, question_id, is_correct):
-    """Record submission details"""
+def record_submission(team_id, question_id, is_correct, idempotency_key=None):
+    """Queue submission details for the background writer"""
     db = get_db()
-    db.collection('Submissions').add({
+    get_submission_log(db).enqueue({
         'teamId': team_id,
         'questionId': question_id,
         'timestamp': datetime.now(),
-        'isCorrect': is_correct
+        'isCorrect': is_correct,
+        'idempotencyKey': idempotency_key
     })
 
 # Initialize database with teams and questions
@@ -125,10 +88,7 @@ def init_database():
     db = get_db()
     
     # Add teams
-    teams = [
-        {'teamId': f'TEAM{i}', 'solvedQuestions': [], 'totalCount': 0, 'timestamp': None}
-        for i in range(1, 11)
-    ]
+    team_ids = [f'TEAM{i}' for i in range(1, 11)]
     
     # Sample flags for questions
     flags = [
@@ -144,21 +104,10 @@ def init_database():
         'CTF{final_boss_defeated}'
     ]
     
-    # Add questions
-    questions = [
-        {'qid': f'Q{i}', 'flag': flags[i-1], 'solvedBy': []}
-        for i in range(1, 11)
-    ]
-    
-    # Batch write teams
-    for team in teams:
-        team_ref = db.collection('Teams').document(team['teamId'])
-        team_ref.set(team)
-    
-    # Batch write questions
-    for question in questions:
-        question_ref = db.collection('Questions').document(question['qid'])
-        question_ref.set(question)
+    # Create missing teams and write only changed question fields, so
+    # re-running mid-event keeps every solve
+    sync_teams(db, team_ids)
+    sync_questions(db, {f'Q{i}': question_doc(f'Q{i}', flag) for i, flag in enumerate(flags, start=1)})
     
     print("Database initialized with teams and questions!")
 
@@ -1,11 +1,11 @@
 import streamlit as st
 from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
-from manage_db import verify_flag, update_stats, get_db
-
-# Get database instance
-db = get_db()
+from manage_db import verify_flag, get_db
+from utils import resilience
+from utils.dedupe import idempotency_key
+from utils.question_catalog import get_question_catalog
+from utils.solve_bitmap import solved_qids
+from utils.team_views import get_team_views
 
 # Apply consistent cyberpunk styling
 st.markdown("""
@@ -229,35 +229,35 @@ def render():
                 st.error("Please fill in all fields")
             else:
                 # Verify flag
-                success, message, points = verify_flag(team_id, question_id, flag)
+                key = idempotency_key(st.session_state, team_id, question_id, flag)
+                success, message, points = verify_flag(team_id, question_id, flag, key)
                 if success:
                     st.balloons()
-                    st.success(f"🎉 {message}")
+                    st.success(f"🎉 {message} (question worth {points} points)")
                 else:
                     if "already solved" in message.lower():
                         st.warning("🔄 Already submitted! You've solved this question before.")
                     else:
                         st.error(f"❌ {message}")
-                # Update team statistics
-                if success:
-                    update_stats(team_id, question_id)
         
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Show team progress if team_id is provided
         if team_id:
-            show_team_progress(db, team_id)
+            show_team_progress(get_db(), team_id)
 
 def show_team_progress(db, team_id):
     """Show team's progress"""
     if team_id:
-        team_ref = db.collection('Teams').document(team_id)
-        team_doc = team_ref.get()
-        
-        if team_doc.exists:
-            team_data = team_doc.to_dict()
-            solved_questions = team_data.get('solvedQuestions', [])
-            total_count = team_data.get('totalCount', 0)
+        try:
+            view = get_team_views(db).get(team_id)
+        except resilience.Unavailable:
+            st.warning("Team progress is temporarily unavailable. Please try again shortly.")
+            return
+        
+        if view is not None:
+            solved_questions = sorted(solved_qids(view, get_question_catalog(db)), key=lambda q: (len(q), q))
+            total_count = view.get('totalCount', 0)
             
             st.markdown(f"### Your Progress")
             st.write(f"Total Questions Solved: {total_count}")
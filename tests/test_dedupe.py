@@ -0,0 +1,21 @@
+import uuid
+
+from utils.dedupe import submit_once
+
+FINAL = ('solved', 'wrong flag')
+
+def _submit(key, outcomes, calls):
+    def func():
+        calls.append(key)
+        return outcomes.pop(0)
+    return submit_once('TEAM1', 'Q1', 'CTF{x}', key, func, lambda result: result[1] in FINAL)
+
+def test_transient_failures_are_not_replayed_for_the_key():
+    key = uuid.uuid4().hex
+    calls = []
+    outcomes = [(False, 'error'), (True, 'solved'), (False, 'error')]
+    assert _submit(key, outcomes, calls) == (False, 'error')
+    # Firestore recovered: the retry runs again and its final result sticks
+    assert _submit(key, outcomes, calls) == (True, 'solved')
+    assert _submit(key, outcomes, calls) == (True, 'solved')
+    assert len(calls) == 2
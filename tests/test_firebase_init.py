@@ -0,0 +1,36 @@
+import threading
+import time
+
+import firebase_init
+
+def test_concurrent_sessions_share_one_client(monkeypatch):
+    """100 sessions calling get_db() at once open exactly one channel"""
+    from firebase_admin import firestore
+    calls = []
+
+    def client():
+        calls.append(threading.get_ident())
+        # Widen the window in which a second session could race in
+        time.sleep(0.05)
+        return object()
+
+    monkeypatch.setattr(firebase_init, '_db', None)
+    monkeypatch.setattr(firebase_init, '_init_app', lambda: None)
+    monkeypatch.setattr(firestore, 'client', client)
+
+    barrier = threading.Barrier(100)
+    clients = []
+
+    def session():
+        barrier.wait()
+        clients.append(firebase_init.get_db())
+
+    threads = [threading.Thread(target=session) for _ in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(clients) == 100
+    assert all(db is clients[0] for db in clients)
@@ -0,0 +1,19 @@
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.load_test import seed
+from utils.flag_index import get_flag_index
+from utils.handle_submission import INCORRECT_MESSAGE, SOLVED_MESSAGE, handle_flag_submission
+from utils.team_views import get_team_views
+
+def test_only_a_solve_returns_a_view_and_wrong_flags_touch_nothing():
+    db = FakeFirestore()
+    team_ids, flags = seed(db, teams=2, questions=3)
+    get_flag_index(db)
+    before = db.counters()
+
+    assert handle_flag_submission(db, 'TEAM1', 'Q1', 'CTF{wrong}') == (False, INCORRECT_MESSAGE, None)
+    assert db.counters() == before
+
+    success, message, view = handle_flag_submission(db, 'TEAM1', 'Q2', flags['Q2'])
+    assert (success, message) == (True, SOLVED_MESSAGE)
+    assert view is get_team_views(db).cached('TEAM1')
+    assert set(view['solves']) == {'Q2'}
@@ -0,0 +1,44 @@
+import json
+import logging
+import sys
+
+from utils.json_logging import REDACTED, JsonFormatter, SamplingFilter, parse_sample, redact
+
+def _record(msg, *args, exc_info=None, **extra):
+    logger = logging.getLogger('ctf.test')
+    return logger.makeRecord(logger.name, logging.INFO, __file__, 1, msg, args, exc_info, extra=extra)
+
+def _format(record):
+    return json.loads(JsonFormatter().format(record))
+
+def test_redact_masks_flag_shaped_strings():
+    assert redact('wrong flag CTF{guess_1} for Q3') == f'wrong flag CTF{{{REDACTED}}} for Q3'
+    assert redact('FLAG{a} and ctf{b}') == f'FLAG{{{REDACTED}}} and ctf{{{REDACTED}}}'
+    assert redact('no flags {here}') == 'no flags {here}'
+
+def test_messages_and_extras_are_redacted():
+    entry = _format(_record('team %s submitted %s', 'TEAM1', 'CTF{secret}', flag='CTF{secret}',
+                            Token='eyJhbGciOi', submitted_flag=['CTF{secret}'], note='tried CTF{secret}',
+                            qid='Q3'))
+    assert entry['msg'] == f'team TEAM1 submitted CTF{{{REDACTED}}}'
+    assert entry['flag'] == entry['Token'] == entry['submitted_flag'] == REDACTED
+    assert entry['note'] == f'tried CTF{{{REDACTED}}}'
+    assert entry['qid'] == 'Q3'
+    assert 'CTF{secret}' not in json.dumps(entry)
+
+def test_tracebacks_and_unserializable_extras_are_redacted():
+    try:
+        raise ValueError('bad flag CTF{secret}')
+    except ValueError:
+        record = _record('verify failed', exc_info=sys.exc_info(), answer=ValueError('CTF{secret}'))
+    entry = _format(record)
+    assert 'CTF{secret}' not in entry['exc'] and REDACTED in entry['exc']
+    assert entry['answer'] == f'CTF{{{REDACTED}}}'
+
+def test_sampling_keeps_warnings_and_marked_records():
+    sample = SamplingFilter(parse_sample('INFO=0'))
+    assert not sample.filter(_record('dropped'))
+    assert sample.filter(_record('kept', keep=True))
+    warning = _record('kept')
+    warning.levelno = logging.WARNING
+    assert sample.filter(warning)
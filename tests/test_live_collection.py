@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+
+from benchmarks.fake_firestore import FakeCollection, FakeFirestore
+from benchmarks.load_test import seed
+from utils.question_catalog import QuestionCatalog
+from utils.repository import question_doc, question_ref, team_ref
+from utils.scoring import get_scoring_engine
+from utils.solve_bitmap import bit_for, with_bit
+from utils.team_registry import get_team_registry
+
+def _change(kind, doc):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=doc)
+
+class _Watch:
+    is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+class _WatchedCollection(FakeCollection):
+    def on_snapshot(self, callback):
+        watch = _Watch()
+        self._client.watches.append((self.id, watch, callback))
+        docs = self.get()
+        callback(docs, [_change('ADDED', doc) for doc in docs], None)
+        return watch
+
+class _WatchedFirestore(FakeFirestore):
+    """Fake whose top-level collections accept snapshot listeners"""
+
+    def __init__(self):
+        super().__init__()
+        self.watches = []
+
+    def collection(self, name):
+        return _WatchedCollection(self, name)
+
+def test_registry_and_scoring_share_one_teams_listener():
+    db = _WatchedFirestore()
+    seed(db, teams=3, questions=2)
+    registry = get_team_registry(db)
+    engine = get_scoring_engine(db)
+
+    assert [name for name, _, _ in db.watches].count('Teams') == 1
+    assert registry.search('team') == ['TEAM1', 'TEAM2', 'TEAM3']
+    assert set(engine.scores()) == {'TEAM1', 'TEAM2', 'TEAM3'}
+
+    # A change delivered once reaches both consumers
+    _, _, callback = next(watch for watch in db.watches if watch[0] == 'Teams')
+    team_ref(db, 'TEAM4').set({'name': 'Red Team', 'solvedBits': with_bit(b'', bit_for(engine.catalog, 'Q1'))})
+    callback([], [_change('ADDED', team_ref(db, 'TEAM4').get())], None)
+    assert registry.label('TEAM4') == 'Red Team (TEAM4)'
+    assert engine.scores()['TEAM4'] == 1
+
+def test_a_stopped_listener_falls_back_to_polling():
+    db = _WatchedFirestore()
+    question_ref(db, 'Q1').set(question_doc('Q1', 'CTF{one}'))
+    catalog = QuestionCatalog(db, ttl=0).start()
+    _, watch, callback = db.watches[-1]
+
+    # The SDK closed the watch after an error; nothing more is delivered
+    watch.is_active = False
+    question_ref(db, 'Q2').set(question_doc('Q2', 'CTF{two}'))
+    assert catalog.get('Q2') is not None
+    assert not catalog.watching
+
+def test_a_snapshot_that_fails_to_apply_switches_to_polling():
+    db = _WatchedFirestore()
+    catalog = QuestionCatalog(db, ttl=0).start()
+    _, watch, callback = db.watches[-1]
+
+    callback([], [SimpleNamespace(type=None, document=None)], None)
+    question_ref(db, 'Q3').set(question_doc('Q3', 'CTF{three}'))
+    assert catalog.get('Q3') is not None
+    assert not watch.is_active
@@ -0,0 +1,51 @@
+from benchmarks.fake_firestore import FakeFirestore
+from utils.migrate_schema import MAX_WRITES, SchemaMigration, checkpoint_ref
+from utils.repository import get_team, question_ref, team_ref
+
+def _seed(db, solvers):
+    """Legacy questions with solvedBy arrays; ``solvers`` is {qid: team count}"""
+    offset = 0
+    for qid, count in solvers.items():
+        team_ids = [f"TEAM{offset + i}" for i in range(count)]
+        offset += count
+        for team_id in team_ids:
+            team_ref(db, team_id).set({'teamid': team_id, 'total_ques_solved': 0})
+        question_ref(db, qid).set({'Flag': f"CTF{{{qid}}}", 'solvedBy': team_ids})
+    return offset
+
+def _commits_within_limit(db):
+    """Fail if any commit carries more writes than a transaction allows"""
+    commit = db._commit
+    sizes = []
+
+    def checked(writes, read_versions=None):
+        sizes.append(len(writes))
+        assert len(writes) <= MAX_WRITES
+        return commit(writes, read_versions)
+
+    db._commit = checked
+    return sizes
+
+def test_pages_with_many_solver_teams_are_split():
+    db = FakeFirestore()
+    teams = _seed(db, {'Q1': 300, 'Q2': 300, 'Q3': MAX_WRITES + 100})
+    sizes = _commits_within_limit(db)
+
+    SchemaMigration(db).run()
+
+    assert max(sizes) <= MAX_WRITES
+    for i in range(teams):
+        team = get_team(db, f"TEAM{i}")
+        assert team.total_count == 1
+    assert 'solvedBy' not in question_ref(db, 'Q3').get().to_dict()
+    assert SchemaMigration(db).run() == 0
+
+def test_dry_run_restart_ignores_the_checkpoint_without_clearing_it():
+    db = FakeFirestore()
+    _seed(db, {'Q1': 2})
+    SchemaMigration(db).run()
+    checkpoint = checkpoint_ref(db).get().to_dict()
+
+    # A restart re-checks every document; all of them are already current
+    assert SchemaMigration(db, dry_run=True, restart=True).run() == 0
+    assert checkpoint_ref(db).get().to_dict() == checkpoint
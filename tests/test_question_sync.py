@@ -0,0 +1,24 @@
+from benchmarks.fake_firestore import FakeFirestore
+from utils.question_sync import sync_questions, sync_teams
+from utils.repository import question_doc, question_ref, team_ref
+
+def test_sync_writes_changed_fields_and_keeps_solve_state():
+    db = FakeFirestore()
+    question_ref(db, 'Q1').set({'flag': 'CTF{old}', 'points': 100, 'firstBlood': {'teamId': 'TEAM1'}})
+    source = {'Q1': question_doc('Q1', 'CTF{new}', 100), 'Q2': question_doc('Q2', 'CTF{two}')}
+
+    plan = sync_questions(db, source)
+    assert len(plan.creates) == 1 and len(plan.updates) == 1
+    stored = question_ref(db, 'Q1').get().to_dict()
+    assert stored['flag'] == 'CTF{new}'
+    assert stored['firstBlood'] == {'teamId': 'TEAM1'}
+
+    assert sync_questions(db, source).writes == 0
+
+def test_sync_teams_keeps_existing_names():
+    db = FakeFirestore()
+    team_ref(db, 'TEAM1').set({'name': 'Red Team', 'solvedBits': b'\x02', 'totalCount': 1})
+
+    plan = sync_teams(db, ['TEAM1', 'TEAM2'])
+    assert [ref.id for ref, _ in plan.creates] == ['TEAM2']
+    assert team_ref(db, 'TEAM1').get().to_dict() == {'name': 'Red Team', 'solvedBits': b'\x02', 'totalCount': 1}
@@ -0,0 +1,17 @@
+from benchmarks.fake_firestore import FakeFirestore
+from benchmarks.load_test import seed
+from utils.reset_database import EVENT_COLLECTIONS, count_documents
+from utils.setup_database import clear_database
+from utils.solve_pipeline import SOLVED, record_solve
+
+def test_clear_removes_state_derived_from_solves():
+    db = FakeFirestore()
+    seed(db, teams=2, questions=2)
+    assert record_solve(db, 'TEAM1', 'Q1', idempotency_key='key') == SOLVED
+    for name in ('TeamViews', 'Scoreboard', 'Submissions', 'Counters'):
+        assert db.collection(name).get()
+
+    clear_database(db)
+    assert count_documents(db, EVENT_COLLECTIONS) == dict.fromkeys(EVENT_COLLECTIONS, 0)
+    # Solver records and counter shards under Questions go too
+    assert not db._docs
@@ -0,0 +1,95 @@
+import json
+import time
+
+import pytest
+
+from utils import resilience
+from utils.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryQueue
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(threshold=3, reset_timeout=0.05)
+    monkeypatch.setattr(resilience, 'breaker', breaker)
+    monkeypatch.setattr(resilience, 'BASE_DELAY', 0.001)
+    return breaker
+
+def _failing(errors, result='ok'):
+    """Return a function raising ``errors`` in turn, then returning ``result``"""
+    errors = list(errors)
+
+    def func():
+        if errors:
+            raise errors.pop(0)
+        return result
+    return func
+
+def test_breaker_opens_probes_and_closes():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    # Only the one probe goes through
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.opened == 2
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+def test_transient_errors_are_retried_only_when_idempotent(breaker):
+    assert resilience.call(_failing([ConnectionError(), ConnectionError()])) == 'ok'
+    with pytest.raises(resilience.Unavailable):
+        resilience.call(_failing([ConnectionError()]), idempotent=False)
+
+def test_other_errors_propagate_and_count_as_an_answer(breaker):
+    breaker.record_failure()
+    with pytest.raises(KeyError):
+        resilience.call(_failing([KeyError('qid')]))
+    assert breaker.failures == 0
+
+def test_a_hung_call_hits_the_deadline_and_opens_the_circuit(breaker):
+    for _ in range(3):
+        with pytest.raises(resilience.DeadlineExceeded):
+            resilience.call(lambda: time.sleep(0.5), deadline=0.05)
+    assert breaker.state == OPEN
+    with pytest.raises(resilience.CircuitOpen):
+        resilience.call(lambda: 'ok')
+
+def test_reads_fall_back_to_the_last_good_result(breaker):
+    key = ('test', time.time())
+    assert resilience.read(key, lambda: 'fresh') == 'fresh'
+    assert resilience.read(key, _failing([ConnectionError()] * 3), deadline=1) == 'fresh'
+    with pytest.raises(resilience.Unavailable):
+        resilience.read(('test', 'never read'), _failing([ConnectionError()] * 3), deadline=1)
+
+def test_drain_replays_dead_letters_and_stops_when_unavailable(breaker, tmp_path):
+    replayed = []
+    outcomes = {'bad': ValueError('no such question'), 'down': ConnectionError('offline')}
+
+    @resilience.register_write('test_write')
+    def replay(db, name):
+        if name in outcomes:
+            raise outcomes.pop(name)
+        replayed.append(name)
+
+    retry_queue = RetryQueue(None, path=str(tmp_path / 'pending.jsonl'),
+                             dead_letter_path=str(tmp_path / 'failed.jsonl'))
+    for name in ('a', 'bad', 'b', 'down', 'c'):
+        retry_queue.enqueue('test_write', {'name': name})
+
+    # 'down' is transient: it and everything after it stay queued in order
+    assert retry_queue.drain() == 3
+    assert replayed == ['a', 'b']
+    assert retry_queue.pending() == 2 and retry_queue.failed() == 1
+    failed = json.loads((tmp_path / 'failed.jsonl').read_text())
+    assert failed['payload'] == {'name': 'bad'} and failed['error'].startswith('ValueError')
+
+    assert retry_queue.drain() == 2
+    assert replayed == ['a', 'b', 'down', 'c']
+    assert retry_queue.pending() == 0
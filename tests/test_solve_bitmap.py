@@ -0,0 +1,69 @@
+import pytest
+
+from benchmarks.fake_firestore import FakeFirestore
+from utils.handle_submission import SOLVED_MESSAGE, handle_flag_submission
+from utils.migrate_schema import SchemaMigration
+from utils.question_catalog import get_question_catalog
+from utils.question_sync import sync_questions, sync_teams
+from utils.repository import (
+    Question, allocate_bits, bit_counter_ref, get_question, question_doc, question_ref, team_ref
+)
+from utils.solve_bitmap import MAX_BITS, catalog_bits, question_bit, solved_qids, with_bit
+
+class _Catalog:
+    version = 1
+
+    def __init__(self, questions):
+        self._questions = questions
+
+    def questions(self):
+        return [(question.qid, question) for question in self._questions]
+
+def test_only_canonical_ids_imply_a_bit():
+    assert question_bit('Q1') == 1
+    assert question_bit('Q01') is None
+    assert question_bit(f'Q{MAX_BITS}') is None
+    with pytest.raises(ValueError):
+        with_bit(b'', MAX_BITS)
+
+def test_shared_bits_go_to_the_explicit_one():
+    catalog = _Catalog([Question.from_doc('Q1', {}), Question.from_doc('intro', {'bit': 1}),
+                        Question.from_doc('Q2', {'bit': MAX_BITS})])
+    assert catalog_bits(catalog) == {'version': 1, 'bits': {'intro': 1}, 'qids': {1: 'intro'}}
+
+def test_a_colliding_question_is_solved_without_a_bit():
+    db = FakeFirestore()
+    sync_teams(db, ['TEAM1'])
+    sync_questions(db, {'QX': question_doc('QX', 'CTF{x}'), 'Q1': question_doc('Q1', 'CTF{one}')})
+    # Added by hand without a bit; Q0 implies bit 0, which QX holds
+    question_ref(db, 'Q0').set(question_doc('Q0', 'CTF{zero}'))
+
+    results = [handle_flag_submission(db, 'TEAM1', qid, flag)
+               for qid, flag in (('Q0', 'CTF{zero}'), ('QX', 'CTF{x}'), ('Q1', 'CTF{one}'))]
+    assert [message for _, message, _ in results] == [SOLVED_MESSAGE] * 3
+    team = team_ref(db, 'TEAM1').get().to_dict()
+    assert team['questionsSolved'] == ['Q0'] and team['totalCount'] == 3
+    assert solved_qids(results[-1][2], get_question_catalog(db)) == {'Q0', 'Q1', 'QX'}
+
+def test_new_questions_get_unique_persisted_bits():
+    db = FakeFirestore()
+    # Written before the counter existed; implies bit 5
+    question_ref(db, 'Q5').set(question_doc('Q5', 'CTF{five}'))
+
+    sync_questions(db, {qid: question_doc(qid, f'CTF{{{qid}}}') for qid in ('Q1', 'Q01', 'intro')})
+    bits = [get_question(db, qid).bit for qid in ('Q1', 'Q01', 'intro')]
+    assert bits == [6, 7, 8]
+    assert bit_counter_ref(db).get().to_dict() == {'next': 9}
+    assert allocate_bits(db, 2) == [9, 10]
+
+def test_migration_pins_bits_and_reassigns_duplicates():
+    db = FakeFirestore()
+    question_ref(db, 'Q1').set(question_doc('Q1', 'CTF{one}'))
+    question_ref(db, 'intro').set(question_doc('intro', 'CTF{intro}', bit=1))
+    question_ref(db, 'Q2').set(question_doc('Q2', 'CTF{two}'))
+
+    SchemaMigration(db).run()
+    bits = {qid: get_question(db, qid).bit for qid in ('Q1', 'Q2', 'intro')}
+    assert bits == {'intro': 1, 'Q2': 2, 'Q1': 3}
+    assert bit_counter_ref(db).get().to_dict() == {'next': 4}
+    assert allocate_bits(db, 1) == [4]
@@ -0,0 +1,72 @@
+import threading
+from datetime import datetime
+
+from benchmarks.fake_firestore import FakeFirestore
+from utils.repository import allocate_bits, get_team, question_doc, question_ref, team_doc, team_ref
+from utils.sharded_counter import ShardedCounter
+from utils.solve_bitmap import has_bit
+from utils.solve_pipeline import SOLVED, record_solve
+
+def test_concurrent_solves_of_one_question_lose_no_updates():
+    """30 teams solving the same question at the same moment are all recorded"""
+    db = FakeFirestore(latency_ms=2)
+    qid = 'Q7'
+    team_ids = [f"TEAM{i}" for i in range(1, 31)]
+    bit, = allocate_bits(db, 1)
+    batch = db.batch()
+    batch.set(question_ref(db, qid), question_doc(qid, 'CTF{burst}', bit=bit))
+    for team_id in team_ids:
+        batch.set(team_ref(db, team_id), team_doc(team_id))
+    batch.commit()
+
+    barrier = threading.Barrier(len(team_ids))
+    results = {}
+
+    def solve(team_id):
+        barrier.wait()
+        results[team_id] = record_solve(db, team_id, qid, datetime.now())
+
+    threads = [threading.Thread(target=solve, args=(team_id,)) for team_id in team_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert list(results.values()).count(SOLVED) == len(team_ids)
+    for team_id in team_ids:
+        team = get_team(db, team_id)
+        assert has_bit(team.solved_bits, bit)
+        assert team.total_count == 1
+    assert ShardedCounter(question_ref(db, qid)).value() == len(team_ids)
+    assert len(question_ref(db, qid).collection('solvers').get()) == len(team_ids)
+    # Exactly one team got first blood
+    assert question_ref(db, qid).get().to_dict()['firstBlood']['teamId'] in team_ids
+
+def test_a_wrong_flag_record_does_not_count_as_a_solve(monkeypatch):
+    """A key first used for a wrong flag still records the solve once the flag is fixed"""
+    import firebase_init
+    import manage_db
+    from utils import dedupe
+    from utils.question_catalog import get_question_catalog
+    from utils.question_sync import sync_questions, sync_teams
+    from utils.submission_log import get_submission_log
+
+    db = FakeFirestore()
+    monkeypatch.setattr(firebase_init, '_db', db)
+    sync_teams(db, ['TEAM1'])
+    sync_questions(db, {'Q1': question_doc('Q1', 'CTF{real}')})
+    key = 'retry-key'
+
+    assert manage_db.verify_flag('TEAM1', 'Q1', 'CTF{typo}', key)[1] == manage_db.INCORRECT_MESSAGE
+    # The audit record lands at Submissions/{key}
+    get_submission_log(db).stop()
+    assert db.collection('Submissions').document(key).get().exists
+
+    # The organiser fixes the flag; the replay cache has expired
+    sync_questions(db, {'Q1': question_doc('Q1', 'CTF{typo}')})
+    get_question_catalog(db).reload()
+    monkeypatch.setattr(dedupe, '_results', dedupe.ResultCache())
+
+    assert manage_db.verify_flag('TEAM1', 'Q1', 'CTF{typo}', key)[1] == manage_db.SOLVED_MESSAGE
+    team = get_team(db, 'TEAM1')
+    assert team.total_count == 1 and team.solved_bits
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from benchmarks.fake_firestore import FakeFirestore
+from utils.submission_log import SubmissionLog
+
+class _FailingFirestore(FakeFirestore):
+    """Fake whose batch commits always fail"""
+
+    def batch(self):
+        batch = super().batch()
+
+        def commit(**kwargs):
+            raise RuntimeError('deadline exceeded')
+
+        batch.commit = commit
+        return batch
+
+def _record(i, key=None):
+    return {'teamId': 'TEAM1', 'questionId': f'Q{i}', 'timestamp': datetime(2024, 1, 1, 12, 0, i),
+            'isCorrect': False, 'idempotencyKey': key}
+
+def _submissions(db):
+    return {doc.id: doc.to_dict() for doc in db.collection('Submissions').get()}
+
+def test_a_failed_batch_spills_and_is_replayed_on_start(tmp_path):
+    spill = tmp_path / 'spill.jsonl'
+    failing = _FailingFirestore()
+    log = SubmissionLog(failing, spill_path=str(spill))
+    for i in range(3):
+        log.enqueue(_record(i, key=f'key-{i}'))
+    # stop() flushes what's still queued; the commit fails, so it all spills
+    log.stop()
+    assert not _submissions(failing)
+    assert len(spill.read_text().splitlines()) == 3
+
+    db = FakeFirestore()
+    SubmissionLog(db, flush_interval_ms=50, spill_path=str(spill)).start().stop()
+    submissions = _submissions(db)
+    assert set(submissions) == {'key-0', 'key-1', 'key-2'}
+    # Timestamps survive the round trip through the spill file
+    assert submissions['key-2']['timestamp'] == datetime(2024, 1, 1, 12, 0, 2)
+    assert not spill.exists()
+
+def test_records_that_dont_fit_in_the_queue_spill(tmp_path):
+    spill = tmp_path / 'spill.jsonl'
+    db = FakeFirestore()
+    log = SubmissionLog(db, max_queued=2, spill_path=str(spill))
+    for i in range(5):
+        log.enqueue(_record(i))
+    assert len(spill.read_text().splitlines()) == 3
+
+    log.stop()
+    assert len(_submissions(db)) == 2
+    SubmissionLog(db, flush_interval_ms=50, spill_path=str(spill)).start().stop()
+    assert sorted(record['questionId'] for record in _submissions(db).values()) == ['Q0', 'Q1', 'Q2', 'Q3', 'Q4']
+
+def test_replayed_keyed_records_overwrite_themselves(tmp_path):
+    spill = tmp_path / 'spill.jsonl'
+    db = FakeFirestore()
+    log = SubmissionLog(db, spill_path=str(spill))
+    log.enqueue(_record(1, key='key-1'))
+    log.stop()
+    # The same record spilled too (e.g. a commit that landed but reported failure)
+    log._spill([_record(1, key='key-1')])
+
+    SubmissionLog(db, flush_interval_ms=50, spill_path=str(spill)).start().stop()
+    assert list(_submissions(db)) == ['key-1']
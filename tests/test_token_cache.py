@@ -0,0 +1,93 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.bench_token_verify import PROJECT_ID, bad_tokens, make_signing_key, make_token
+from utils import token_cache
+from utils.token_cache import CertStore, TokenVerifier
+
+@pytest.fixture(scope='module')
+def signing_key():
+    """A locally generated signer and the {kid: pem} certs that verify it"""
+    return make_signing_key()
+
+@pytest.fixture
+def fetches(signing_key):
+    """Counts cert downloads; ``fetches.fetch`` is the CertStore fetcher"""
+    _, certs = signing_key
+    fetches = SimpleNamespace(calls=[])
+
+    def fetch():
+        fetches.calls.append(time.monotonic())
+        return certs, 3600
+
+    fetches.fetch = fetch
+    return fetches
+
+@pytest.fixture
+def verifier(fetches):
+    return TokenVerifier(PROJECT_ID, CertStore(fetch=fetches.fetch, kid_refresh_interval=60))
+
+def _count_decodes(monkeypatch, verifier):
+    decodes = []
+    decode = verifier._decode
+
+    def counted(id_token):
+        decodes.append(id_token)
+        return decode(id_token)
+
+    monkeypatch.setattr(verifier, '_decode', counted)
+    return decodes
+
+@pytest.mark.parametrize('name', ['expired', 'wrong_audience', 'wrong_issuer', 'empty_subject', 'tampered'])
+def test_bad_tokens_are_rejected(signing_key, verifier, name):
+    signer, _ = signing_key
+    token = bad_tokens(signer)[name]
+    with pytest.raises(ValueError):
+        verifier.verify(token)
+    # A rejection is never cached as a success
+    with pytest.raises(ValueError):
+        verifier.verify(token)
+
+def test_valid_tokens_are_served_from_cache_until_exp(monkeypatch, signing_key, verifier, fetches):
+    signer, _ = signing_key
+    decodes = _count_decodes(monkeypatch, verifier)
+    token = make_token(signer, 'team-a', ttl=60)
+
+    claims = verifier.verify(token)
+    assert claims['uid'] == 'team-a'
+    for _ in range(5):
+        assert verifier.verify(token) == claims
+    assert len(decodes) == 1 and len(fetches.calls) == 1
+
+    # Callers get copies; mutating one doesn't poison the cache
+    verifier.verify(token)['uid'] = 'someone-else'
+    assert verifier.verify(token)['uid'] == 'team-a'
+
+    # Once exp has passed the cached claims are dropped and the token is checked again
+    now = time.time()
+    monkeypatch.setattr(token_cache, 'time', SimpleNamespace(time=lambda: now + 61, monotonic=time.monotonic))
+    verifier.verify(token)
+    assert len(decodes) == 2
+
+def test_cache_is_bounded(signing_key, fetches):
+    signer, _ = signing_key
+    verifier = TokenVerifier(PROJECT_ID, CertStore(fetch=fetches.fetch), max_cached=3)
+    for i in range(5):
+        verifier.verify(make_token(signer, f"team-{i}"))
+    assert len(verifier._cache) == 3
+
+def test_unknown_kids_refresh_certs_at_most_once_per_interval(signing_key, verifier, fetches):
+    signer, _ = signing_key
+    verifier.verify(make_token(signer, 'team-a'))
+
+    bogus, _ = make_signing_key('bogus-kid')
+    for i in range(50):
+        with pytest.raises(ValueError):
+            verifier.verify(make_token(bogus, f"team-{i}"))
+    # Give the background refresh a moment to run
+    time.sleep(0.2)
+
+    assert len(fetches.calls) == 2
+    assert verifier.cert_store.request_refresh() is False
@@ -8,6 +8,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.repository import LEGACY_QUESTION_FIELDS, QUESTION_STATE_FIELDS, SCHEMA_FIELD, question_doc, questions_collection
+from utils.question_sync import sync_questions
+
+REQUIRED_FIELDS = ('qid', 'flag', SCHEMA_FIELD)
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -34,9 +38,8 @@ def initialize_firebase():
 def get_existing_question_structure(db):
     """Get structure of an existing question document"""
     try:
-        questions_ref = db.collection('questions')
         # Try to get Q1 as a sample
-        doc = questions_ref.document('Q1').get()
+        doc = questions_collection(db).document('Q1').get()
         if doc.exists:
             return doc.to_dict()
         return None
@@ -49,44 +52,45 @@ def generate_dummy_question(question_num, template=None):
     categories = ['Web', 'Crypto', 'Forensics', 'OSINT', 'Reverse Engineering', 'Pwn']
     difficulties = ['Easy', 'Medium', 'Hard']
     
-    data = {
-        'id': f'Q{question_num}',
-        'title': f'Challenge {question_num}',
-        'description': f'This is a sample challenge description for Q{question_num}. Can you solve it?',
-        'category': random.choice(categories),
-        'difficulty': random.choice(difficulties),
-        'points': random.choice([100, 200, 300, 400, 500]),
-        'flag': f'FLAG{{dummy_flag_for_q{question_num}}}',
-        'hints': [
+    data = question_doc(
+        f'Q{question_num}',
+        flag=f'FLAG{{dummy_flag_for_q{question_num}}}',
+        points=random.choice([100, 200, 300, 400, 500]),
+        title=f'Challenge {question_num}',
+        description=f'This is a sample challenge description for Q{question_num}. Can you solve it?',
+        category=random.choice(categories),
+        difficulty=random.choice(difficulties),
+        hints=[
             f'Hint 1 for Q{question_num}',
             f'Hint 2 for Q{question_num}'
         ],
-        'files': [],
-        'solved_by': [],
-        'total_attempts': random.randint(0, 50),
-        'successful_attempts': random.randint(0, 20),
-        'created_at': firestore.SERVER_TIMESTAMP,
-        'updated_at': firestore.SERVER_TIMESTAMP,
-        'author': 'Admin',
-        'is_active': True,
-        'max_attempts': 0,  # 0 means unlimited
-        'time_limit': None,
-        'requirements': [],
-        'tags': [f'tag{random.randint(1,5)}', f'tag{random.randint(6,10)}']
-    }
+        files=[],
+        total_attempts=random.randint(0, 50),
+        successful_attempts=random.randint(0, 20),
+        created_at=firestore.SERVER_TIMESTAMP,
+        updated_at=firestore.SERVER_TIMESTAMP,
+        author='Admin',
+        is_active=True,
+        max_attempts=0,  # 0 means unlimited
+        time_limit=None,
+        requirements=[],
+        tags=[f'tag{random.randint(1,5)}', f'tag{random.randint(6,10)}']
+    )
     
-    # If we have a template, ensure we match its structure
+    # If we have a template, ensure we match its structure (the fields
+    # every question needs are always kept; legacy fields and solve
+    # state never copied)
     if template:
         template_keys = template.keys()
-        data = {k: v for k, v in data.items() if k in template_keys}
+        data = {k: v for k, v in data.items() if k in template_keys or k in REQUIRED_FIELDS}
         for key in template_keys:
-            if key not in data:
+            if key not in data and key not in LEGACY_QUESTION_FIELDS and key not in QUESTION_STATE_FIELDS:
                 data[key] = template[key]
     
     return data
 
 def add_dummy_questions(db):
-    """Add dummy questions from Q11 to Q37"""
+    """Add the dummy questions Q11 to Q37 that don't exist yet"""
     try:
         # Get existing question structure
         template = get_existing_question_structure(db)
@@ -95,33 +99,10 @@ def add_dummy_questions(db):
         else:
             print("No existing question found, using default structure")
         
-        questions_ref = db.collection('questions')
-        batch = db.batch()
-        count = 0
-        
-        # Generate and add dummy questions
-        for i in range(11, 38):
-            question_id = f'Q{i}'
-            doc_ref = questions_ref.document(question_id)
-            
-            # Generate dummy data
-            data = generate_dummy_question(i, template)
-            
-            # Add to batch
-            batch.set(doc_ref, data, merge=True)
-            count += 1
-            print(f"Added dummy question {question_id}")
-            
-            # Commit batch every 500 operations (Firestore limit)
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
-        
-        # Commit any remaining operations
-        if count % 500 != 0:
-            batch.commit()
-            
-        print(f"\nSuccessfully added {count} dummy questions to database")
+        # Create-only: questions that already exist keep their real flag
+        # and points
+        questions = {f'Q{i}': generate_dummy_question(i, template) for i in range(11, 38)}
+        sync_questions(db, questions, create_only=True)
         return True
     except Exception as e:
         print(f"Error adding dummy questions: {str(e)}")
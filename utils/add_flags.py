@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.repository import question_doc
+from utils.question_sync import sync_questions
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -74,33 +76,18 @@ def read_flags_from_docx(file_path):
         return None
 
 def add_flags_to_database(db, flags):
-    """Add flags to Firestore database"""
+    """Sync flags into Firestore, writing only questions whose flag changed"""
     try:
-        questions_ref = db.collection('questions')
-        batch = db.batch()
-        count = 0
-        
-        for question_id, data in flags.items():
-            doc_ref = questions_ref.document(question_id)
-            batch.set(doc_ref, {
-                'flag': data['flag'],
-                'id': question_id,
-                'original_id': data['original_id'],
-                'timestamp': firestore.SERVER_TIMESTAMP
-            }, merge=True)  # Use merge to update existing documents
-            count += 1
-            print(f"Added flag for question {question_id} (Original: {data['original_id']})")
-            
-            # Commit batch every 500 operations (Firestore limit)
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
-        
-        # Commit any remaining operations
-        if count % 500 != 0:
-            batch.commit()
-            
-        print(f"\nSuccessfully added {count} flags to database")
+        questions = {
+            question_id: question_doc(
+                question_id,
+                flag=data['flag'],
+                original_id=data['original_id'],
+                timestamp=firestore.SERVER_TIMESTAMP
+            )
+            for question_id, data in flags.items()
+        }
+        sync_questions(db, questions)
         return True
     except Exception as e:
         print(f"Error adding flags to database: {str(e)}")
@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.repository import question_doc
+from utils.question_sync import sync_questions
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -33,44 +35,19 @@ def initialize_firebase():
 
 def get_question_data(question_num):
     """Generate question data matching the existing structure"""
-    data = {
-        'flag': f'FLAG{{dummy_flag_for_q{question_num}}}',
-        'id': f'Q{question_num}',
-        'original_id': f'Q{question_num}',
-        'timestamp': firestore.SERVER_TIMESTAMP
-    }
+    data = question_doc(
+        f'Q{question_num}',
+        flag=f'FLAG{{dummy_flag_for_q{question_num}}}',
+        original_id=f'Q{question_num}',
+        timestamp=firestore.SERVER_TIMESTAMP
+    )
     return data
 
 def add_questions_to_database(db):
-    """Add questions Q11 to Q37 to the database"""
+    """Add the questions Q11 to Q37 that don't exist yet"""
     try:
-        questions_ref = db.collection('questions')  # Note: collection name is 'questions' not 'Questions'
-        batch = db.batch()
-        count = 0
-        
-        # Add questions Q11 to Q37
-        for i in range(11, 38):
-            question_id = f'Q{i}'
-            doc_ref = questions_ref.document(question_id)
-            
-            # Get question data
-            data = get_question_data(i)
-            
-            # Add to batch
-            batch.set(doc_ref, data, merge=True)
-            count += 1
-            print(f"Added question {question_id}")
-            
-            # Commit batch every 500 operations (Firestore limit)
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
-        
-        # Commit any remaining operations
-        if count % 500 != 0:
-            batch.commit()
-            
-        print(f"\nSuccessfully added {count} questions to database")
+        # Create-only: questions that already exist keep their real flag
+        sync_questions(db, {f'Q{i}': get_question_data(i) for i in range(11, 38)}, create_only=True)
         return True
     except Exception as e:
         print(f"Error adding questions: {str(e)}")
@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.repository import question_doc
+from utils.question_sync import sync_questions
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -81,50 +83,23 @@ def get_question_data(question_num):
         36: 400, 37: 300
     }
     
-    data = {
-        'category': categories.get(question_num, 'Misc'),
-        'description': descriptions.get(question_num, f'Challenge description for Q{question_num}'),
-        'difficulty': 'Medium',
-        'id': f'Q{question_num}',
-        'points': points.get(question_num, 200),
-        'solved_by': [],
-        'title': f'Challenge {question_num}',
-        'total_attempts': 0,
-        'type': categories.get(question_num, 'Misc')
-    }
+    data = question_doc(
+        f'Q{question_num}',
+        points=points.get(question_num, 200),
+        category=categories.get(question_num, 'Misc'),
+        description=descriptions.get(question_num, f'Challenge description for Q{question_num}'),
+        difficulty='Medium',
+        title=f'Challenge {question_num}',
+        total_attempts=0
+    )
     
     return data
 
 def add_questions_to_database(db):
-    """Add questions Q11 to Q37 to the database"""
+    """Sync questions Q11 to Q37 into the database"""
     try:
-        questions_ref = db.collection('Questions')
-        batch = db.batch()
-        count = 0
-        
-        # Add questions Q11 to Q37
-        for i in range(11, 38):
-            question_id = f'Q{i}'
-            doc_ref = questions_ref.document(question_id)
-            
-            # Get question data
-            data = get_question_data(i)
-            
-            # Add to batch
-            batch.set(doc_ref, data, merge=True)
-            count += 1
-            print(f"Added question {question_id} - {data['title']} ({data['category']})")
-            
-            # Commit batch every 500 operations (Firestore limit)
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
-        
-        # Commit any remaining operations
-        if count % 500 != 0:
-            batch.commit()
-            
-        print(f"\nSuccessfully added {count} questions to database")
+        # Only changed fields are written; solves on live questions are kept
+        sync_questions(db, {f'Q{i}': get_question_data(i) for i in range(11, 38)})
         return True
     except Exception as e:
         print(f"Error adding questions: {str(e)}")
@@ -6,6 +6,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.question_sync import sync_questions
+from utils.repository import question_doc
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -73,44 +75,14 @@ def get_flag_data():
 
 def get_question_data(qid, flag):
     """Generate question data matching the schema"""
-    return {
-        'flag': flag,
-        'qid': qid,
-        'solvedBy': []
-    }
+    return question_doc(qid, flag)
 
 def add_questions_to_database(db):
-    """Add questions to the database"""
+    """Add questions to the database, writing only flags that changed"""
     try:
-        questions_ref = db.collection('Questions')
-        batch = db.batch()
-        count = 0
-        
-        # Get flag data
         flags = get_flag_data()
-        
-        # Add questions
-        for qid, flag in flags.items():
-            doc_ref = questions_ref.document(qid)
-            
-            # Get question data
-            data = get_question_data(qid, flag)
-            
-            # Add to batch
-            batch.set(doc_ref, data, merge=True)
-            count += 1
-            print(f"Added question {qid} with flag: {flag}")
-            
-            # Commit batch every 500 operations (Firestore limit)
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
-        
-        # Commit any remaining operations
-        if count % 500 != 0:
-            batch.commit()
-            
-        print(f"\nSuccessfully added {count} questions to database")
+        sync_questions(db, {qid: get_question_data(qid, flag) for qid, flag in flags.items()})
+        print(f"\nSuccessfully synced {len(flags)} questions to database")
         return True
     except Exception as e:
         print(f"Error adding questions: {str(e)}")
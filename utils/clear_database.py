@@ -7,7 +7,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
-from google.cloud.firestore_v1.base_query import FieldFilter
+from utils.reset_database import count_documents, delete_collections
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -55,60 +55,6 @@ def test_database_access(db):
         print(f"Database access test failed: {str(e)}")
         return False
 
-def list_all_documents(db, collection_name):
-    """List all documents in a collection"""
-    try:
-        docs = db.collection(collection_name).stream()
-        count = 0
-        for doc in docs:
-            print(f"Found document: {doc.id}")
-            print(f"Data: {doc.to_dict()}")
-            count += 1
-        print(f"Total documents in {collection_name}: {count}")
-    except Exception as e:
-        print(f"Error listing documents in {collection_name}: {str(e)}")
-
-def delete_collection(db, collection_name, batch_size=500):
-    """Delete an entire collection in batches."""
-    coll_ref = db.collection(collection_name)
-    
-    # First, list all documents
-    print(f"\nListing documents in {collection_name}:")
-    list_all_documents(db, collection_name)
-    
-    # Then delete them
-    docs = coll_ref.limit(batch_size).stream()
-    deleted = 0
-
-    for doc in docs:
-        try:
-            print(f"Deleting document {doc.id} from {collection_name}")
-            doc.reference.delete()
-            deleted = deleted + 1
-        except Exception as e:
-            print(f"Error deleting document {doc.id}: {str(e)}")
-
-    if deleted >= batch_size:
-        return delete_collection(db, collection_name, batch_size)
-
-    print(f"Successfully deleted {deleted} documents from collection: {collection_name}")
-    return deleted
-
-def clear_subcollections(db, collection_name):
-    """Clear all subcollections within documents"""
-    try:
-        # Get all documents in the collection
-        docs = db.collection(collection_name).stream()
-        
-        for doc in docs:
-            # Get all subcollections for this document
-            subcollections = doc.reference.collections()
-            for subcoll in subcollections:
-                delete_collection(db, f"{collection_name}/{doc.id}/{subcoll.id}")
-                print(f"Cleared subcollection: {collection_name}/{doc.id}/{subcoll.id}")
-    except Exception as e:
-        print(f"Error clearing subcollections for {collection_name}: {str(e)}")
-
 def main():
     # Initialize Firebase
     db = initialize_firebase()
@@ -139,14 +85,13 @@ def main():
     ]
     
     # Clear all collections and their subcollections
-    for collection in collections:
-        print(f"\nProcessing collection: {collection}")
-        clear_subcollections(db, collection)
-        delete_collection(db, collection)
-        
-        # Verify collection is empty
-        print(f"\nVerifying {collection} is empty:")
-        list_all_documents(db, collection)
+    deleted, failed = delete_collections(db, collections)
+    print(f"Deleted {deleted} documents ({failed} failed)")
+
+    # Verify the collections are empty
+    for collection, remaining in count_documents(db, collections).items():
+        if remaining:
+            print(f"{collection} still has {remaining} documents")
 
     print("\nDatabase cleanup completed!")
 
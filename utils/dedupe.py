@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# Seconds a finished submission's result is replayed for its idempotency key
+RESULT_TTL = 600
+MAX_RESULTS = 10000
+# Idempotency keys remembered per session
+MAX_SESSION_KEYS = 50
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """Run ``func()`` unless a call for ``key`` is in flight; share its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+class ResultCache:
+    """Bounded map of idempotency key -> result, expiring after ``ttl`` seconds"""
+
+    def __init__(self, ttl=RESULT_TTL, max_size=MAX_RESULTS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._results[key]
+                return None
+            return entry[1]
+
+    def put(self, key, result):
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = (time.monotonic() + self.ttl, result)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+_flights = SingleFlight()
+_results = ResultCache()
+
+def flight_key(team_id, qid, flag):
+    """(team, qid, flag digest); the plaintext flag isn't kept"""
+    return team_id, qid, hashlib.sha256(flag.encode('utf-8')).hexdigest()
+
+def idempotency_key(store, team_id, qid, flag):
+    """Return the session's idempotency key for this submission, creating it once.
+
+    ``store`` is the session state; resubmitting the same team, question
+    and flag from the session reuses the key, so the retry is a no-op.
+    """
+    keys = store.setdefault('submission_keys', OrderedDict())
+    digest = flight_key(team_id, qid.strip().upper(), flag)
+    key = keys.get(digest)
+    if key is None:
+        key = keys[digest] = uuid.uuid4().hex
+        while len(keys) > MAX_SESSION_KEYS:
+            keys.popitem(last=False)
+    return key
+
+def submit_once(team_id, qid, flag, key, func, final):
+    """Run the submission ``func()`` once per idempotency key and once per
+    concurrent (team, qid, flag); duplicates get the first call's result.
+
+    Only results for which ``final(result)`` is true (solved, wrong flag,
+    already solved) are replayed for the key; a retry after a transient
+    failure runs again.
+    """
+    if key is not None:
+        result = _results.get(key)
+        if result is not None:
+            return result
+    result = _flights.do(flight_key(team_id, qid, flag), func)
+    if key is not None and final(result):
+        _results.put(key, result)
+    return result
@@ -0,0 +1,64 @@
+import hashlib
+import hmac
+import os
+import threading
+from utils.question_catalog import get_question_catalog
+
+# Results of FlagIndex.check
+UNKNOWN_QUESTION = None
+CORRECT = True
+INCORRECT = False
+
+class FlagIndex:
+    """Process-local map of question ID -> salted flag digest.
+
+    Lets incorrect flags and unknown question IDs be rejected without
+    touching Firestore. Rebuilt from the question catalog whenever it
+    changes; plaintext flags are never kept in the index.
+    """
+
+    def __init__(self, catalog):
+        self._salt = os.urandom(16)
+        self._digests = {}
+        self.version = -1
+        catalog.subscribe(self.rebuild)
+        self.rebuild(catalog)
+
+    def _digest(self, flag):
+        return hmac.new(self._salt, flag.encode('utf-8'), hashlib.sha256).digest()
+
+    def rebuild(self, catalog):
+        """Recompute every digest from the catalog"""
+        digests = {}
+        for qid, question in catalog.questions():
+            if question.flag:
+                digests[qid] = self._digest(question.flag)
+        # Swap in one assignment so readers never see a partial index
+        self._digests = digests
+        self.version = catalog.version
+
+    def __contains__(self, qid):
+        return qid in self._digests
+
+    def check(self, qid, flag):
+        """Return CORRECT, INCORRECT or UNKNOWN_QUESTION for a submission"""
+        expected = self._digests.get(qid)
+        if expected is None:
+            return UNKNOWN_QUESTION
+        return hmac.compare_digest(expected, self._digest(flag))
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_flag_index(db):
+    """Return the process-wide flag index for ``db``, building it on first use"""
+    index = _indexes.get(id(db))
+    if index is not None:
+        return index
+
+    with _indexes_lock:
+        index = _indexes.get(id(db))
+        if index is None:
+            index = FlagIndex(get_question_catalog(db))
+            _indexes[id(db)] = index
+    return index
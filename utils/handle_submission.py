@@ -1,11 +1,24 @@
 import logging
 from typing import Tuple, Optional
+from utils.flag_index import get_flag_index, CORRECT, UNKNOWN_QUESTION
+from utils.question_catalog import get_question_catalog
+from utils.solve_pipeline import submit_solve, ALREADY_SOLVED, TEAM_NOT_FOUND, PENDING
+from utils.metrics import timed
+from utils.dedupe import submit_once
+from utils.team_views import get_team_views
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def handle_flag_submission(db, team_id: str, qid: str, flag: str) -> Tuple[bool, str]:
+SOLVED_MESSAGE = "Correct flag! Question solved!"
+INCORRECT_MESSAGE = "Incorrect flag"
+ALREADY_SOLVED_MESSAGE = "You have already solved this question!"
+# Outcomes replayed for a resubmitted idempotency key; anything else
+# (unknown question, queued solve, errors) is checked again on retry
+FINAL_MESSAGES = (SOLVED_MESSAGE, INCORRECT_MESSAGE, ALREADY_SOLVED_MESSAGE)
+
+@timed('handle_flag_submission')
+def handle_flag_submission(db, team_id: str, qid: str, flag: str,
+                           idempotency_key: Optional[str] = None) -> Tuple[bool, str, Optional[dict]]:
     """
     Handle flag submission with exact matching
     
@@ -14,65 +27,63 @@ def handle_flag_submission(db, team_id: str, qid: str, flag: str) -> Tuple[bool,
         team_id: Team ID submitting the flag
         qid: Question ID (e.g., 'Q1')
         flag: Flag string exactly as submitted
+        idempotency_key: Client-generated key; resubmissions with the same
+            key return the first result without touching Firestore
         
     Returns:
-        Tuple[bool, str]: (success, message)
+        Tuple[bool, str, Optional[dict]]: (success, message, view), where
+        view is the team's TeamViews document after a solve, or None for
+        any other outcome
     """
     try:
-        # Log submission attempt
-        logger.debug(f"Flag submission attempt - Team: {team_id}, QID: {qid}, Flag: {flag}")
-        
         # Clean up question ID only (preserve flag exactly as is)
         qid = qid.strip().upper()
         if not qid.startswith('Q'):
             qid = 'Q' + qid
-            
-        # Get question document
-        question_ref = db.collection('Questions').document(qid)
-        question = question_ref.get()
         
-        # Validate question exists
-        if not question.exists:
-            logger.warning(f"Question {qid} not found")
-            return False, f"Question {qid} not found"
-            
-        # Get question data
-        q_data = question.to_dict()
+        # Concurrent identical submissions share one check-and-record
+        success, message = submit_once(team_id, qid, flag, idempotency_key,
+                                       lambda: _check_and_record(db, team_id, qid, flag, idempotency_key),
+                                       lambda result: result[1] in FINAL_MESSAGES)
         
-        # Check if team already solved
-        if team_id in q_data.get('solvedBy', []):
-            logger.info(f"Team {team_id} already solved {qid}")
-            return False, "You have already solved this question!"
-            
-        # Get correct flag
-        correct_flag = q_data.get('Flag')
-        if not correct_flag:
-            logger.error(f"No flag found for question {qid}")
-            return False, "Internal error: No flag found for this question"
-            
-        # Log flag comparison details
-        logger.debug(f"Flag comparison - Submitted: '{flag}' (len: {len(flag)}), Correct: '{correct_flag}' (len: {len(correct_flag)})")
+        # The solve's transaction already cached the view it wrote
+        view = get_team_views(db).cached(team_id) if message == SOLVED_MESSAGE else None
+        return success, message, view
         
-        # Exact flag comparison
-        if flag != correct_flag:
-            logger.info(f"Incorrect flag submitted for {qid}")
-            return False, "Incorrect flag"
-            
-        # Update question's solvedBy array
-        question_ref.update({
-            'solvedBy': db.field_path('solvedBy').arrayUnion([team_id])
-        })
-        
-        # Update team's progress
-        team_ref = db.collection('Teams').document(team_id)
-        team_ref.update({
-            'questionsSolved': db.field_path('questionsSolved').arrayUnion([qid]),
-            'totalCount': db.field_path('totalCount').increment(1)
-        })
+    except Exception as e:
+        logger.error("Error in handle_flag_submission: %s", e, exc_info=True, extra={'event': 'error', 'team_id': team_id})
+        return False, f"Internal error: {str(e)}", None
+
+def _check_and_record(db, team_id: str, qid: str, flag: str, idempotency_key: Optional[str]) -> Tuple[bool, str]:
+    """Check the flag and record a solve; runs once per duplicate group"""
+    # Reject unknown questions and wrong flags from the local index
+    catalog = get_question_catalog(db)
+    result = get_flag_index(db).check(qid, flag)
+    
+    if result is UNKNOWN_QUESTION:
+        if catalog.get(qid) is None:
+            logger.info("Question %s not found", qid, extra={'event': 'unknown_question', 'team_id': team_id, 'qid': qid})
+            return False, f"Question {qid} not found"
+        logger.error("No flag found for question %s", qid, extra={'event': 'missing_flag', 'qid': qid})
+        return False, "Internal error: No flag found for this question"
         
-        logger.info(f"Team {team_id} successfully solved {qid}")
-        return True, "Correct flag! Question solved!"
+    # Exact flag comparison (constant time, against the salted digest)
+    if result is not CORRECT:
+        logger.info("Incorrect flag for %s", qid, extra={'event': 'incorrect', 'team_id': team_id, 'qid': qid})
+        return False, INCORRECT_MESSAGE
         
-    except Exception as e:
-        logger.error(f"Error in handle_flag_submission: {str(e)}", exc_info=True)
-        return False, f"Internal error: {str(e)}"
+    # Record the solve (team, question and submission in one commit)
+    solve_result = submit_solve(db, team_id, qid, idempotency_key)
+    if solve_result == PENDING:
+        logger.warning("Solve of %s by %s queued while Firestore is unavailable", qid, team_id,
+                       extra={'event': 'solve_queued', 'team_id': team_id, 'qid': qid})
+        return True, "Correct flag! Your solve will be recorded as soon as the database is reachable."
+    if solve_result == ALREADY_SOLVED:
+        logger.info("Team %s already solved %s", team_id, qid, extra={'event': 'already_solved', 'team_id': team_id, 'qid': qid})
+        return False, ALREADY_SOLVED_MESSAGE
+    if solve_result == TEAM_NOT_FOUND:
+        logger.warning("Team %s not found", team_id, extra={'event': 'unknown_team', 'team_id': team_id})
+        return False, f"Team {team_id} not found"
+    
+    logger.info("Team %s solved %s", team_id, qid, extra={'event': 'solved', 'team_id': team_id, 'qid': qid, 'keep': True})
+    return True, SOLVED_MESSAGE
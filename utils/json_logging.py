@@ -0,0 +1,136 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get('CTF_LOG_LEVEL', 'INFO').upper()
+LOG_FILE = os.environ.get('CTF_LOG_FILE')
+# Fraction of records kept per level, e.g. CTF_LOG_SAMPLE="DEBUG=0.01,INFO=0.1";
+# levels not listed (and everything from WARNING up by default) are kept
+DEFAULT_SAMPLE = {'DEBUG': 0.01, 'INFO': 0.1}
+MAX_QUEUED = 10000
+
+REDACTED = '[REDACTED]'
+# Extra fields whose values are never written
+SECRET_FIELDS = {'flag', 'submitted_flag', 'correct_flag', 'token', 'id_token', 'password', 'secret', 'private_key'}
+# Flag-shaped strings inside messages, e.g. CTF{...} or FLAG{...}
+SECRET_PATTERN = re.compile(r'\b([A-Za-z]+)\{[^}]*\}')
+
+# LogRecord attributes that aren't caller-supplied ``extra`` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'keep'}
+
+def parse_sample(spec):
+    """Parse ``LEVEL=rate,...`` into {levelno: rate}"""
+    rates = dict(DEFAULT_SAMPLE)
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        level, _, rate = item.partition('=')
+        rates[level.strip().upper()] = float(rate)
+    return {logging.getLevelName(level): rate for level, rate in rates.items()}
+
+def redact(text):
+    """Mask flag-shaped substrings of ``text``"""
+    return SECRET_PATTERN.sub(lambda m: f"{m.group(1)}{{{REDACTED}}}", text)
+
+class SamplingFilter(logging.Filter):
+    """Keep each record with the probability configured for its level.
+
+    Records logged with ``extra={'keep': True}`` are never dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or getattr(record, 'keep', False) or random.random() < rate
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with ``extra`` fields, secrets redacted"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': redact(record.getMessage()),
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_FIELDS or key.startswith('_'):
+                continue
+            if key.lower() in SECRET_FIELDS:
+                value = REDACTED
+            elif isinstance(value, str):
+                value = redact(value)
+            entry[key] = value
+        if record.exc_info:
+            entry['exc'] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=lambda value: redact(str(value)))
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and never blocks"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock prepare() formats the message in the caller's thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_handler = None
+_listener = None
+_setup_lock = threading.Lock()
+
+def setup_logging():
+    """Route the root logger through a background JSON writer (once per process)"""
+    global _handler, _listener
+    if _listener is not None:
+        return
+    with _setup_lock:
+        if _listener is not None:
+            return
+        outputs = [logging.StreamHandler(sys.stderr)]
+        if LOG_FILE:
+            outputs.append(logging.FileHandler(LOG_FILE, encoding='utf-8'))
+        for output in outputs:
+            output.setFormatter(JsonFormatter())
+
+        log_queue = queue.Queue(maxsize=MAX_QUEUED)
+        _handler = _DeferredQueueHandler(log_queue)
+        _handler.addFilter(SamplingFilter(parse_sample(os.environ.get('CTF_LOG_SAMPLE', ''))))
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(_handler)
+
+        _listener = QueueListener(log_queue, *outputs, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        _listener = None
+
+def dropped_records():
+    """Return how many records were dropped because the queue was full"""
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,189 @@
+import argparse
+import os
+import sys
+import threading
+import zlib
+from bisect import bisect_left, insort
+
+# Add parent directory to path to import firebase_init
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCOREBOARD_COLLECTION = 'Scoreboard'
+# Teams are spread over this many scoreboard documents so concurrent
+# solves don't all write the same document
+SCOREBOARD_SHARDS = 10
+
+def _sort_key(team_id, score, last_solve):
+    # Higher score first, then earlier last solve, then team ID
+    solved_at = last_solve.timestamp() if last_solve is not None else float('inf')
+    return (-score, solved_at, team_id)
+
+class RankIndex:
+    """Sorted in-process rank index over the scoreboard.
+
+    Keeps one sort key per team in a sorted list, so a team's rank is a
+    binary search and the top N is a slice; no collection scans.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._sorted = []
+        self._lock = threading.Lock()
+
+    def update(self, team_id, score, last_solve):
+        """Insert or move ``team_id`` to its new position"""
+        key = _sort_key(team_id, score, last_solve)
+        with self._lock:
+            old = self._keys.get(team_id)
+            if old == key:
+                return
+            if old is not None:
+                del self._sorted[bisect_left(self._sorted, old)]
+            insort(self._sorted, key)
+            self._keys[team_id] = key
+
+    def load(self, teams):
+        """Replace the index with ``{team_id: {'score', 'lastSolve'}}``"""
+        keys = {
+            team_id: _sort_key(team_id, entry.get('score', 0), entry.get('lastSolve'))
+            for team_id, entry in teams.items()
+        }
+        with self._lock:
+            self._keys = keys
+            self._sorted = sorted(keys.values())
+
+    def set_score(self, team_id, score):
+        """Change the team's score, keeping its last-solve tie-breaker"""
+        with self._lock:
+            old = self._keys.get(team_id)
+            key = (-score, old[1] if old is not None else float('inf'), team_id)
+            if old == key:
+                return
+            if old is not None:
+                del self._sorted[bisect_left(self._sorted, old)]
+            insort(self._sorted, key)
+            self._keys[team_id] = key
+
+    def score(self, team_id):
+        """Return the team's score, or 0 if it isn't ranked"""
+        key = self._keys.get(team_id)
+        return -key[0] if key is not None else 0
+
+    def rank(self, team_id):
+        """Return the team's 1-based rank, or None if it isn't ranked"""
+        with self._lock:
+            key = self._keys.get(team_id)
+            if key is None:
+                return None
+            return bisect_left(self._sorted, key) + 1
+
+    def top(self, n=10):
+        """Return [(rank, team_id, score)] for the first ``n`` teams"""
+        with self._lock:
+            return [(idx + 1, key[2], -key[0]) for idx, key in enumerate(self._sorted[:n])]
+
+    def __len__(self):
+        return len(self._sorted)
+
+_index = RankIndex()
+_loaded = False
+_load_lock = threading.Lock()
+
+def scoreboard_collection(db):
+    """Return the collection holding the scoreboard shard documents"""
+    return db.collection(SCOREBOARD_COLLECTION)
+
+def scoreboard_ref(db, team_id):
+    """Return the scoreboard shard document that holds ``team_id``"""
+    shard = zlib.crc32(team_id.encode('utf-8')) % SCOREBOARD_SHARDS
+    return scoreboard_collection(db).document(f'shard{shard}')
+
+def stage_solve(transaction, db, team_id, points, solved_at):
+    """Add a solve's scoreboard increment to an open transaction"""
+    from firebase_admin import firestore
+    transaction.set(scoreboard_ref(db, team_id), {
+        'teams': {
+            team_id: {
+                'score': firestore.Increment(points),
+                'lastSolve': solved_at
+            }
+        }
+    }, merge=True)
+
+def load_scoreboard(snapshots):
+    """Replace the rank index with the contents of the scoreboard shards"""
+    global _loaded
+    teams = {}
+    for snapshot in snapshots:
+        if snapshot.exists:
+            teams.update((snapshot.to_dict() or {}).get('teams', {}))
+    _index.load(teams)
+    _loaded = True
+
+def get_rank_index(db):
+    """Return the process-wide rank index, loading the scoreboard on first use"""
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                load_scoreboard(scoreboard_collection(db).get())
+    return _index
+
+def apply_solve(team_id, points, solved_at):
+    """Mirror a committed scoreboard increment in the local rank index"""
+    # Nothing to do until the index has been loaded from the scoreboard
+    if _loaded:
+        _index.update(team_id, _index.score(team_id) + points, solved_at)
+
+def apply_scores(scores):
+    """Mirror recomputed ``{team_id: score}`` in the local rank index"""
+    if _loaded:
+        for team_id, score in scores.items():
+            _index.set_score(team_id, score)
+
+def rebuild_scoreboard(db):
+    """Recompute the scoreboard shards from the Teams collection"""
+    from utils.repository import Team, teams_collection
+    from utils.scoring import get_scoring_engine
+    scores = get_scoring_engine(db).scores()
+    teams = {}
+    for doc in teams_collection(db).stream():
+        team = Team.from_doc(doc.id, doc.to_dict())
+        teams[doc.id] = {
+            'score': scores.get(doc.id, 0),
+            'lastSolve': team.timestamp
+        }
+    shards = {}
+    for team_id, entry in teams.items():
+        shards.setdefault(scoreboard_ref(db, team_id).id, {})[team_id] = entry
+
+    batch = db.batch()
+    for doc in scoreboard_collection(db).list_documents():
+        batch.delete(doc)
+    for shard_id, shard_teams in shards.items():
+        batch.set(scoreboard_collection(db).document(shard_id), {'teams': shard_teams})
+    batch.commit()
+    _index.load(teams)
+    print(f"Rebuilt scoreboard for {len(teams)} teams")
+    return teams
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the materialized leaderboard')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the scoreboard shards from the Teams collection')
+    parser.add_argument('--top', type=int, default=0, help='Print the top N teams')
+
+    args = parser.parse_args()
+
+    from firebase_init import get_db
+    db = get_db()
+    if db is None:
+        print("Failed to initialize Firebase. Exiting...")
+        return
+
+    if args.rebuild:
+        rebuild_scoreboard(db)
+    if args.top:
+        for rank, team_id, score in get_rank_index(db).top(args.top):
+            print(f"{rank:>4}  {team_id:<12} {score}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import threading
+import time
+from utils import resilience
+
+# Seconds start() waits for the listener's first snapshot
+INITIAL_SNAPSHOT_TIMEOUT = 10
+
+class LiveCollection:
+    """In-memory state kept current by one on_snapshot listener.
+
+    Subclasses provide query(), load(docs) for a full read and
+    apply_snapshot(col_snapshot, changes) for listener updates. When the
+    listener can't be attached, or stops later (the SDK closes a watch
+    after a non-retryable error, and a snapshot that fails to apply
+    counts too), the state is reloaded every ``ttl`` seconds instead,
+    on the next refresh_if_stale().
+    """
+
+    label = 'Collection'
+
+    def __init__(self, db, ttl):
+        self.db = db
+        self.ttl = ttl
+        self._watch = None
+        self._watch_failed = False
+        self._last_load = 0.0
+        self._loaded = threading.Event()
+        self._subscribers = []
+
+    def query(self):
+        raise NotImplementedError
+
+    def read(self):
+        """Return every document of query(); used by reload()"""
+        return self.query().get()
+
+    def load(self, docs):
+        raise NotImplementedError
+
+    def apply_snapshot(self, col_snapshot, changes):
+        raise NotImplementedError
+
+    def start(self):
+        """Attach the snapshot listener, or load once for TTL polling"""
+        try:
+            self._watch = self.query().on_snapshot(self._on_snapshot)
+            # Wait briefly for the initial snapshot so the first render has data
+            self._loaded.wait(timeout=INITIAL_SNAPSHOT_TIMEOUT)
+        except Exception as e:
+            print(f"{self.label} listener unavailable, polling every {self.ttl}s: {str(e)}")
+            self._watch = None
+        if not self._loaded.is_set() or not self.watching:
+            self.reload()
+        return self
+
+    def stop(self):
+        """Detach the snapshot listener"""
+        watch, self._watch = self._watch, None
+        if watch is not None:
+            watch.unsubscribe()
+
+    def subscribe(self, callback):
+        """Call ``callback(self)`` after every change; returns an unsubscribe function"""
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    @property
+    def watching(self):
+        """True while the listener is attached and delivering snapshots"""
+        watch = self._watch
+        if watch is None:
+            return False
+        if self._watch_failed or not getattr(watch, 'is_active', True):
+            print(f"{self.label} listener stopped, polling every {self.ttl}s")
+            self._watch = None
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+            return False
+        return True
+
+    def reload(self):
+        """Replace the state with a full read"""
+        self.load(self.read())
+        self._mark_loaded()
+
+    def refresh_if_stale(self):
+        """Reload if there's no working listener and the last load is older than ``ttl``"""
+        if self.watching or time.monotonic() - self._last_load <= self.ttl:
+            return
+        try:
+            self.reload()
+        except resilience.Unavailable as e:
+            # Keep serving the stale copy; try again after another TTL
+            self._last_load = time.monotonic()
+            print(f"{self.label} reload failed, serving cached copy: {str(e)}")
+
+    def _on_snapshot(self, col_snapshot, changes, read_time):
+        try:
+            self.apply_snapshot(col_snapshot, changes)
+        except Exception as e:
+            print(f"{self.label} snapshot failed to apply: {str(e)}")
+            self._watch_failed = True
+            # Unblock start(), which then loads by reading instead
+            self._loaded.set()
+            return
+        self._mark_loaded()
+
+    def _mark_loaded(self):
+        self._last_load = time.monotonic()
+        self._loaded.set()
+
+    def _notify(self):
+        for callback in list(self._subscribers):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"{self.label} subscriber failed: {str(e)}")
@@ -0,0 +1,373 @@
+import functools
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Fraction of reruns whose latency and per-rerun op counts are recorded;
+# process-wide op totals are always kept since they cost one increment
+SAMPLE_RATE = float(os.environ.get('CTF_METRICS_SAMPLE_RATE', '0.1'))
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_RERUNS = 200
+MAX_SESSIONS = 1000
+OPS = ('read', 'write', 'delete')
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        idx = 0
+        while idx < len(BUCKETS) and seconds > BUCKETS[idx]:
+            idx += 1
+        self.counts[idx] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Approximate quantile from bucket upper bounds"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for idx, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return BUCKETS[idx] if idx < len(BUCKETS) else float('inf')
+        return float('inf')
+
+class _Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ops = dict.fromkeys(OPS, 0)
+        self.latency = {}
+        self.reruns = 0
+        self.sampled_reruns = 0
+        self.recent = deque(maxlen=RECENT_RERUNS)
+        self.sessions = OrderedDict()
+
+_registry = _Registry()
+_local = threading.local()
+
+def _count(op, n=1):
+    if not n:
+        return
+    with _registry.lock:
+        _registry.ops[op] += n
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun['ops'][op] += n
+
+def observe(name, seconds):
+    """Record a latency sample for ``name``"""
+    with _registry.lock:
+        histogram = _registry.latency.get(name)
+        if histogram is None:
+            histogram = _registry.latency[name] = Histogram()
+        histogram.observe(seconds)
+
+def start_rerun(session_id=None):
+    """Begin accounting for one script rerun on the current thread"""
+    with _registry.lock:
+        _registry.reruns += 1
+    if random.random() >= SAMPLE_RATE:
+        _local.rerun = None
+        return
+    _local.rerun = {
+        'session': session_id or 'unknown',
+        'started': time.time(),
+        'start': time.perf_counter(),
+        'ops': dict.fromkeys(OPS, 0)
+    }
+
+def end_rerun():
+    """Finish the current rerun and fold it into the rolling window"""
+    rerun = getattr(_local, 'rerun', None)
+    _local.rerun = None
+    if rerun is None:
+        return
+    elapsed = time.perf_counter() - rerun.pop('start')
+    rerun['seconds'] = elapsed
+    observe('rerun', elapsed)
+    with _registry.lock:
+        _registry.sampled_reruns += 1
+        _registry.recent.append(rerun)
+        session = _registry.sessions.pop(rerun['session'], None) or {'reruns': 0, 'seconds': 0.0, 'ops': dict.fromkeys(OPS, 0)}
+        session['reruns'] += 1
+        session['seconds'] += elapsed
+        for op, n in rerun['ops'].items():
+            session['ops'][op] += n
+        _registry.sessions[rerun['session']] = session
+        while len(_registry.sessions) > MAX_SESSIONS:
+            _registry.sessions.popitem(last=False)
+
+def timed(name):
+    """Decorator recording the wrapped function's latency on sampled reruns"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'rerun', None) is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def bind(func):
+    """Return ``func`` wrapped to count its operations against the calling thread's rerun"""
+    rerun = getattr(_local, 'rerun', None)
+
+    def wrapper(*args, **kwargs):
+        _local.rerun = rerun
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.rerun = None
+    return wrapper
+
+def ops_snapshot():
+    """Return the process-wide Firestore operation totals"""
+    with _registry.lock:
+        return dict(_registry.ops)
+
+def snapshot():
+    """Return a copy of the collected metrics for display"""
+    with _registry.lock:
+        return {
+            'ops': dict(_registry.ops),
+            'reruns': _registry.reruns,
+            'sampled_reruns': _registry.sampled_reruns,
+            'latency': {
+                name: {'count': h.count, 'sum': h.total, 'p50': h.quantile(0.5), 'p95': h.quantile(0.95), 'p99': h.quantile(0.99)}
+                for name, h in _registry.latency.items()
+            },
+            'recent': list(_registry.recent),
+            'sessions': {sid: dict(data, ops=dict(data['ops'])) for sid, data in _registry.sessions.items()}
+        }
+
+def render_prometheus():
+    """Render the metrics in Prometheus text exposition format"""
+    lines = []
+    with _registry.lock:
+        lines.append('# TYPE ctf_firestore_ops_total counter')
+        for op, n in _registry.ops.items():
+            lines.append(f'ctf_firestore_ops_total{{op="{op}"}} {n}')
+        lines.append('# TYPE ctf_reruns_total counter')
+        lines.append(f'ctf_reruns_total {_registry.reruns}')
+        lines.append('# TYPE ctf_reruns_sampled_total counter')
+        lines.append(f'ctf_reruns_sampled_total {_registry.sampled_reruns}')
+        lines.append('# TYPE ctf_latency_seconds histogram')
+        for name, h in sorted(_registry.latency.items()):
+            running = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), h.counts):
+                running += count
+                lines.append(f'ctf_latency_seconds_bucket{{name="{name}",le="{bound}"}} {running}')
+            lines.append(f'ctf_latency_seconds_sum{{name="{name}"}} {h.total}')
+            lines.append(f'ctf_latency_seconds_count{{name="{name}"}} {h.count}')
+    return '\n'.join(lines) + '\n'
+
+def serve_prometheus(port):
+    """Serve render_prometheus() on http://0.0.0.0:<port>/metrics from a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def start_exporter():
+    """Start the /metrics endpoint once per process if CTF_METRICS_PORT is set"""
+    global _exporter
+    port = os.environ.get('CTF_METRICS_PORT')
+    if not port or _exporter is not None:
+        return _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = serve_prometheus(int(port))
+    return _exporter
+
+# Firestore client wrapper
+
+class _Proxy:
+    """Forwards everything to the wrapped SDK object"""
+
+    def __init__(self, wrapped):
+        object.__setattr__(self, '_wrapped', wrapped)
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._wrapped, name, value)
+
+    def __eq__(self, other):
+        return self._wrapped == getattr(other, '_wrapped', other)
+
+    def __hash__(self):
+        return hash(self._wrapped)
+
+def _counted_callback(callback):
+    def wrapper(snapshot, changes, read_time):
+        # Listener deliveries are billed as one read per changed document
+        _count('read', len(changes))
+        return callback(snapshot, changes, read_time)
+    return wrapper
+
+class _Writer(_Proxy):
+    """Batch or transaction that counts the writes staged on it"""
+
+    def set(self, reference, *args, **kwargs):
+        _count('write')
+        return self._wrapped.set(reference, *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        _count('write')
+        return self._wrapped.create(reference, *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        _count('write')
+        return self._wrapped.update(reference, *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        _count('delete')
+        return self._wrapped.delete(reference, *args, **kwargs)
+
+class _Query(_Proxy):
+    def get(self, *args, **kwargs):
+        docs = self._wrapped.get(*args, **kwargs)
+        _count('read', len(docs))
+        return docs
+
+    def stream(self, *args, **kwargs):
+        for doc in self._wrapped.stream(*args, **kwargs):
+            _count('read')
+            yield doc
+
+    def on_snapshot(self, callback):
+        return self._wrapped.on_snapshot(_counted_callback(callback))
+
+    def limit(self, *args, **kwargs):
+        return _Query(self._wrapped.limit(*args, **kwargs))
+
+    def select(self, *args, **kwargs):
+        return _Query(self._wrapped.select(*args, **kwargs))
+
+    def where(self, *args, **kwargs):
+        return _Query(self._wrapped.where(*args, **kwargs))
+
+    def order_by(self, *args, **kwargs):
+        return _Query(self._wrapped.order_by(*args, **kwargs))
+
+    def start_after(self, *args, **kwargs):
+        return _Query(self._wrapped.start_after(*args, **kwargs))
+
+class _Collection(_Query):
+    def document(self, *args, **kwargs):
+        return _Document(self._wrapped.document(*args, **kwargs))
+
+    def add(self, *args, **kwargs):
+        _count('write')
+        return self._wrapped.add(*args, **kwargs)
+
+    def list_documents(self, *args, **kwargs):
+        for ref in self._wrapped.list_documents(*args, **kwargs):
+            _count('read')
+            yield _Document(ref)
+
+class _Document(_Proxy):
+    def collection(self, *args, **kwargs):
+        return _Collection(self._wrapped.collection(*args, **kwargs))
+
+    def get(self, *args, transaction=None, **kwargs):
+        _count('read')
+        if transaction is not None:
+            kwargs['transaction'] = getattr(transaction, '_wrapped', transaction)
+        return self._wrapped.get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        _count('write')
+        return self._wrapped.set(*args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        _count('write')
+        return self._wrapped.create(*args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        _count('write')
+        return self._wrapped.update(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        _count('delete')
+        return self._wrapped.delete(*args, **kwargs)
+
+    def on_snapshot(self, callback):
+        return self._wrapped.on_snapshot(_counted_callback(callback))
+
+class InstrumentedClient(_Proxy):
+    """Firestore client wrapper that counts reads, writes and deletes.
+
+    References, queries, batches and transactions handed out are wrapped
+    too; everything else is forwarded to the SDK object unchanged.
+    """
+
+    def __getattr__(self, name):
+        attr = getattr(self._wrapped, name)
+        if name == 'run_transaction':
+            # Transaction runner of the in-memory fake used for load tests
+            return lambda fn: attr(lambda transaction: fn(_Writer(transaction)))
+        return attr
+
+    def collection(self, *args, **kwargs):
+        return _Collection(self._wrapped.collection(*args, **kwargs))
+
+    def collection_group(self, *args, **kwargs):
+        return _Query(self._wrapped.collection_group(*args, **kwargs))
+
+    def document(self, *args, **kwargs):
+        return _Document(self._wrapped.document(*args, **kwargs))
+
+    def batch(self):
+        return _Writer(self._wrapped.batch())
+
+    def transaction(self, *args, **kwargs):
+        return _Writer(self._wrapped.transaction(*args, **kwargs))
+
+    def bulk_writer(self, *args, **kwargs):
+        return _Writer(self._wrapped.bulk_writer(*args, **kwargs))
+
+    def get_all(self, references, *args, **kwargs):
+        for doc in self._wrapped.get_all(list(references), *args, **kwargs):
+            _count('read')
+            yield doc
+
+def instrument_client(db):
+    """Wrap ``db`` so its Firestore operations are counted"""
+    if db is None or isinstance(db, InstrumentedClient):
+        return db
+    return InstrumentedClient(db)
@@ -0,0 +1,312 @@
+"""
+Rewrite Questions and Teams documents in place to the current schema
+(utils/repository.py, SCHEMA_VERSION).
+
+- Questions from the lowercase 'questions' collection are merged into
+  Questions (existing Questions fields win) and removed.
+- 'Flag', 'id' and 'q_id' become 'flag' and 'qid'. Every question
+  gets an explicit 'bit' for the solve bitmap: the one it already uses
+  if no other question shares it, otherwise a new one from the
+  persisted counter. Their 'solvedBy'/'solved_by' arrays move onto the
+  solving teams.
+- Team solve arrays ('questionsSolved', 'solvedQuestions', 'ques_id')
+  become 'solvedBits', and 'totalCount' is set to the number of solves.
+
+Documents are streamed in pages of PAGE_SIZE by ID. Each page is read
+once and rewritten in one transaction, together with a checkpoint in
+Migrations/schema-v<N>, so an interrupted run continues where it
+stopped. Re-running after completion changes nothing.
+
+    python utils/migrate_schema.py --dry-run
+    python utils/migrate_schema.py
+"""
+import argparse
+import os
+import sys
+
+# Add parent directory to path to import firebase_init
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.repository import (
+    LEGACY_QUESTIONS, LEGACY_QUESTION_FIELDS, LEGACY_SOLVE_ARRAYS, LEGACY_TEAM_FIELDS,
+    SCHEMA_FIELD, SCHEMA_VERSION, Team, bit_counter_ref, questions_collection, team_ref, teams_collection
+)
+from utils.solve_bitmap import MAX_BITS, question_bit, unpack
+from utils.solve_pipeline import run_transaction
+
+# Documents per page
+PAGE_SIZE = 100
+# Firestore's limit on writes per transaction; a page whose writes
+# (including solver teams and the checkpoint) exceed it is split
+MAX_WRITES = 500
+PASSES = ('legacy_questions', 'questions', 'teams')
+
+class _PageTooLarge(Exception):
+    pass
+
+def checkpoint_ref(db):
+    return db.collection('Migrations').document(f'schema-v{SCHEMA_VERSION}')
+
+def normalize_question(data):
+    """Return (current-shape data, IDs of teams listed as solvers)"""
+    new = {key: value for key, value in data.items() if key not in LEGACY_QUESTION_FIELDS}
+    for old, name in LEGACY_QUESTION_FIELDS.items():
+        if name and old in data and new.get(name) is None:
+            new[name] = data[old]
+    solvers = set(data.get('solvedBy') or []) | set(data.get('solved_by') or [])
+    new[SCHEMA_FIELD] = SCHEMA_VERSION
+    return new, solvers
+
+def normalize_team(team_id, data, bit_of):
+    """Return the current-shape data of a team document"""
+    team = Team.from_doc(team_id, data, bit_of)
+    new = {
+        key: value for key, value in data.items()
+        if key not in LEGACY_TEAM_FIELDS and key not in LEGACY_SOLVE_ARRAYS
+    }
+    new.update({
+        'name': team.name,
+        'solvedBits': team.solved_bits,
+        # Solves folded in from solvedBy were never counted
+        'totalCount': len(unpack(team.solved_bits)) + len(team.unbitted),
+        SCHEMA_FIELD: SCHEMA_VERSION
+    })
+    if team.unbitted:
+        new['questionsSolved'] = list(team.unbitted)
+    return new
+
+def _diff(old, new):
+    """Update that turns ``old`` into ``new`` without touching other fields"""
+    from firebase_admin import firestore
+    update = {key: value for key, value in new.items() if old.get(key) != value or key not in old}
+    update.update({key: firestore.DELETE_FIELD for key in old if key not in new})
+    return update
+
+class SchemaMigration:
+    def __init__(self, db, dry_run=False, page_size=PAGE_SIZE, restart=False):
+        self.db = db
+        self.dry_run = dry_run
+        self.restart = restart
+        self.page_size = page_size
+        self.updated = 0
+        self.skipped_solvers = set()
+        # {team_id: qids} already added to teams outside a page transaction
+        self._staged = {}
+        self._bits = {}
+        self._next_bit = 0
+
+    def run(self):
+        if self.restart:
+            # A dry run previews the restart without clearing the checkpoint
+            checkpoint = {}
+            if not self.dry_run:
+                checkpoint_ref(self.db).delete()
+        else:
+            snapshot = checkpoint_ref(self.db).get()
+            checkpoint = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        for name in PASSES:
+            progress = checkpoint.get(name) or {}
+            if progress.get('done'):
+                print(f"{name}: already migrated")
+                continue
+            last_id = progress.get('lastId')
+            collection = self.db.collection(LEGACY_QUESTIONS) if name == 'legacy_questions' else \
+                questions_collection(self.db) if name == 'questions' else teams_collection(self.db)
+            # After the legacy pass, so merged questions keep their bits
+            self._load_bits()
+            pages = 0
+            while True:
+                query = collection.select([]).order_by('__name__').limit(self.page_size)
+                if last_id:
+                    query = query.start_after({'__name__': last_id})
+                ids = [doc.id for doc in query.stream()]
+                if not ids:
+                    break
+                last_id = self._migrate_ids(name, collection, ids)
+                pages += 1
+                if len(ids) < self.page_size:
+                    break
+            self._transact(None, name, {'lastId': last_id, 'done': True})
+            print(f"{name}: {pages} pages")
+        if self.skipped_solvers:
+            print(f"Skipped solvedBy entries for missing teams: {', '.join(sorted(self.skipped_solvers))}")
+        print(f"{'Would update' if self.dry_run else 'Updated'} {self.updated} documents")
+        return self.updated
+
+    def _load_bits(self):
+        """Collect the bit positions already used by Questions.
+
+        When questions share a bit, an explicit 'bit' wins over one
+        implied by the ID, then the lowest ID; the others are left out
+        so the questions pass gives them new bits.
+        """
+        claims = {}
+        for doc in questions_collection(self.db).select(['bit']).stream():
+            bit = (doc.to_dict() or {}).get('bit')
+            explicit = bit is not None
+            bit = int(bit) if explicit else question_bit(doc.id)
+            if bit is not None and 0 <= bit < MAX_BITS:
+                claims.setdefault(bit, []).append((not explicit, doc.id))
+        self._bits = {}
+        for bit, owners in claims.items():
+            owners.sort()
+            self._bits[owners[0][1]] = bit
+            for _, qid in owners[1:]:
+                print(f"Question {qid} shares bit {bit} with {owners[0][1]}; it gets a new bit")
+        self._next_bit = max(self._bits.values(), default=-1) + 1
+
+    def _migrate_ids(self, name, collection, ids):
+        """Migrate ``ids`` in one transaction, or in halves if that's too
+        many writes; returns the checkpointed last ID"""
+        # Legacy questions are deleted as they're merged, so that pass
+        # always restarts from the beginning
+        last_id = ids[-1] if name != 'legacy_questions' or self.dry_run else None
+        migrate_page = getattr(self, f'_migrate_{name}')
+        try:
+            self._transact(lambda transaction: migrate_page(transaction, collection, ids), name, {'lastId': last_id})
+        except _PageTooLarge:
+            if len(ids) > 1:
+                half = len(ids) // 2
+                self._migrate_ids(name, collection, ids[:half])
+                self._migrate_ids(name, collection, ids[half:])
+            else:
+                # One question with more solvers than a transaction holds
+                self._stage_solvers(collection, ids[0])
+                self._transact(lambda transaction: migrate_page(transaction, collection, ids), name, {'lastId': last_id})
+        return last_id
+
+    def _stage_solvers(self, collection, qid):
+        """Add a question's solvers to their teams in plain batches.
+
+        ArrayUnion is idempotent, so if the run stops before the question
+        itself is rewritten these writes are simply repeated.
+        """
+        from firebase_admin import firestore
+        snapshot = collection.document(qid).get()
+        _, solvers = normalize_question(snapshot.to_dict() or {})
+        teams = self.db.get_all([team_ref(self.db, team_id) for team_id in sorted(solvers)])
+        writes = []
+        for team in teams:
+            if team.exists:
+                writes.append((team.reference, {'questionsSolved': firestore.ArrayUnion([qid])}))
+                self._staged.setdefault(team.id, set()).add(qid)
+        if not self.dry_run:
+            for start in range(0, len(writes), MAX_WRITES):
+                batch = self.db.batch()
+                for ref, data in writes[start:start + MAX_WRITES]:
+                    batch.update(ref, data)
+                batch.commit()
+        self.updated += len(writes)
+
+    def _transact(self, migrate_page, name, progress):
+        def apply(transaction):
+            writes = migrate_page(transaction) if migrate_page else []
+            # One more write for the checkpoint
+            if len(writes) + 1 > MAX_WRITES:
+                raise _PageTooLarge()
+            if self.dry_run:
+                return len(writes)
+            for ref, data, op in writes:
+                if op == 'delete':
+                    transaction.delete(ref)
+                elif op == 'set':
+                    transaction.set(ref, data)
+                else:
+                    transaction.update(ref, data)
+            transaction.set(checkpoint_ref(self.db), {name: progress}, merge=True)
+            return len(writes)
+        self.updated += run_transaction(self.db, apply)
+
+    def _read(self, transaction, refs):
+        return self.db.get_all(refs, transaction=transaction)
+
+    def _migrate_legacy_questions(self, transaction, collection, ids):
+        legacy = self._read(transaction, [collection.document(qid) for qid in ids])
+        current = self._read(transaction, [questions_collection(self.db).document(qid) for qid in ids])
+        writes = []
+        for old, target in zip(legacy, current):
+            if not old.exists:
+                continue
+            merged = dict(old.to_dict() or {})
+            merged.update((target.to_dict() or {}) if target.exists else {})
+            data, solvers = normalize_question(merged)
+            # Keep the legacy solvers for the Questions pass
+            if solvers:
+                data['solvedBy'] = sorted(solvers)
+            writes.append((target.reference, data, 'set'))
+            writes.append((old.reference, None, 'delete'))
+        return writes
+
+    def _migrate_questions(self, transaction, collection, ids):
+        snapshots = self._read(transaction, [collection.document(qid) for qid in ids])
+        # New bits come from the same counter repository.allocate_bits uses
+        counter = self._read(transaction, [bit_counter_ref(self.db)])[0]
+        stored_next = int((counter.to_dict() or {}).get('next', 0)) if counter.exists else None
+        self._next_bit = max(stored_next or 0, self._next_bit)
+        pending = []
+        solvers = {}
+        for snapshot in snapshots:
+            if not snapshot.exists:
+                continue
+            old = snapshot.to_dict() or {}
+            new, solved_by = normalize_question(old)
+            if snapshot.id not in self._bits:
+                if self._next_bit >= MAX_BITS:
+                    raise ValueError(f"No solve bit left for {snapshot.id} (limit {MAX_BITS})")
+                self._bits[snapshot.id] = self._next_bit
+                self._next_bit += 1
+            new['bit'] = self._bits[snapshot.id]
+            for team_id in solved_by:
+                solvers.setdefault(team_id, set()).add(snapshot.id)
+            pending.append((snapshot.reference, old, new))
+
+        teams = self._read(transaction, [team_ref(self.db, team_id) for team_id in sorted(solvers)])
+        team_writes = []
+        # Solvers land on the teams as a legacy array, folded into
+        # solvedBits by the teams pass
+        from firebase_admin import firestore
+        for team in teams:
+            if not team.exists:
+                self.skipped_solvers.add(team.id)
+                continue
+            qids = solvers[team.id] - self._staged.get(team.id, set())
+            if qids:
+                team_writes.append((team.reference, {'questionsSolved': firestore.ArrayUnion(sorted(qids))}, 'update'))
+        writes = []
+        for ref, old, new in pending:
+            update = _diff(old, new)
+            if update:
+                writes.append((ref, update, 'update'))
+        # Keep the counter past every bit in use, implied ones included
+        if stored_next != self._next_bit:
+            writes.append((bit_counter_ref(self.db), {'next': self._next_bit}, 'set'))
+        return team_writes + writes
+
+    def _migrate_teams(self, transaction, collection, ids):
+        snapshots = self._read(transaction, [collection.document(team_id) for team_id in ids])
+        writes = []
+        for snapshot in snapshots:
+            if not snapshot.exists:
+                continue
+            old = snapshot.to_dict() or {}
+            update = _diff(old, normalize_team(snapshot.id, old, self._bits.get))
+            if update:
+                writes.append((snapshot.reference, update, 'update'))
+        return writes
+
+def main():
+    parser = argparse.ArgumentParser(description='Migrate Questions and Teams to the current schema')
+    parser.add_argument('--dry-run', action='store_true', help='Report the changes without writing')
+    parser.add_argument('--restart', action='store_true', help='Ignore the saved checkpoint')
+    args = parser.parse_args()
+
+    from firebase_init import get_db
+    db = get_db()
+    if db is None:
+        print("Failed to initialize Firebase. Exiting...")
+        return
+
+    SchemaMigration(db, dry_run=args.dry_run, restart=args.restart).run()
+
+if __name__ == "__main__":
+    main()
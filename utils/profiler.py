@@ -0,0 +1,168 @@
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+PROFILE_DIR = os.environ.get('CTF_PROFILE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'profiles'))
+# Retention: keep at most this many profiled reruns and this many bytes
+MAX_PROFILES = int(os.environ.get('CTF_PROFILE_KEEP', '20'))
+MAX_BYTES = 50 * 1024 * 1024
+SAMPLE_INTERVAL = 0.001
+TOP_N = 25
+
+# The switch interval is process-wide: the first of any overlapping
+# profiled reruns lowers it and the last one restores it
+_switch_lock = threading.Lock()
+_switch_users = 0
+_saved_switch_interval = None
+
+def _lower_switch_interval(interval):
+    global _switch_users, _saved_switch_interval
+    with _switch_lock:
+        if _switch_users == 0:
+            _saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(_saved_switch_interval, interval))
+        _switch_users += 1
+
+def _restore_switch_interval():
+    global _switch_users
+    with _switch_lock:
+        _switch_users -= 1
+        if _switch_users == 0:
+            sys.setswitchinterval(_saved_switch_interval)
+
+def _frame_key(frame):
+    code = frame.f_code
+    return (code.co_name, code.co_filename, code.co_firstlineno)
+
+class RerunProfiler:
+    """Sampling profiler for one Streamlit rerun.
+
+    A background thread samples the script thread's stack every
+    SAMPLE_INTERVAL seconds. On exit it writes a speedscope profile, a
+    folded-stack file for flamegraph.pl and a top-N hot function table
+    to PROFILE_DIR, then prunes old profiles.
+    """
+
+    def __init__(self, name='rerun', interval=SAMPLE_INTERVAL, directory=PROFILE_DIR):
+        self.name = name
+        self.interval = interval
+        self.directory = directory
+        self.samples = []
+        self.paths = {}
+        self._stop = threading.Event()
+        self._target = None
+        self._sampler = None
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        # Let the sampler thread get the GIL about as often as it wants to sample
+        _lower_switch_interval(self.interval)
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name='rerun-profiler', daemon=True)
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._sampler.join()
+        _restore_switch_interval()
+        self.duration = time.perf_counter() - self._started
+        try:
+            self._write()
+        except Exception as e:
+            print(f"Failed to write profile: {str(e)}")
+        return False
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_key(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((tuple(stack), now - last))
+            last = now
+
+    def _write(self):
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}-{self.name}")
+
+        frames = {}
+        indexed_samples = []
+        weights = []
+        folded = Counter()
+        self_time = Counter()
+        total_time = Counter()
+        for stack, weight in self.samples:
+            indexed_samples.append([frames.setdefault(key, len(frames)) for key in stack])
+            weights.append(weight)
+            folded[';'.join(f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)] += 1
+            if stack:
+                self_time[stack[-1]] += weight
+            for key in set(stack):
+                total_time[key] += weight
+
+        speedscope = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': self.name,
+            'exporter': 'techignite-ctf',
+            'shared': {'frames': [{'name': name, 'file': path, 'line': line} for name, path, line in frames]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': self.name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': indexed_samples,
+                'weights': weights
+            }]
+        }
+        self.paths['speedscope'] = base + '.speedscope.json'
+        with open(self.paths['speedscope'], 'w') as f:
+            json.dump(speedscope, f)
+
+        self.paths['folded'] = base + '.folded'
+        with open(self.paths['folded'], 'w') as f:
+            for stack, count in folded.most_common():
+                f.write(f"{stack} {count}\n")
+
+        self.paths['top'] = base + '.top.txt'
+        with open(self.paths['top'], 'w') as f:
+            f.write(f"{self.name}: {self.duration * 1000:.1f} ms wall, {len(self.samples)} samples\n\n")
+            f.write(f"{'self ms':>9} {'total ms':>9}  function\n")
+            for key, seconds in self_time.most_common(TOP_N):
+                name, path, line = key
+                f.write(f"{seconds * 1000:9.2f} {total_time[key] * 1000:9.2f}  {name} ({path}:{line})\n")
+
+        prune(self.directory)
+
+def prune(directory=PROFILE_DIR, keep=MAX_PROFILES, max_bytes=MAX_BYTES):
+    """Delete the oldest profiles beyond ``keep`` runs or ``max_bytes`` total"""
+    runs = {}
+    for path in glob.glob(os.path.join(directory, '*')):
+        runs.setdefault(os.path.basename(path).split('.', 1)[0], []).append(path)
+    ordered = sorted(runs.items(), key=lambda item: max(os.path.getmtime(p) for p in item[1]), reverse=True)
+
+    used = 0
+    for idx, (_, paths) in enumerate(ordered):
+        size = sum(os.path.getsize(p) for p in paths)
+        used += size
+        if idx >= keep or used > max_bytes:
+            for path in paths:
+                os.remove(path)
+
+def profiling_requested(query_params, admin):
+    """Profile when CTF_PROFILE=1 is set, or an admin passes ?profile=1"""
+    if os.environ.get('CTF_PROFILE') == '1':
+        return True
+    return admin and query_params.get('profile') == '1'
@@ -0,0 +1,82 @@
+import threading
+from utils import resilience
+from utils.live_collection import LiveCollection
+from utils.repository import Question, questions_collection
+
+# Seconds between reloads when a snapshot listener can't be attached
+POLL_TTL = 30
+
+class QuestionCatalog(LiveCollection):
+    """In-memory copy of the Questions collection as repository.Question objects.
+
+    Loaded once and kept current by a single on_snapshot listener; when
+    the listener is unavailable or stops it falls back to reloading every
+    POLL_TTL seconds (utils.live_collection). ``version`` increases on
+    every change so callers can cache anything derived from the catalog.
+    """
+
+    label = 'Question catalog'
+
+    def __init__(self, db, ttl=POLL_TTL):
+        super().__init__(db, ttl)
+        self.version = 0
+        self._questions = {}
+        self._sorted = []
+        self._sorted_version = -1
+        self._lock = threading.RLock()
+
+    def query(self):
+        return questions_collection(self.db)
+
+    def read(self):
+        return resilience.call(self.query().get)
+
+    def load(self, docs):
+        with self._lock:
+            self._questions = {doc.id: Question.from_doc(doc.id, doc.to_dict()) for doc in docs}
+            self._changed()
+
+    def apply_snapshot(self, col_snapshot, changes):
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    self._questions.pop(doc.id, None)
+                else:
+                    self._questions[doc.id] = Question.from_doc(doc.id, doc.to_dict())
+            self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._notify()
+
+    def get(self, qid):
+        """Return the Question for ``qid`` or None"""
+        self.refresh_if_stale()
+        return self._questions.get(qid)
+
+    def questions(self):
+        """Return all questions as (qid, Question) pairs ordered by qid"""
+        self.refresh_if_stale()
+        with self._lock:
+            if self._sorted_version != self.version:
+                self._sorted = sorted(self._questions.items())
+                self._sorted_version = self.version
+            return self._sorted
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_question_catalog(db):
+    """Return the process-wide catalog for ``db``, starting it on first use"""
+    catalog = _catalogs.get(id(db))
+    if catalog is not None:
+        return catalog
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(id(db))
+        if catalog is None:
+            # The catalog keeps a reference to db, so its id can't be reused
+            catalog = QuestionCatalog(db).start()
+            _catalogs[id(db)] = catalog
+    return catalog
@@ -0,0 +1,227 @@
+"""
+Sync Questions (and seed Teams) from a source file without overwriting
+live state.
+
+Current documents are fetched with one get_all(). A document that
+doesn't exist is created whole. For one that exists, only the source
+fields whose values changed are written; solve state
+(repository.QUESTION_STATE_FIELDS / TEAM_STATE_FIELDS) and fields the
+source doesn't mention are left alone. New questions get their solve
+bit from the persisted counter (repository.allocate_bits). The plan is
+printed before anything is written, and re-running an applied sync
+writes nothing.
+
+    python utils/question_sync.py questions.xlsx --dry-run
+    python utils/question_sync.py questions.json
+
+A .json source is {qid: {field: value}} or a list of objects with a
+'qid'; an .xlsx/.csv source has the qid in its first column and the
+flag in its second, with any other columns stored under their header.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import firebase_init
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.repository import (
+    QUESTION_STATE_FIELDS, TEAM_STATE_FIELDS, allocate_bits, question_doc, question_ref, team_doc, team_ref
+)
+
+# Firestore's limit on writes per batch
+BATCH_SIZE = 500
+SYNC_WORKERS = 4
+# Values never echoed in the plan
+SECRET_FIELDS = ('flag',)
+INT_FIELDS = ('points', 'minimumPoints', 'decay', 'firstBloodBonus')
+
+def _is_transform(value):
+    from google.cloud.firestore_v1.transforms import Sentinel
+    return isinstance(value, Sentinel)
+
+def field_changes(current, desired, state_fields=()):
+    """Fields of ``desired`` that differ from ``current``.
+
+    Server transforms (SERVER_TIMESTAMP) never count as a change on
+    their own; they're only written alongside one.
+    """
+    changes = {}
+    transforms = {}
+    for field, value in desired.items():
+        if field in state_fields:
+            continue
+        if _is_transform(value):
+            transforms[field] = value
+        elif field not in current or current[field] != value:
+            changes[field] = value
+    if changes:
+        changes.update(transforms)
+    return changes
+
+class SyncPlan:
+    def __init__(self):
+        self.creates = []
+        self.updates = []
+        self.unchanged = []
+
+    @property
+    def writes(self):
+        return len(self.creates) + len(self.updates)
+
+    def show(self):
+        for ref, data in self.creates:
+            print(f"+ {ref.id}: new ({', '.join(sorted(data))})")
+        for ref, changes, current in self.updates:
+            print(f"~ {ref.id}: {', '.join(_describe(field, current.get(field), changes[field]) for field in sorted(changes))}")
+        print(f"{len(self.creates)} to create, {len(self.updates)} to update, {len(self.unchanged)} unchanged")
+
+def _describe(field, old, new):
+    if field in SECRET_FIELDS or _is_transform(new):
+        return field
+    return f"{field} {old!r} -> {new!r}"
+
+def plan_sync(db, documents, state_fields=(), create_only=False):
+    """Compare ``documents`` ({ref: data}) with what's stored.
+
+    Reads every document in one get_all() and returns a SyncPlan. With
+    ``create_only`` documents that already exist are left untouched.
+    """
+    refs = list(documents)
+    by_path = {ref.path: ref for ref in refs}
+    plan = SyncPlan()
+    for snapshot in db.get_all(refs):
+        ref = by_path[snapshot.reference.path]
+        desired = documents[ref]
+        if not snapshot.exists:
+            plan.creates.append((ref, desired))
+            continue
+        current = snapshot.to_dict() or {}
+        changes = {} if create_only else field_changes(current, desired, state_fields)
+        if changes:
+            plan.updates.append((ref, changes, current))
+        else:
+            plan.unchanged.append(ref)
+    return plan
+
+def assign_bits(db, plan):
+    """Give every question the plan creates without a 'bit' a newly allocated one"""
+    missing = [data for _, data in plan.creates if data.get('bit') is None]
+    if not missing:
+        return
+    bits = allocate_bits(db, len(missing))
+    for data, bit in zip(missing, bits):
+        data['bit'] = bit
+    print(f"Assigned solve bits {bits[0]}-{bits[-1]}")
+
+def apply_plan(db, plan, workers=SYNC_WORKERS):
+    """Commit the plan's writes in concurrent batches; returns the write count"""
+    writes = [(ref, data) for ref, data in plan.creates]
+    writes += [(ref, changes) for ref, changes, _ in plan.updates]
+
+    def commit(chunk):
+        batch = db.batch()
+        for ref, data in chunk:
+            # merge keeps fields outside the plan (solve state) intact
+            batch.set(ref, data, merge=True)
+        batch.commit()
+        return len(chunk)
+
+    chunks = [writes[start:start + BATCH_SIZE] for start in range(0, len(writes), BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(commit, chunks))
+
+def sync(db, documents, state_fields=(), dry_run=False, create_only=False, prepare=None):
+    """Print the plan for ``documents`` and apply it unless ``dry_run``.
+
+    ``prepare(db, plan)`` runs just before a plan is applied.
+    """
+    plan = plan_sync(db, documents, state_fields, create_only)
+    plan.show()
+    if dry_run or not plan.writes:
+        return plan
+    if prepare is not None:
+        prepare(db, plan)
+    written = apply_plan(db, plan)
+    print(f"Wrote {written} documents")
+    return plan
+
+def sync_questions(db, questions, dry_run=False, create_only=False):
+    """Sync ``{qid: question_doc(...)}`` into Questions.
+
+    With ``create_only`` only missing questions are written, for sample
+    data that must never replace a live question's flag or points.
+    """
+    documents = {question_ref(db, qid): data for qid, data in questions.items()}
+    return sync(db, documents, QUESTION_STATE_FIELDS, dry_run, create_only, prepare=assign_bits)
+
+def sync_teams(db, team_ids, dry_run=False):
+    """Create missing teams; existing teams keep their solves and name"""
+    documents = {team_ref(db, team_id): team_doc(team_id) for team_id in team_ids}
+    return sync(db, documents, TEAM_STATE_FIELDS, dry_run, create_only=True)
+
+def _coerce(field, value):
+    if field in INT_FIELDS:
+        return int(float(value))
+    return value
+
+def load_questions(path):
+    """Read a source file into {qid: question_doc(...)}"""
+    if path.endswith('.json'):
+        with open(path) as f:
+            source = json.load(f)
+        rows = source.values() if isinstance(source, dict) else source
+        keys = source.keys() if isinstance(source, dict) else [row['qid'] for row in source]
+        records = [(qid, dict(row)) for qid, row in zip(keys, rows)]
+    else:
+        import pandas as pd
+        # Read with all cells as strings to prevent truncation
+        df = pd.read_csv(path, dtype=str) if path.endswith('.csv') else pd.read_excel(path, dtype=str)
+        df = df.dropna(subset=[df.columns[0], df.columns[1]])
+        records = []
+        for _, row in df.iterrows():
+            qid = str(row.iloc[0]).strip().replace(' ', '')
+            data = {'flag': str(row.iloc[1]).strip().replace('\n', '').replace('\r', '')}
+            data.update((column, value) for column, value in row.iloc[2:].items() if pd.notna(value))
+            records.append((qid, data))
+
+    questions = {}
+    for qid, data in records:
+        qid = str(qid).strip()
+        if not qid:
+            continue
+        data.pop('qid', None)
+        flag = data.pop('flag', None)
+        points = data.pop('points', None)
+        fields = {field: _coerce(field, value) for field, value in data.items()}
+        questions[qid] = question_doc(qid, flag, None if points is None else _coerce('points', points), **fields)
+    return questions
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync Questions from a source file, writing only changed fields')
+    parser.add_argument('source', help='.json, .csv or .xlsx file of questions')
+    parser.add_argument('--dry-run', action='store_true', help='Print the plan without writing')
+    parser.add_argument('--yes', action='store_true', help="Don't ask for confirmation")
+    args = parser.parse_args()
+
+    from firebase_init import get_db
+    db = get_db()
+    if db is None:
+        print("Failed to initialize Firebase. Exiting...")
+        return 1
+
+    questions = load_questions(args.source)
+    plan = sync_questions(db, questions, dry_run=True)
+    if args.dry_run or not plan.writes:
+        return 0
+    if not args.yes and input(f"Apply {plan.writes} writes? [y/N] ").strip().lower() != 'y':
+        print("Aborted")
+        return 1
+    assign_bits(db, plan)
+    print(f"Wrote {apply_plan(db, plan)} documents")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Typed access to the Questions and Teams collections.
+
+Documents written over the event's history use several shapes ('Flag'
+or 'flag', 'solvedBy' or 'solved_by', 'questionsSolved',
+'solvedQuestions' or 'ques_id', and a lowercase 'questions'
+collection). Every reader goes through Question.from_doc() and
+Team.from_doc(), which accept all of them; every writer uses
+question_doc() and team_doc(), which produce the current shape tagged
+with SCHEMA_VERSION. utils/migrate_schema.py rewrites stored documents
+to that shape.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from utils.solve_bitmap import MAX_BITS, question_bit, team_bits
+
+# Version 1 is every unversioned document written before this module
+SCHEMA_VERSION = 2
+SCHEMA_FIELD = 'schemaVersion'
+
+QUESTIONS = 'Questions'
+TEAMS = 'Teams'
+# Counters/questionBits holds 'next', the first solve bit not yet handed out
+COUNTERS = 'Counters'
+BIT_COUNTER = 'questionBits'
+# Older scripts wrote questions here, where the app never read them
+LEGACY_QUESTIONS = 'questions'
+
+# Questions without a 'points' field are worth one point per solve
+DEFAULT_POINTS = 1
+
+# Fields of older shapes: {legacy name: current name, or None to drop}
+LEGACY_QUESTION_FIELDS = {'Flag': 'flag', 'id': 'qid', 'q_id': 'qid', 'solvedBy': None, 'solved_by': None}
+LEGACY_TEAM_FIELDS = {
+    'teamid': None, 'teamId': None, 'team_id': None,
+    'total_ques_solved': 'totalCount',
+    'solvedQuestions': None, 'ques_id': None
+}
+# Arrays of solved question IDs, folded into solvedBits
+LEGACY_SOLVE_ARRAYS = ('questionsSolved', 'solvedQuestions', 'ques_id')
+
+# Fields owned by the solve pipeline and utils/migrate_schema.py; seeding
+# tools only write them when they create a document
+QUESTION_STATE_FIELDS = ('firstBlood', 'solvedBy', 'solved_by', 'bit', SCHEMA_FIELD)
+TEAM_STATE_FIELDS = ('solvedBits', 'totalCount', 'timestamp', *LEGACY_SOLVE_ARRAYS, SCHEMA_FIELD)
+
+def questions_collection(db):
+    return db.collection(QUESTIONS)
+
+def teams_collection(db):
+    return db.collection(TEAMS)
+
+def question_ref(db, qid):
+    return questions_collection(db).document(qid)
+
+def team_ref(db, team_id):
+    return teams_collection(db).document(team_id)
+
+def bit_counter_ref(db):
+    return db.collection(COUNTERS).document(BIT_COUNTER)
+
+def _first(data, *names, default=None):
+    for name in names:
+        if data.get(name) is not None:
+            return data[name]
+    return default
+
+@dataclass(frozen=True)
+class Question:
+    __slots__ = ('qid', 'flag', 'points', 'minimum_points', 'decay', 'first_blood_bonus',
+                 'first_blood_team', 'bit', 'explicit_bit', 'title', 'category', 'schema_version')
+    qid: str
+    flag: Optional[str]
+    points: int
+    minimum_points: int
+    decay: int
+    first_blood_bonus: int
+    first_blood_team: Optional[str]
+    bit: Optional[int]
+    # False when ``bit`` is only implied by a legacy Q<n> ID
+    explicit_bit: bool
+    title: Optional[str]
+    category: Optional[str]
+    schema_version: int
+
+    @classmethod
+    def from_doc(cls, doc_id, data):
+        """Build a Question from a document of any schema version"""
+        data = data or {}
+        points = int(data.get('points', DEFAULT_POINTS))
+        bit = data.get('bit')
+        return cls(
+            qid=doc_id,
+            flag=_first(data, 'flag', 'Flag'),
+            points=points,
+            minimum_points=int(data.get('minimumPoints', points)),
+            decay=int(data.get('decay', 0)),
+            first_blood_bonus=int(data.get('firstBloodBonus', 0)),
+            first_blood_team=(data.get('firstBlood') or {}).get('teamId'),
+            bit=question_bit(doc_id) if bit is None else int(bit),
+            explicit_bit=bit is not None,
+            title=data.get('title'),
+            category=_first(data, 'category', 'type'),
+            schema_version=int(data.get(SCHEMA_FIELD, 1))
+        )
+
+@dataclass(frozen=True)
+class Team:
+    __slots__ = ('team_id', 'name', 'solved_bits', 'unbitted', 'total_count', 'timestamp', 'schema_version')
+    team_id: str
+    name: str
+    solved_bits: bytes
+    # Solves of questions without a bit position, kept in questionsSolved
+    unbitted: Tuple[str, ...]
+    total_count: int
+    timestamp: object
+    schema_version: int
+
+    @classmethod
+    def from_doc(cls, doc_id, data, bit_of=question_bit):
+        """Build a Team from a document of any schema version.
+
+        ``bit_of(qid)`` maps legacy solve arrays onto bit positions.
+        """
+        data = data or {}
+        legacy = set()
+        for field in LEGACY_SOLVE_ARRAYS:
+            legacy.update(data.get(field) or [])
+        return cls(
+            team_id=doc_id,
+            name=data.get('name') or doc_id,
+            solved_bits=team_bits({'solvedBits': data.get('solvedBits'), 'questionsSolved': sorted(legacy)}, bit_of),
+            unbitted=tuple(sorted(qid for qid in legacy if bit_of(qid) is None)),
+            total_count=int(_first(data, 'totalCount', 'total_ques_solved', default=0)),
+            timestamp=data.get('timestamp'),
+            schema_version=int(data.get(SCHEMA_FIELD, 1))
+        )
+
+def question_doc(qid, flag=None, points=None, **fields):
+    """Return a Questions document in the current shape.
+
+    ``fields`` are stored as given (title, category, description, ...);
+    leave ``flag`` out when merging details into an existing question.
+    """
+    data = {'qid': qid, SCHEMA_FIELD: SCHEMA_VERSION}
+    if flag is not None:
+        data['flag'] = flag
+    if points is not None:
+        data['points'] = points
+    data.update(fields)
+    return data
+
+def team_doc(team_id, name=None):
+    """Return a new Teams document in the current shape"""
+    return {
+        'name': name or team_id,
+        'solvedBits': b'',
+        'totalCount': 0,
+        'timestamp': None,
+        SCHEMA_FIELD: SCHEMA_VERSION
+    }
+
+def get_team(db, team_id, transaction=None, bit_of=question_bit):
+    """Read one team; returns None if it doesn't exist"""
+    snapshot = team_ref(db, team_id).get(transaction=transaction)
+    return Team.from_doc(team_id, snapshot.to_dict(), bit_of) if snapshot.exists else None
+
+def get_question(db, qid, transaction=None):
+    """Read one question; returns None if it doesn't exist"""
+    snapshot = question_ref(db, qid).get(transaction=transaction)
+    return Question.from_doc(qid, snapshot.to_dict()) if snapshot.exists else None
+
+def next_free_bit(db, transaction=None):
+    """Return the first solve bit not yet handed out.
+
+    Before the counter exists it is one past the highest bit any
+    question holds, explicit or implied by its ID.
+    """
+    snapshot = bit_counter_ref(db).get(transaction=transaction)
+    if snapshot.exists:
+        return int(snapshot.to_dict().get('next', 0))
+    bits = [Question.from_doc(doc.id, doc.to_dict()).bit
+            for doc in questions_collection(db).select(['bit']).get(transaction=transaction)]
+    return max((bit + 1 for bit in bits if bit is not None), default=0)
+
+def allocate_bits(db, count, transaction=None):
+    """Hand out ``count`` solve bits from the persisted counter.
+
+    Inside ``transaction`` the counter write is added to it; otherwise
+    the allocation runs in its own transaction. Raises ValueError once
+    MAX_BITS bits have been handed out.
+    """
+    if transaction is None:
+        from utils.solve_pipeline import run_transaction
+        return run_transaction(db, lambda transaction: allocate_bits(db, count, transaction))
+    start = next_free_bit(db, transaction)
+    if start + count > MAX_BITS:
+        raise ValueError(f"Only {MAX_BITS - start} of {count} solve bits are left (limit {MAX_BITS})")
+    transaction.set(bit_counter_ref(db), {'next': start + count})
+    return list(range(start, start + count))
@@ -0,0 +1,169 @@
+"""
+Delete collections, including every subcollection below them.
+
+Document references are streamed with a key-only projection (no field
+data is read) and deleted through a BulkWriter, which sends batches in
+parallel, ramps its write rate up from 500/s (the 500/50/5 rule) and
+backs off exponentially on contention or quota errors.
+
+    python utils/reset_database.py --dry-run
+    python utils/reset_database.py Submissions SolveQueue
+    python utils/reset_database.py --keep Questions Teams
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add parent directory to path to import firebase_init
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Everything an event writes: the seeded Questions and Teams and the
+# state derived from their solves (views, scoreboard shards, submission
+# and solve records, the question bit counter, migration checkpoints).
+# Clearing only some of them leaves stale scores and solves behind.
+EVENT_COLLECTIONS = ('Questions', 'Teams', 'TeamViews', 'Scoreboard', 'Submissions', 'Counters', 'Migrations')
+# References fetched per listing query
+PAGE_SIZE = 1000
+INITIAL_OPS_PER_SECOND = 500
+MAX_OPS_PER_SECOND = 10000
+# Attempts per delete before it is reported as failed
+MAX_ATTEMPTS = 10
+PROGRESS_INTERVAL = 0.2
+
+def document_refs(collection, page_size=PAGE_SIZE):
+    """Yield the references of every document in ``collection`` and below it"""
+    from google.cloud.firestore_v1.field_path import FieldPath
+    query = collection.recursive().select([FieldPath.document_id()])
+    last = None
+    while True:
+        page = query.limit(page_size)
+        if last is not None:
+            page = page.start_after(last)
+        snapshots = page.get()
+        for snapshot in snapshots:
+            yield snapshot.reference
+        if len(snapshots) < page_size:
+            return
+        last = snapshots[-1]
+
+def count_documents(db, names, page_size=PAGE_SIZE):
+    """Return {collection name: documents in it and its subcollections}"""
+    return {name: sum(1 for _ in document_refs(db.collection(name), page_size)) for name in names}
+
+class Progress:
+    """Single-line progress bar, safe to update from BulkWriter threads"""
+
+    def __init__(self, total, width=30, stream=sys.stdout):
+        self.total = total
+        self.width = width
+        self.stream = stream
+        self.done = 0
+        self.started = time.monotonic()
+        self._shown = 0.0
+        self._lock = threading.Lock()
+
+    def advance(self, count=1):
+        with self._lock:
+            self.done += count
+            now = time.monotonic()
+            if now - self._shown >= PROGRESS_INTERVAL or self.done >= self.total:
+                self._shown = now
+                self._render(now)
+
+    def rate(self):
+        return self.done / max(time.monotonic() - self.started, 1e-9)
+
+    def _render(self, now):
+        fraction = min(self.done / self.total, 1.0) if self.total else 1.0
+        filled = int(fraction * self.width)
+        bar = '#' * filled + '-' * (self.width - filled)
+        rate = self.done / max(now - self.started, 1e-9)
+        self.stream.write(f"\r[{bar}] {self.done}/{self.total} {fraction:.0%} {rate:.0f} docs/s")
+        self.stream.flush()
+
+    def finish(self):
+        with self._lock:
+            self._render(time.monotonic())
+            self.stream.write('\n')
+
+def bulk_writer(db, max_ops_per_second=MAX_OPS_PER_SECOND):
+    """Return a parallel BulkWriter with exponential backoff on errors"""
+    from google.cloud.firestore_v1.bulk_writer import BulkRetry, BulkWriterOptions, SendMode
+    return db.bulk_writer(options=BulkWriterOptions(
+        initial_ops_per_second=min(INITIAL_OPS_PER_SECOND, max_ops_per_second),
+        max_ops_per_second=max_ops_per_second,
+        mode=SendMode.parallel,
+        retry=BulkRetry.exponential
+    ))
+
+def delete_collections(db, names, page_size=PAGE_SIZE, max_ops_per_second=MAX_OPS_PER_SECOND, total=None):
+    """Delete every document in ``names`` and their subcollections.
+
+    ``total`` sizes the progress bar; pass the counts from
+    count_documents() to avoid listing the collections twice. Returns
+    (deleted, failed).
+    """
+    if total is None:
+        total = sum(count_documents(db, names, page_size).values())
+    progress = Progress(total)
+    failed = []
+    writer = bulk_writer(db, max_ops_per_second)
+    writer.on_write_result(lambda reference, result, writer: progress.advance())
+
+    def on_error(failure, writer):
+        if failure.attempts < MAX_ATTEMPTS:
+            return True
+        failed.append((failure.operation.reference.path, failure.message))
+        progress.advance()
+        return False
+
+    writer.on_write_error(on_error)
+    try:
+        for name in names:
+            for reference in document_refs(db.collection(name), page_size):
+                writer.delete(reference)
+    finally:
+        writer.close()
+        progress.finish()
+    for path, message in failed:
+        print(f"Failed to delete {path}: {message}")
+    return progress.done - len(failed), len(failed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Delete collections and all their subcollections')
+    parser.add_argument('collections', nargs='*', help='Collections to delete (default: every top-level collection)')
+    parser.add_argument('--keep', nargs='+', default=[], help='Top-level collections to leave in place')
+    parser.add_argument('--dry-run', action='store_true', help='Count the documents that would be deleted')
+    parser.add_argument('--max-rate', type=int, default=MAX_OPS_PER_SECOND, help='Maximum deletes per second')
+    parser.add_argument('--yes', action='store_true', help="Don't ask for confirmation")
+    args = parser.parse_args()
+
+    from firebase_init import get_db
+    db = get_db()
+    if db is None:
+        print("Failed to initialize Firebase. Exiting...")
+        return 1
+
+    names = args.collections or sorted(collection.id for collection in db.collections())
+    names = [name for name in names if name not in args.keep]
+    counts = count_documents(db, names)
+    for name in names:
+        print(f"{name}: {counts[name]} documents")
+    total = sum(counts.values())
+    if args.dry_run or not total:
+        print(f"{'Would delete' if args.dry_run else 'Nothing to delete;'} {total} documents")
+        return 0
+    if not args.yes and input(f"Delete {total} documents? [y/N] ").strip().lower() != 'y':
+        print("Aborted")
+        return 1
+
+    started = time.monotonic()
+    deleted, failed = delete_collections(db, names, max_ops_per_second=args.max_rate, total=total)
+    elapsed = time.monotonic() - started
+    print(f"Deleted {deleted} documents in {elapsed:.1f}s ({deleted / max(elapsed, 1e-9):.0f} docs/s)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
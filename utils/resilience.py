@@ -0,0 +1,342 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from utils import metrics
+
+# Seconds a single Firestore call (including its retries) may take
+DEADLINE = float(os.environ.get('CTF_FIRESTORE_DEADLINE', '5'))
+MAX_ATTEMPTS = 3
+BASE_DELAY = 0.1
+MAX_DELAY = 2.0
+# Consecutive failures that open the circuit, and seconds before a probe call
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+MAX_SNAPSHOTS = 1000
+RETRY_INTERVAL = 5.0
+RETRY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pending_writes.jsonl')
+# Queued writes whose replay failed with a non-transient error
+DEAD_LETTER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'failed_writes.jsonl')
+
+# google.api_core exception names worth retrying; matched by name so the
+# SDK doesn't have to be imported to classify errors
+TRANSIENT_ERRORS = {
+    'Aborted', 'DeadlineExceeded', 'GatewayTimeout', 'InternalServerError',
+    'ResourceExhausted', 'ServiceUnavailable', 'TooManyRequests', 'RetryError'
+}
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class Unavailable(Exception):
+    """Firestore could not be reached in time"""
+
+class CircuitOpen(Unavailable):
+    pass
+
+class DeadlineExceeded(Unavailable):
+    pass
+
+class InjectedFault(Exception):
+    """Error raised by the fault injector"""
+
+def is_transient(error):
+    """Return True for errors that a retry (or a later replay) may fix"""
+    if isinstance(error, (InjectedFault, ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    Opens after ``threshold`` failures in a row. While open, calls fail
+    fast; after ``reset_timeout`` seconds one probe call is let through
+    and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go to the backend now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self.state = OPEN
+                self.opened += 1
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        """Close the circuit and forget past failures"""
+        self.record_success()
+
+    def is_open(self):
+        return self.state != CLOSED
+
+class FaultInjector:
+    """Test mode that adds latency, errors and hangs to Firestore calls.
+
+    Configured from CTF_FAULTS, e.g. ``error_rate=0.2,latency_ms=300,hang_rate=0.01``,
+    or with configure(). A hang sleeps past the call deadline.
+    """
+
+    def __init__(self, spec=''):
+        settings = {}
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            key, _, value = item.partition('=')
+            settings[key.strip()] = float(value)
+        self.configure(**settings)
+
+    def configure(self, error_rate=0.0, latency_ms=0.0, hang_rate=0.0):
+        self.error_rate = error_rate
+        self.latency = latency_ms / 1000.0
+        self.hang_rate = hang_rate
+
+    @property
+    def active(self):
+        return bool(self.error_rate or self.latency or self.hang_rate)
+
+    def wrap(self, func):
+        if not self.active:
+            return func
+
+        def faulty(*args, **kwargs):
+            if self.latency:
+                time.sleep(self.latency)
+            roll = random.random()
+            if roll < self.hang_rate:
+                time.sleep(DEADLINE + 1)
+            elif roll < self.hang_rate + self.error_rate:
+                raise InjectedFault("Injected Firestore fault")
+            return func(*args, **kwargs)
+        return faulty
+
+breaker = CircuitBreaker()
+faults = FaultInjector(os.environ.get('CTF_FAULTS', ''))
+# Calls run here so a hung backend can't hold the Streamlit script thread
+# past its deadline; a hung call keeps its worker until the SDK gives up
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='firestore-call')
+_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+def call(func, idempotent=True, deadline=None):
+    """Run ``func()`` against Firestore under a deadline and the circuit breaker.
+
+    Transient errors are retried with full-jitter exponential backoff
+    when ``idempotent`` is true. Raises Unavailable (CircuitOpen or
+    DeadlineExceeded) when Firestore can't answer in time; other errors
+    propagate unchanged.
+    """
+    deadline = DEADLINE if deadline is None else deadline
+    if not breaker.allow():
+        raise CircuitOpen("Firestore circuit is open")
+
+    expires = time.monotonic() + deadline
+    attempt = 0
+    while True:
+        attempt += 1
+        future = _executor.submit(metrics.bind(faults.wrap(func)))
+        try:
+            result = future.result(timeout=max(expires - time.monotonic(), 0))
+        except FutureTimeout:
+            breaker.record_failure()
+            raise DeadlineExceeded(f"Firestore call exceeded its {deadline}s deadline")
+        except Exception as e:
+            if not is_transient(e):
+                # The backend answered; the error is the caller's to handle
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** (attempt - 1)))
+            if (not idempotent or attempt >= MAX_ATTEMPTS
+                    or time.monotonic() + delay >= expires or not breaker.allow()):
+                raise Unavailable(f"Firestore unavailable: {str(e)}") from e
+            time.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+def read(key, func, deadline=None):
+    """Idempotent read through call(), served from the last good result when unavailable"""
+    try:
+        value = call(func, idempotent=True, deadline=deadline)
+    except Unavailable:
+        with _snapshots_lock:
+            if key in _snapshots:
+                return _snapshots[key]
+        raise
+    with _snapshots_lock:
+        _snapshots.pop(key, None)
+        _snapshots[key] = value
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return value
+
+# Durable retry queue for writes made while Firestore is unavailable
+
+_handlers = {}
+
+def register_write(kind):
+    """Decorator registering ``handler(db, **payload)`` to replay queued writes of ``kind``"""
+    def decorator(handler):
+        _handlers[kind] = handler
+        return handler
+    return decorator
+
+class RetryQueue:
+    """Append-only local file of writes waiting for Firestore.
+
+    Entries are fsynced on enqueue so they survive a restart, and a
+    background worker replays them through their registered handler
+    once the circuit lets calls through. Handlers must be idempotent.
+    A replay that fails with anything but Unavailable is moved to the
+    dead-letter file with its error, to be inspected and re-queued by
+    hand, instead of being retried forever or lost.
+    """
+
+    def __init__(self, db, path=RETRY_PATH, interval=RETRY_INTERVAL, dead_letter_path=DEAD_LETTER_PATH):
+        self.db = db
+        self.path = path
+        self.dead_letter_path = dead_letter_path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='retry-queue', daemon=True)
+
+    def start(self):
+        # Fold back entries from a drain interrupted by a restart
+        if os.path.exists(self._draining_path):
+            with open(self._draining_path, encoding='utf-8') as f:
+                self._append(f.readlines())
+            os.remove(self._draining_path)
+        self._worker.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    @property
+    def _draining_path(self):
+        return self.path + '.draining'
+
+    def enqueue(self, kind, payload):
+        """Durably queue a write for replay"""
+        self._append([json.dumps({'kind': kind, 'payload': payload}) + '\n'])
+
+    def _append(self, lines, path=None):
+        if not lines:
+            return
+        with self._lock:
+            with open(path or self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _count(self, path):
+        with self._lock:
+            if not os.path.exists(path):
+                return 0
+            with open(path, encoding='utf-8') as f:
+                return sum(1 for line in f if line.strip())
+
+    def pending(self):
+        """Return the number of queued writes"""
+        return self._count(self.path)
+
+    def failed(self):
+        """Return the number of writes moved to the dead-letter file"""
+        return self._count(self.dead_letter_path)
+
+    def drain(self):
+        """Replay queued writes until Firestore is unavailable; returns the number
+        taken off the queue (replayed or moved to the dead-letter file)"""
+        with self._drain_lock:
+            with self._lock:
+                if not os.path.exists(self.path):
+                    return 0
+                os.replace(self.path, self._draining_path)
+            with open(self._draining_path, encoding='utf-8') as f:
+                lines = [line for line in f if line.strip()]
+
+            done = 0
+            for line in lines:
+                entry = json.loads(line)
+                handler = _handlers.get(entry['kind'])
+                if handler is None:
+                    print(f"No handler for queued write {entry['kind']}, keeping it")
+                    break
+                try:
+                    call(lambda: handler(self.db, **entry['payload']), idempotent=False)
+                except Unavailable:
+                    break
+                except Exception as e:
+                    print(f"Queued {entry['kind']} write failed, moving it to {self.dead_letter_path}: {str(e)}")
+                    entry.update(error=f"{type(e).__name__}: {e}", failedAt=time.time())
+                    self._append([json.dumps(entry) + '\n'], self.dead_letter_path)
+                done += 1
+
+            self._append(lines[done:])
+            os.remove(self._draining_path)
+            if done:
+                print(f"Replayed {done} queued writes, {len(lines) - done} left")
+            return done
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if os.path.exists(self.path):
+                try:
+                    self.drain()
+                except Exception as e:
+                    print(f"Retry queue drain failed: {str(e)}")
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_retry_queue(db):
+    """Return the process-wide retry queue for ``db``, starting it on first use"""
+    retry_queue = _queues.get(id(db))
+    if retry_queue is not None:
+        return retry_queue
+
+    with _queues_lock:
+        retry_queue = _queues.get(id(db))
+        if retry_queue is None:
+            retry_queue = RetryQueue(db).start()
+            _queues[id(db)] = retry_queue
+    return retry_queue
+
+def status():
+    """Return the circuit state and fault-injection settings for display"""
+    return {
+        'state': breaker.state,
+        'failures': breaker.failures,
+        'opened': breaker.opened,
+        'pending_writes': sum(q.pending() for q in list(_queues.values())),
+        'failed_writes': sum(q.failed() for q in list(_queues.values())),
+        'faults': faults.active
+    }
@@ -0,0 +1,63 @@
+import threading
+from utils.leaderboard import get_rank_index, load_scoreboard, scoreboard_collection
+from utils.live_collection import LiveCollection
+
+# Seconds between scoreboard reads when a snapshot listener can't be attached
+POLL_TTL = 10
+
+class ScoreboardHub(LiveCollection):
+    """Fans one server-side scoreboard listener out to every session.
+
+    A single on_snapshot listener keeps the shared rank index current;
+    sessions read from that memory (or block in ``wait_for_change``)
+    instead of querying Firestore, so the read cost doesn't grow with
+    the number of open browser tabs.
+    """
+
+    label = 'Scoreboard'
+
+    def __init__(self, db, ttl=POLL_TTL):
+        super().__init__(db, ttl)
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def query(self):
+        return scoreboard_collection(self.db)
+
+    def load(self, docs):
+        load_scoreboard(docs)
+        self._publish()
+
+    def apply_snapshot(self, col_snapshot, changes):
+        self.load(col_snapshot)
+
+    def _publish(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+        self._notify()
+
+    def wait_for_change(self, version, timeout=None):
+        """Block until the scoreboard is newer than ``version``; returns the current version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version, timeout=timeout)
+            return self.version
+
+    def index(self):
+        """Return the shared rank index"""
+        self.refresh_if_stale()
+        return get_rank_index(self.db)
+
+_hub = None
+_hub_lock = threading.Lock()
+
+def get_scoreboard_hub(db):
+    """Return the process-wide scoreboard hub, starting it on first use"""
+    global _hub
+    if _hub is not None:
+        return _hub
+
+    with _hub_lock:
+        if _hub is None:
+            _hub = ScoreboardHub(db).start()
+    return _hub
@@ -0,0 +1,266 @@
+import threading
+import time
+import numpy as np
+from utils import leaderboard, team_views
+from utils.question_catalog import get_question_catalog
+from utils.repository import DEFAULT_POINTS, Team
+from utils.solve_bitmap import SolveMatrix, bit_for, catalog_bits, unpack
+from utils.teams_feed import get_teams_feed
+
+# Seconds solves are collected before one recomputation runs
+BATCH_WINDOW = 0.2
+# Firestore's limit on writes per batch
+MAX_BATCH_WRITES = 500
+
+def question_values(initial, minimum, decay, counts):
+    """Vectorized current value of every question.
+
+    Static questions (``decay`` 0) are worth ``initial``. Dynamic ones
+    fall quadratically from ``initial`` to ``minimum`` over ``decay``
+    solves; the first solver gets the full value.
+    """
+    solves = np.maximum(counts - 1, 0).astype(np.float64)
+    safe_decay = np.where(decay > 0, decay, 1).astype(np.float64)
+    decayed = np.ceil(initial + (minimum - initial) / safe_decay ** 2 * solves ** 2)
+    return np.where(decay > 0, np.maximum(decayed, minimum), initial).astype(np.int64)
+
+class ScoringEngine:
+    """Team scores from static or decaying question values plus first-blood bonuses.
+
+    Solve state is held as a packed team x question bit matrix
+    (utils.solve_bitmap) fed by the process's shared Teams listener
+    (utils.teams_feed, TTL polling as a fallback) and by local solves. Solves mark their question dirty; a
+    background worker collects them for BATCH_WINDOW seconds, recomputes
+    every affected team with one matrix product and writes the changed
+    scores to the scoreboard shards and team views in batched commits. Scores are a pure
+    function of the solves and the catalog, so every server process
+    converges on the same values and only differences are written.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.teams = None
+        self.catalog = get_question_catalog(db)
+        self._lock = threading.RLock()
+        self._solves = SolveMatrix()
+        self._bits = {}
+        self._width = 0
+        self._catalog_version = -1
+        self._first_blood = {}
+        self._dirty = set()
+        self._all_dirty = False
+        self._wake = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='scoring', daemon=True)
+
+    def start(self):
+        """Load solves from the shared Teams feed and start the recompute worker"""
+        self.teams = get_teams_feed(self.db)
+        self.teams.attach(self)
+        self.catalog.subscribe(lambda catalog: self.mark_dirty())
+        self._worker.start()
+        return self
+
+    def load_teams(self, docs):
+        """Replace the solve state with every team's solve bits"""
+        solves = SolveMatrix()
+        with self._lock:
+            self._sync_catalog()
+            for doc in docs:
+                solves.set_row(doc.id, self._packed(doc))
+            self._solves = solves
+        self.mark_dirty()
+
+    def apply_team_changes(self, changes):
+        dirty = set()
+        with self._lock:
+            self._sync_catalog()
+            for change in changes:
+                doc = change.document
+                old = self._solves.row_bytes(doc.id)
+                new = b'' if change.type.name == 'REMOVED' else self._packed(doc)
+                if new != old:
+                    self._solves.set_row(doc.id, new)
+                    dirty |= unpack(new) ^ unpack(old)
+        if dirty:
+            self._mark_bits_dirty(dirty)
+
+    def _packed(self, doc):
+        team = Team.from_doc(doc.id, doc.to_dict(), lambda qid: bit_for(self.catalog, qid))
+        return team.solved_bits.rstrip(b'\0')
+
+    def _sync_catalog(self):
+        """Rebuild the per-bit question parameters after catalog changes.
+
+        Solve rows are keyed by bit position, so they're left as they are.
+        """
+        if self._catalog_version == self.catalog.version:
+            return
+        self._catalog_version = self.catalog.version
+        self._bits = dict(catalog_bits(self.catalog)['bits'])
+        self._width = max(self._bits.values(), default=-1) + 1
+        self._initial = np.zeros(self._width, dtype=np.int64)
+        self._minimum = np.zeros(self._width, dtype=np.int64)
+        self._decay = np.zeros(self._width, dtype=np.int64)
+        self._bonus = np.zeros(self._width, dtype=np.int64)
+        for qid, question in self.catalog.questions():
+            bit = self._bits.get(qid)
+            if bit is None:
+                continue
+            self._initial[bit] = question.points
+            self._minimum[bit] = question.minimum_points
+            self._decay[bit] = question.decay
+            self._bonus[bit] = question.first_blood_bonus
+            if question.first_blood_team:
+                self._first_blood[qid] = question.first_blood_team
+
+    # Scores
+
+    def _values(self):
+        counts = self._solves.question_counts(self._width)
+        return question_values(self._initial, self._minimum, self._decay, counts)
+
+    def values(self):
+        """Return {qid: current value}"""
+        with self._lock:
+            self._sync_catalog()
+            values = self._values()
+            return {qid: int(values[bit]) for qid, bit in self._bits.items()}
+
+    def value(self, qid):
+        """Return the current value of ``qid`` (0 if unknown)"""
+        return self.values().get(qid, 0)
+
+    def has_first_blood(self, qid):
+        with self._lock:
+            self._sync_catalog()
+            return qid in self._first_blood
+
+    def points_for_solve(self, qid, first_blood):
+        """Points a new solve of ``qid`` is worth when it is committed"""
+        with self._lock:
+            self._sync_catalog()
+            bit = self._bits.get(qid)
+            if bit is None:
+                return DEFAULT_POINTS
+            col = slice(bit, bit + 1)
+            counts = self._solves.question_counts(self._width)[col] + 1
+            value = int(question_values(self._initial[col], self._minimum[col], self._decay[col], counts)[0])
+            return value + (int(self._bonus[bit]) if first_blood else 0)
+
+    def record_local_solve(self, team_id, qid, first_blood=False):
+        """Reflect a solve committed by this process and schedule a recompute"""
+        with self._lock:
+            self._sync_catalog()
+            bit = bit_for(self.catalog, qid)
+            if bit is not None:
+                self._solves.set(team_id, bit)
+            if first_blood:
+                self._first_blood.setdefault(qid, team_id)
+        self.mark_dirty({qid})
+
+    def scores(self, qids=None):
+        """Return {team_id: score} for teams that solved any of ``qids`` (all teams if None)"""
+        with self._lock:
+            self._sync_catalog()
+            return self._scores(None if qids is None else {self._bits[qid] for qid in qids if qid in self._bits})
+
+    def _scores(self, bits=None):
+        team_ids = None if bits is None else self._solves.teams_with_any(bits)
+        team_ids, matrix = self._solves.unpacked(self._width, team_ids)
+        rows = {team_id: row for row, team_id in enumerate(team_ids)}
+        bonus = np.zeros(len(team_ids), dtype=np.int64)
+        for qid, team_id in self._first_blood.items():
+            bit, row = self._bits.get(qid), rows.get(team_id)
+            if bit is not None and row is not None and matrix[row, bit]:
+                bonus[row] += self._bonus[bit]
+        totals = matrix.astype(np.int64) @ self._values() + bonus
+        return dict(zip(team_ids, totals.tolist()))
+
+    # Batched recomputation
+
+    def mark_dirty(self, qids=None):
+        """Schedule a recompute of teams that solved ``qids`` (everyone if None)"""
+        if qids is None:
+            with self._lock:
+                self._all_dirty = True
+            self._wake.set()
+            return
+        self._mark_bits_dirty({bit for bit in (bit_for(self.catalog, qid) for qid in qids) if bit is not None})
+
+    def _mark_bits_dirty(self, bits):
+        with self._lock:
+            self._dirty |= bits
+        self._wake.set()
+
+    def recompute(self):
+        """Recompute dirty teams and write changed scores in one batch; returns the number written"""
+        with self._lock:
+            bits = None if self._all_dirty else set(self._dirty)
+            self._dirty.clear()
+            self._all_dirty = False
+            if bits is not None and not bits:
+                return 0
+            self._sync_catalog()
+            scores = self._scores(bits)
+
+        index = leaderboard.get_rank_index(self.db)
+        changed = {
+            team_id: score for team_id, score in scores.items()
+            if score != index.score(team_id)
+        }
+        if not changed:
+            return 0
+
+        shards = {}
+        for team_id, score in changed.items():
+            shards.setdefault(leaderboard.scoreboard_ref(self.db, team_id).id, {})[team_id] = {'score': score}
+        writes = [
+            (leaderboard.scoreboard_collection(self.db).document(shard_id), {'teams': teams})
+            for shard_id, teams in shards.items()
+        ]
+        writes += [
+            (team_views.views_collection(self.db).document(team_id), {'score': score})
+            for team_id, score in changed.items()
+        ]
+        for start in range(0, len(writes), MAX_BATCH_WRITES):
+            batch = self.db.batch()
+            for ref, data in writes[start:start + MAX_BATCH_WRITES]:
+                batch.set(ref, data, merge=True)
+            batch.commit()
+        leaderboard.apply_scores(changed)
+        team_views.get_team_views(self.db).set_scores(changed)
+        return len(changed)
+
+    def _run(self):
+        while True:
+            # Wakes at least every TTL so a stopped listener falls back to polling
+            self._wake.wait(timeout=self.teams.ttl)
+            try:
+                self.teams.refresh_if_stale()
+            except Exception as e:
+                print(f"Scoring reload failed: {str(e)}")
+            # Let a burst of solves land before recomputing once
+            time.sleep(BATCH_WINDOW)
+            self._wake.clear()
+            try:
+                self.recompute()
+            except Exception as e:
+                print(f"Score recompute failed: {str(e)}")
+                self.mark_dirty()
+                time.sleep(5)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_scoring_engine(db):
+    """Return the process-wide scoring engine for ``db``, starting it on first use"""
+    engine = _engines.get(id(db))
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(id(db))
+        if engine is None:
+            engine = ScoringEngine(db).start()
+            _engines[id(db)] = engine
+    return engine
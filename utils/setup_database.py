@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 import pandas as pd
@@ -7,6 +8,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.repository import question_doc
+from utils.question_sync import sync_questions, sync_teams
+from utils.reset_database import EVENT_COLLECTIONS, delete_collections
 
 def initialize_firebase():
     """Initialize Firebase with service account"""
@@ -30,25 +34,13 @@ def initialize_firebase():
         print(f"Firebase initialization error: {str(e)}")
         return None
 
-def clear_collection(db, collection_name):
-    """Delete all documents in a collection"""
-    try:
-        docs = db.collection(collection_name).get()
-        for doc in docs:
-            doc.reference.delete()
-        print(f"Cleared collection: {collection_name}")
-    except Exception as e:
-        print(f"Error clearing collection {collection_name}: {str(e)}")
-
 def clear_database(db):
-    """Clear all collections"""
-    collections = ['Questions', 'Teams', 'submissions']
-    for collection in collections:
-        clear_collection(db, collection)
-    print("\nDatabase cleared successfully!")
+    """Clear the event collections (reset_database.EVENT_COLLECTIONS)"""
+    deleted, failed = delete_collections(db, EVENT_COLLECTIONS)
+    print(f"\nDatabase cleared successfully! ({deleted} documents deleted, {failed} failed)")
 
 def setup_questions(db):
-    """Setup Questions collection from Excel file"""
+    """Sync the Questions collection with the Excel file"""
     try:
         # Read Excel file
         excel_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'Flagss.xlsx')
@@ -60,10 +52,7 @@ def setup_questions(db):
         df = df.dropna()  # Remove rows with NaN values
         df = df[df[df.columns[0]].str.strip().str.len() > 0]  # Remove rows with empty qid
         
-        # Add questions to database
-        batch = db.batch()
-        count = 0
-        
+        questions = {}
         for _, row in df.iterrows():
             qid = str(row[0]).strip()  # First column is qid
             flag = str(row[1]).strip()  # Second column is flag
@@ -76,59 +65,27 @@ def setup_questions(db):
             qid = qid.replace(' ', '')  # Remove any spaces
             flag = flag.replace('\n', '').replace('\r', '')  # Remove newlines
                 
-            doc_ref = db.collection('Questions').document(qid)
-            batch.set(doc_ref, {
-                'qid': qid,
-                'Flag': flag,
-                'solvedBy': []
-            })
-            
-            count += 1
-            print(f"Added question {qid} with flag: {flag}")
-            
-            # Commit batch every 500 operations
-            if count % 500 == 0:
-                batch.commit()
-                batch = db.batch()
+            questions[qid] = question_doc(qid, flag)
         
-        # Commit remaining operations
-        if count % 500 != 0:
-            batch.commit()
-            
-        print(f"\nAdded {count} questions to database")
+        # Only changed fields are written; solves on live questions are kept
+        sync_questions(db, questions)
     except Exception as e:
         print(f"Error setting up questions: {str(e)}")
         import traceback
         traceback.print_exc()
 
 def setup_teams(db):
-    """Setup Teams collection"""
+    """Create the 30 teams that don't exist yet"""
     try:
-        batch = db.batch()
-        
-        # Add 30 teams
-        for i in range(1, 31):
-            team_id = f"TEAM{i}"
-            doc_ref = db.collection('Teams').document(team_id)
-            batch.set(doc_ref, {
-                'teamid': team_id,
-                'totalCount': 0,
-                'questionsSolved': []
-            })
-            print(f"Added team {team_id}")
-            
-            # Commit batch every 500 operations
-            if i % 500 == 0:
-                batch.commit()
-                batch = db.batch()
-        
-        # Commit remaining operations
-        batch.commit()
-        print("\nAdded 30 teams to database")
+        sync_teams(db, [f"TEAM{i}" for i in range(1, 31)])
     except Exception as e:
         print(f"Error setting up teams: {str(e)}")
 
 def main():
+    parser = argparse.ArgumentParser(description='Sync Questions and Teams for the event')
+    parser.add_argument('--clear', action='store_true', help='Delete Questions, Teams and their solve state first')
+    args = parser.parse_args()
+    
     # Initialize Firebase
     db = initialize_firebase()
     
@@ -136,9 +93,10 @@ def main():
         print("Failed to initialize Firebase. Exiting...")
         return
     
-    # Clear database
-    print("\nClearing database...")
-    clear_database(db)
+    # Clear database (wipes live solves, so only on request)
+    if args.clear:
+        print("\nClearing database...")
+        clear_database(db)
     
     # Setup Questions
     print("\nSetting up Questions collection...")
@@ -0,0 +1,60 @@
+import random
+import threading
+import time
+from utils.repository import question_ref
+
+NUM_SHARDS = 10
+# Seconds a summed value is served from cache
+CACHE_TTL = 15
+
+class ShardedCounter:
+    """Counter spread over ``num_shards`` documents in a ``shards`` subcollection.
+
+    Each increment touches one random shard, so a burst of writes isn't
+    limited by Firestore's ~1 sustained write/second per document. Reads
+    sum the shards and cache the total for CACHE_TTL seconds.
+    """
+
+    def __init__(self, doc_ref, num_shards=NUM_SHARDS):
+        self.doc_ref = doc_ref
+        self.num_shards = num_shards
+        self._cached = None
+        self._cached_at = 0.0
+
+    def _shard_ref(self, shard_id):
+        return self.doc_ref.collection('shards').document(str(shard_id))
+
+    def stage_increment(self, writer, amount=1):
+        """Add an increment to an open transaction or batch"""
+        from firebase_admin import firestore
+        shard_ref = self._shard_ref(random.randrange(self.num_shards))
+        writer.set(shard_ref, {'count': firestore.Increment(amount)}, merge=True)
+
+    def add_local(self, amount=1):
+        """Reflect a committed increment in the cached total"""
+        if self._cached is not None:
+            self._cached += amount
+
+    def value(self):
+        """Return the summed count, served from cache while fresh"""
+        if self._cached is None or time.monotonic() - self._cached_at > CACHE_TTL:
+            shards = self.doc_ref.collection('shards').get()
+            self._cached = sum((shard.to_dict() or {}).get('count', 0) for shard in shards)
+            self._cached_at = time.monotonic()
+        return self._cached
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+def solve_counter(db, qid):
+    """Return the shared solve counter for question ``qid``"""
+    key = (id(db), qid)
+    counter = _counters.get(key)
+    if counter is None:
+        with _counters_lock:
+            counter = _counters.setdefault(key, ShardedCounter(question_ref(db, qid)))
+    return counter
+
+def solve_count(db, qid):
+    """Return how many teams have solved ``qid``"""
+    return solve_counter(db, qid).value()
@@ -0,0 +1,217 @@
+import logging
+import re
+import threading
+
+# Team documents store solved questions as packed bits: bit ``b`` is bit
+# ``b % 8`` of byte ``b // 8`` (NumPy's little bit order). A question's
+# bit is its 'bit' field (repository.Question.bit), allocated from one
+# persisted counter when the question is created
+# (repository.allocate_bits). Questions written before that imply the
+# number in their ID (Q17 -> 17) until utils/migrate_schema.py pins it.
+_NUMBERED = re.compile(r'^Q(0|[1-9]\d*)$')
+
+# Bit positions are capped so solvedBits stays at most MAX_BITS / 8 bytes
+MAX_BITS = 4096
+
+logger = logging.getLogger(__name__)
+
+def question_bit(qid):
+    """Return the bit implied by a legacy ``qid``, or None if it has none.
+
+    Only canonical numbers below MAX_BITS count, so 'Q01' never shares
+    'Q1''s bit.
+    """
+    match = _NUMBERED.match(qid)
+    if not match or int(match.group(1)) >= MAX_BITS:
+        return None
+    return int(match.group(1))
+
+def has_bit(data, bit):
+    """Return True if ``bit`` is set in the packed ``data``"""
+    byte = bit >> 3
+    return data is not None and byte < len(data) and bool(data[byte] & (1 << (bit & 7)))
+
+def with_bit(data, bit):
+    """Return a copy of the packed ``data`` with ``bit`` set"""
+    if not 0 <= bit < MAX_BITS:
+        raise ValueError(f"Solve bit {bit} is outside 0..{MAX_BITS - 1}")
+    packed = bytearray(data or b'')
+    byte = bit >> 3
+    if byte >= len(packed):
+        packed.extend(b'\0' * (byte + 1 - len(packed)))
+    packed[byte] |= 1 << (bit & 7)
+    return bytes(packed)
+
+def pack(bits):
+    """Pack an iterable of bit positions"""
+    packed = b''
+    for bit in bits:
+        packed = with_bit(packed, bit)
+    return packed
+
+def unpack(data):
+    """Return the set bit positions of the packed ``data``"""
+    return {
+        byte * 8 + offset
+        for byte, value in enumerate(data or b'') if value
+        for offset in range(8) if value & (1 << offset)
+    }
+
+def team_bits(team_data, bit_of):
+    """Packed solve bits of a team document, folding in legacy arrays.
+
+    ``bit_of(qid)`` maps question IDs from questionsSolved/solvedQuestions
+    (written before the bitmap) to bit positions.
+    """
+    packed = bytes(team_data.get('solvedBits') or b'')
+    for qid in set(team_data.get('questionsSolved') or []) | set(team_data.get('solvedQuestions') or []):
+        bit = bit_of(qid)
+        if bit is not None and not has_bit(packed, bit):
+            packed = with_bit(packed, bit)
+    return packed
+
+def solved_qids(team_data, catalog):
+    """Return the set of question IDs a team document has solved"""
+    by_bit = catalog_bits(catalog)['qids']
+    qids = {by_bit.get(bit, f"Q{bit}") for bit in unpack(team_data.get('solvedBits'))}
+    return qids | set(team_data.get('questionsSolved') or []) | set(team_data.get('solvedQuestions') or [])
+
+_bit_maps = {}
+_bit_maps_lock = threading.Lock()
+
+def catalog_bits(catalog):
+    """Return {'bits': {qid: bit}, 'qids': {bit: qid}} for the catalog, cached per version.
+
+    When questions share a bit, an explicit 'bit' wins over one implied
+    by the ID, then the lowest ID. The others (and bits outside
+    0..MAX_BITS - 1) are left out, so their solves are kept in
+    questionsSolved like any question without a bit, and a warning is
+    logged until utils/migrate_schema.py reassigns them.
+    """
+    cached = _bit_maps.get(id(catalog))
+    if cached is not None and cached['version'] == catalog.version:
+        return cached
+    claims = {}
+    for qid, question in catalog.questions():
+        if question.bit is None:
+            continue
+        if not 0 <= question.bit < MAX_BITS:
+            logger.warning("Question %s has solve bit %s, outside 0..%s; treating it as unbitted",
+                           qid, question.bit, MAX_BITS - 1, extra={'event': 'bad_solve_bit', 'qid': qid})
+            continue
+        claims.setdefault(question.bit, []).append((not question.explicit_bit, qid))
+    bits = {}
+    qids = {}
+    for bit, owners in claims.items():
+        owners.sort()
+        winner = owners[0][1]
+        bits[winner] = bit
+        qids[bit] = winner
+        for _, qid in owners[1:]:
+            logger.warning("Question %s shares solve bit %s with %s; treating it as unbitted until "
+                           "utils/migrate_schema.py reassigns it", qid, bit, winner,
+                           extra={'event': 'bad_solve_bit', 'qid': qid})
+    cached = {'version': catalog.version, 'bits': bits, 'qids': qids}
+    with _bit_maps_lock:
+        _bit_maps[id(catalog)] = cached
+    return cached
+
+def bit_for(catalog, qid):
+    """Return the bit position of ``qid`` in ``catalog``, or None"""
+    return catalog_bits(catalog)['bits'].get(qid)
+
+class SolveMatrix:
+    """Team x question solve matrix held as packed NumPy bit rows.
+
+    Membership is one byte lookup; per-question and per-team counts are
+    vectorized over the packed rows.
+    """
+
+    def __init__(self, width_bits=64):
+        import numpy as np
+        self._np = np
+        self._rows = {}
+        self._data = np.zeros((1, max((width_bits + 7) // 8, 1)), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, team_id):
+        return team_id in self._rows
+
+    @property
+    def team_ids(self):
+        return list(self._rows)
+
+    def _ensure(self, team_id, width):
+        np = self._np
+        rows, cols = self._data.shape
+        if width > cols:
+            grown = np.zeros((rows, max(width, 2 * cols)), dtype=np.uint8)
+            grown[:, :cols] = self._data
+            self._data = grown
+        row = self._rows.get(team_id)
+        if row is None:
+            row = self._rows[team_id] = len(self._rows)
+            if row >= self._data.shape[0]:
+                grown = np.zeros((2 * self._data.shape[0], self._data.shape[1]), dtype=np.uint8)
+                grown[:self._data.shape[0]] = self._data
+                self._data = grown
+        return row
+
+    def set_row(self, team_id, packed):
+        """Replace a team's row with the packed bytes ``packed``"""
+        row = self._ensure(team_id, len(packed))
+        self._data[row] = 0
+        if packed:
+            self._data[row, :len(packed)] = self._np.frombuffer(packed, dtype=self._np.uint8)
+
+    def set(self, team_id, bit):
+        row = self._ensure(team_id, (bit >> 3) + 1)
+        self._data[row, bit >> 3] |= 1 << (bit & 7)
+
+    def has(self, team_id, bit):
+        row = self._rows.get(team_id)
+        if row is None or (bit >> 3) >= self._data.shape[1]:
+            return False
+        return bool(self._data[row, bit >> 3] & (1 << (bit & 7)))
+
+    def row_bytes(self, team_id):
+        """Return a team's row as packed bytes, trailing zeros trimmed"""
+        row = self._rows.get(team_id)
+        if row is None:
+            return b''
+        return self._data[row].tobytes().rstrip(b'\0')
+
+    def unpacked(self, width_bits, team_ids=None):
+        """Return (team_ids, bool matrix of shape (teams, width_bits))"""
+        np = self._np
+        if team_ids is None:
+            team_ids = list(self._rows)
+        rows = self._data[[self._rows[team_id] for team_id in team_ids]]
+        bits = np.unpackbits(rows, axis=1, bitorder='little')
+        if bits.shape[1] < width_bits:
+            bits = np.pad(bits, ((0, 0), (0, width_bits - bits.shape[1])))
+        return team_ids, bits[:, :width_bits].astype(bool)
+
+    def question_counts(self, width_bits):
+        """Solves per bit position, as an array of length ``width_bits``"""
+        return self.unpacked(width_bits)[1].sum(axis=0)
+
+    def team_counts(self):
+        """Return {team_id: number of solved questions}"""
+        np = self._np
+        popcount = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+        counts = popcount[self._data[:len(self._rows)]].sum(axis=1)
+        return dict(zip(self._rows, counts.tolist()))
+
+    def teams_with_any(self, bits):
+        """Return the team IDs that solved any of ``bits``"""
+        np = self._np
+        mask = np.zeros(self._data.shape[1], dtype=np.uint8)
+        for bit in bits:
+            if (bit >> 3) < len(mask):
+                mask[bit >> 3] |= 1 << (bit & 7)
+        hits = (self._data[:len(self._rows)] & mask).any(axis=1)
+        team_ids = list(self._rows)
+        return [team_ids[row] for row in np.flatnonzero(hits)]
@@ -0,0 +1,168 @@
+from datetime import datetime
+from utils import leaderboard, resilience
+from utils.sharded_counter import solve_counter
+
+# Results of record_solve
+SOLVED = 'solved'
+ALREADY_SOLVED = 'already_solved'
+TEAM_NOT_FOUND = 'team_not_found'
+# Accepted while Firestore is unavailable; queued for replay
+PENDING = 'pending'
+# Internal: the idempotency key was already committed
+_DUPLICATE = 'duplicate'
+
+_solve_hooks = []
+
+def on_solve(callback):
+    """Register ``callback(team_id, qid, solved_at)`` to run after each committed solve"""
+    _solve_hooks.append(callback)
+    return callback
+
+def solve_record_id(idempotency_key):
+    """Submissions document ID of the solve committed for ``idempotency_key``.
+
+    Kept apart from the key itself, where utils.submission_log stores
+    the audit record of a wrong flag sent with the same key.
+    """
+    return f"{idempotency_key}:solve" if idempotency_key else None
+
+def run_transaction(db, fn):
+    """Run ``fn(transaction)`` in a Firestore transaction, retrying on contention"""
+    # In-memory fakes used for load testing provide their own runner
+    runner = getattr(db, 'run_transaction', None)
+    if runner is not None:
+        return runner(fn)
+    from firebase_admin import firestore
+    return firestore.transactional(fn)(db.transaction())
+
+def record_solve(db, team_id, qid, solved_at=None, idempotency_key=None):
+    """Record a correct flag for ``team_id`` on ``qid`` in a single commit.
+
+    The team's solve bit (utils.solve_bitmap), the solver record and
+    solve-count shard, the submission record and the scoreboard increment
+    are written in one transaction, so concurrent solves can't lose
+    updates and a team can't be credited twice. With an
+    ``idempotency_key`` the submission record is stored under
+    solve_record_id(key), and a retry whose key was already committed
+    returns SOLVED again without writing anything.
+
+    The team's TeamViews document (utils.team_views) is rewritten in the
+    same transaction and the cached copy replaced after the commit, so
+    the page shown next renders without another read.
+
+    The scoreboard is credited with the question's value for this solve,
+    plus its first-blood bonus if the question document shows no earlier
+    solver; the scoring engine then recomputes decayed values for
+    everyone else in the background.
+
+    Returns SOLVED, ALREADY_SOLVED or TEAM_NOT_FOUND.
+    """
+    from firebase_admin import firestore
+    from utils.scoring import get_scoring_engine
+    from utils import repository, solve_bitmap, team_views
+    solved_at = solved_at or datetime.now()
+    engine = get_scoring_engine(db)
+    bit_of = lambda solved_qid: solve_bitmap.bit_for(engine.catalog, solved_qid)
+    bit = bit_of(qid)
+    # Once first blood is known the question document isn't read again
+    check_first_blood = not engine.has_first_blood(qid)
+    awarded = {}
+    team_ref = repository.team_ref(db, team_id)
+    question_ref = repository.question_ref(db, qid)
+    solver_ref = question_ref.collection('solvers').document(team_id)
+    counter = solve_counter(db, qid)
+    submission_ref = db.collection('Submissions').document(solve_record_id(idempotency_key))
+    view_ref = team_views.views_collection(db).document(team_id)
+
+    def solve(transaction):
+        if idempotency_key and submission_ref.get(transaction=transaction).exists:
+            return _DUPLICATE
+        team = repository.get_team(db, team_id, transaction, bit_of)
+        if team is None:
+            return TEAM_NOT_FOUND
+        if (bit is not None and solve_bitmap.has_bit(team.solved_bits, bit)) or qid in team.unbitted:
+            return ALREADY_SOLVED
+
+        first_blood = False
+        if check_first_blood:
+            question = repository.get_question(db, qid, transaction)
+            first_blood = question is not None and question.first_blood_team is None
+        view = view_ref.get(transaction=transaction)
+        view = view.to_dict() if view.exists else None
+        if not team_views.is_complete(view):
+            score = (view or {}).get('score', leaderboard.get_rank_index(db).score(team_id))
+            view = team_views.build_view(team, score)
+        points = engine.points_for_solve(qid, first_blood)
+
+        team_update = {
+            'totalCount': firestore.Increment(1),
+            'timestamp': solved_at
+        }
+        if bit is not None:
+            # The team document was read above, so a concurrent solve by
+            # the same team makes this transaction retry
+            team_update['solvedBits'] = solve_bitmap.with_bit(team.solved_bits, bit)
+        else:
+            team_update['questionsSolved'] = firestore.ArrayUnion([qid])
+        transaction.update(team_ref, team_update)
+        # Solver membership and the solve count live outside the question
+        # document, so a burst of solves doesn't serialize on one document
+        transaction.set(solver_ref, {
+            'teamId': team_id,
+            'solvedAt': solved_at
+        })
+        counter.stage_increment(transaction)
+        transaction.set(submission_ref, {
+            'teamId': team_id,
+            'questionId': qid,
+            'timestamp': solved_at,
+            'isCorrect': True,
+            'idempotencyKey': idempotency_key
+        })
+        if first_blood:
+            transaction.update(question_ref, {'firstBlood': {'teamId': team_id, 'solvedAt': solved_at}})
+        leaderboard.stage_solve(transaction, db, team_id, points, solved_at)
+        view = team_views.with_solve(view, qid, bit, points, solved_at)
+        transaction.set(view_ref, view)
+        awarded.update(first_blood=first_blood, points=points, view=view)
+        return SOLVED
+
+    result = run_transaction(db, solve)
+    if result == _DUPLICATE:
+        return SOLVED
+
+    if result == SOLVED:
+        counter.add_local()
+        leaderboard.apply_solve(team_id, awarded['points'], solved_at)
+        engine.record_local_solve(team_id, qid, awarded['first_blood'])
+        team_views.get_team_views(db).put(team_id, awarded['view'])
+        for callback in _solve_hooks:
+            try:
+                callback(team_id, qid, solved_at)
+            except Exception as e:
+                print(f"Solve hook failed: {str(e)}")
+    return result
+
+def submit_solve(db, team_id, qid, idempotency_key=None):
+    """record_solve() under a deadline and the circuit breaker.
+
+    When Firestore is unavailable the solve is queued durably with its
+    original time and PENDING is returned; replays are safe because
+    record_solve() skips solves that already landed.
+    """
+    solved_at = datetime.now()
+    try:
+        return resilience.call(lambda: record_solve(db, team_id, qid, solved_at, idempotency_key), idempotent=False)
+    except resilience.Unavailable as e:
+        print(f"Queueing solve of {qid} by {team_id}: {str(e)}")
+        resilience.get_retry_queue(db).enqueue('solve', {
+            'team_id': team_id,
+            'qid': qid,
+            'solved_at': solved_at.isoformat(),
+            'idempotency_key': idempotency_key
+        })
+        return PENDING
+
+@resilience.register_write('solve')
+def _replay_solve(db, team_id, qid, solved_at, idempotency_key=None):
+    return record_solve(db, team_id, qid, datetime.fromisoformat(solved_at), idempotency_key)
@@ -0,0 +1,139 @@
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+# Firestore's limit on writes per batch
+MAX_BATCH = 500
+FLUSH_INTERVAL_MS = 1000
+MAX_QUEUED = 10000
+SPILL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'submissions_spill.jsonl')
+
+class SubmissionLog:
+    """Write-behind buffer for the Submissions audit trail.
+
+    Records are queued in-process and written by a background worker in
+    batched commits of up to MAX_BATCH writes, every ``flush_interval_ms``
+    or as soon as ``flush_size`` records are waiting. The queue is
+    bounded; records that don't fit, or whose batch fails to commit, are
+    appended to a local spill file and replayed on the next start.
+    """
+
+    def __init__(self, db, flush_interval_ms=FLUSH_INTERVAL_MS, flush_size=MAX_BATCH,
+                 max_queued=MAX_QUEUED, spill_path=SPILL_PATH):
+        self.db = db
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.flush_size = min(flush_size, MAX_BATCH)
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._spill_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name='submission-log', daemon=True)
+
+    def start(self):
+        """Replay any spilled records and start the background worker"""
+        self._replay_spill()
+        self._worker.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Flush everything still queued and stop the worker"""
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self._worker.is_alive():
+            self._worker.join(timeout=10)
+        self._flush(self._drain(self._queue.qsize()))
+
+    def enqueue(self, record):
+        """Queue a submission record without blocking the caller"""
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._spill([record])
+
+    def _drain(self, limit):
+        records = []
+        while len(records) < limit:
+            try:
+                records.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Give the batch up to one interval to fill before committing
+            records = [first]
+            deadline = self.flush_interval
+            while len(records) < self.flush_size and deadline > 0:
+                records.extend(self._drain(self.flush_size - len(records)))
+                if len(records) >= self.flush_size:
+                    break
+                self._stopped.wait(0.05)
+                deadline -= 0.05
+            self._flush(records)
+
+    def _flush(self, records):
+        for start in range(0, len(records), MAX_BATCH):
+            chunk = records[start:start + MAX_BATCH]
+            try:
+                batch = self.db.batch()
+                collection = self.db.collection('Submissions')
+                for record in chunk:
+                    # Keyed records overwrite themselves when a retry is flushed twice
+                    batch.set(collection.document(record.get('idempotencyKey')), record)
+                batch.commit()
+            except Exception as e:
+                print(f"Submission log flush failed, spilling {len(chunk)} records: {str(e)}")
+                self._spill(chunk)
+
+    def _spill(self, records):
+        with self._spill_lock:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, default=_encode) + '\n')
+
+    def _replay_spill(self):
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return
+            with open(self.spill_path, encoding='utf-8') as f:
+                records = [json.loads(line, object_hook=_decode) for line in f if line.strip()]
+            os.remove(self.spill_path)
+        if records:
+            print(f"Replaying {len(records)} spilled submission records")
+            self._flush(records)
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Can't serialize {type(value).__name__}")
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+def get_submission_log(db):
+    """Return the process-wide submission log for ``db``, starting it on first use"""
+    log = _logs.get(id(db))
+    if log is not None:
+        return log
+
+    with _logs_lock:
+        log = _logs.get(id(db))
+        if log is None:
+            log = SubmissionLog(db).start()
+            _logs[id(db)] = log
+    return log
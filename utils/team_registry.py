@@ -0,0 +1,154 @@
+import bisect
+import re
+import threading
+from utils.repository import Team
+from utils.teams_feed import get_teams_feed
+
+# Options shown in the team selector at once
+MAX_RESULTS = 50
+
+def _natural_key(text):
+    """Sort key that orders TEAM2 before TEAM10"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', text.lower())]
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TeamRegistry:
+    """In-memory list of teams with a prefix/substring search index.
+
+    Fed by the process's shared Teams listener (utils.teams_feed), with
+    TTL polling as a fallback. Score updates don't touch the index; only
+    added, removed or renamed teams bump ``version`` and notify
+    subscribers.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.version = 0
+        self._names = {}
+        self._ordered = []
+        self._prefix_keys = []
+        self._trigram_index = {}
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self.feed = None
+
+    def start(self):
+        """Attach to the shared Teams feed"""
+        self.feed = get_teams_feed(self.db)
+        self.feed.attach(self)
+        return self
+
+    def subscribe(self, callback):
+        """Call ``callback(registry)`` after teams are added, removed or renamed"""
+        self._subscribers.append(callback)
+
+    def load_teams(self, docs):
+        with self._lock:
+            self._set_names({doc.id: _display_name(doc) for doc in docs})
+
+    def apply_team_changes(self, changes):
+        with self._lock:
+            names = dict(self._names)
+            for change in changes:
+                doc = change.document
+                if change.type.name == 'REMOVED':
+                    names.pop(doc.id, None)
+                else:
+                    names[doc.id] = _display_name(doc)
+            self._set_names(names)
+
+    def _set_names(self, names):
+        if names == self._names:
+            return
+
+        ordered = sorted(names, key=_natural_key)
+        prefix_keys = sorted(
+            (key, team_id)
+            for team_id, name in names.items()
+            for key in {team_id.lower(), name.lower()}
+        )
+        trigram_index = {}
+        for team_id, name in names.items():
+            for gram in _trigrams(team_id.lower()) | _trigrams(name.lower()):
+                trigram_index.setdefault(gram, set()).add(team_id)
+
+        self._names = names
+        self._ordered = ordered
+        self._prefix_keys = prefix_keys
+        self._trigram_index = trigram_index
+        self.version += 1
+        for callback in list(self._subscribers):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Team registry subscriber failed: {str(e)}")
+
+    def __contains__(self, team_id):
+        return team_id in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+    def label(self, team_id):
+        """Return the selector label for ``team_id``"""
+        name = self._names.get(team_id, team_id)
+        return team_id if name == team_id else f"{name} ({team_id})"
+
+    def search(self, query='', limit=MAX_RESULTS):
+        """Return up to ``limit`` team IDs matching ``query``.
+
+        Prefix matches on ID or name come first, then substring matches;
+        an empty query lists teams in natural order.
+        """
+        self.feed.refresh_if_stale()
+        with self._lock:
+            query = query.strip().lower()
+            if not query:
+                return self._ordered[:limit]
+
+            results = []
+            seen = set()
+            start = bisect.bisect_left(self._prefix_keys, (query,))
+            for key, team_id in self._prefix_keys[start:]:
+                if not key.startswith(query) or len(results) >= limit:
+                    break
+                if team_id not in seen:
+                    seen.add(team_id)
+                    results.append(team_id)
+            if len(results) >= limit:
+                return results
+
+            if len(query) >= 3:
+                grams = sorted(_trigrams(query), key=lambda gram: len(self._trigram_index.get(gram, ())))
+                candidates = set(self._trigram_index.get(grams[0], ()))
+                for gram in grams[1:]:
+                    candidates &= self._trigram_index.get(gram, set())
+            else:
+                candidates = self._names
+            substring = [
+                team_id for team_id in candidates
+                if team_id not in seen and (query in team_id.lower() or query in self._names[team_id].lower())
+            ]
+            results.extend(sorted(substring, key=_natural_key)[:limit - len(results)])
+            return results
+
+def _display_name(doc):
+    return Team.from_doc(doc.id, doc.to_dict()).name
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+def get_team_registry(db):
+    """Return the process-wide team registry for ``db``, starting it on first use"""
+    registry = _registries.get(id(db))
+    if registry is not None:
+        return registry
+
+    with _registries_lock:
+        registry = _registries.get(id(db))
+        if registry is None:
+            registry = TeamRegistry(db).start()
+            _registries[id(db)] = registry
+    return registry
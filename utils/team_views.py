@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+from utils import resilience
+from utils import repository
+from utils.solve_bitmap import bit_for, with_bit
+
+# Seconds a cached view is served before it's read again
+VIEW_TTL = 5
+MAX_VIEWS = 5000
+
+def views_collection(db):
+    return db.collection('TeamViews')
+
+def is_complete(view):
+    """Score-only merges from the scoring engine can create partial views"""
+    return bool(view) and 'teamId' in view and 'solvedBits' in view
+
+def build_view(team, score=0):
+    """Build a team's view from its repository.Team"""
+    return {
+        'teamId': team.team_id,
+        'solvedBits': team.solved_bits,
+        # Solves of questions without a bit position
+        'questionsSolved': list(team.unbitted),
+        'totalCount': team.total_count,
+        'score': score,
+        'lastSolve': team.timestamp,
+        'solves': {}
+    }
+
+def with_solve(view, qid, bit, points, solved_at):
+    """Return a copy of ``view`` with a solve of ``qid`` added"""
+    view = dict(view)
+    if bit is not None:
+        view['solvedBits'] = with_bit(view.get('solvedBits'), bit)
+    else:
+        view['questionsSolved'] = list(view.get('questionsSolved') or []) + [qid]
+    view['totalCount'] = view.get('totalCount', 0) + 1
+    view['score'] = view.get('score', 0) + points
+    view['lastSolve'] = solved_at
+    view['solves'] = dict(view.get('solves') or {}, **{qid: {'solvedAt': solved_at, 'points': points}})
+    return view
+
+class TeamViewCache:
+    """Process-wide cache of TeamViews documents.
+
+    Pages render a team from its one view document. Solves committed by
+    this process replace the cached view directly, so the page shown
+    after a correct flag doesn't read it again; views changed elsewhere
+    are picked up after VIEW_TTL seconds. A missing view is built from
+    the team's document and written back.
+    """
+
+    def __init__(self, db, ttl=VIEW_TTL, max_size=MAX_VIEWS):
+        self.db = db
+        self.ttl = ttl
+        self.max_size = max_size
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, team_id):
+        """Return the team's view, or None if the team doesn't exist.
+
+        Raises resilience.Unavailable if Firestore is down and the view
+        was never read.
+        """
+        with self._lock:
+            entry = self._views.get(team_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        snapshot = resilience.read(('team_view', team_id), views_collection(self.db).document(team_id).get)
+        view = snapshot.to_dict() if snapshot.exists else None
+        if not is_complete(view):
+            view = self._backfill(team_id)
+        if view is not None:
+            self.put(team_id, view)
+        return view
+
+    def cached(self, team_id):
+        """Return the team's cached view, however old, without reading Firestore"""
+        with self._lock:
+            entry = self._views.get(team_id)
+        return entry[1] if entry is not None else None
+
+    def _backfill(self, team_id):
+        from utils.leaderboard import get_rank_index
+        from utils.question_catalog import get_question_catalog
+        from utils.solve_pipeline import run_transaction
+        view_ref = views_collection(self.db).document(team_id)
+        catalog = get_question_catalog(self.db)
+        index = get_rank_index(self.db)
+
+        def backfill(transaction):
+            # Re-read in the transaction so a solve committed meanwhile wins
+            snapshot = view_ref.get(transaction=transaction)
+            partial = snapshot.to_dict() if snapshot.exists else None
+            if is_complete(partial):
+                return partial
+            team = repository.get_team(self.db, team_id, transaction, lambda qid: bit_for(catalog, qid))
+            if team is None:
+                return None
+            view = build_view(team, (partial or {}).get('score', index.score(team_id)))
+            transaction.set(view_ref, view)
+            return view
+
+        return resilience.call(lambda: run_transaction(self.db, backfill))
+
+    def put(self, team_id, view):
+        """Cache ``view`` as the team's current view"""
+        with self._lock:
+            self._views.pop(team_id, None)
+            self._views[team_id] = (time.monotonic() + self.ttl, view)
+            while len(self._views) > self.max_size:
+                self._views.popitem(last=False)
+
+    def set_scores(self, scores):
+        """Mirror recomputed ``{team_id: score}`` in the cached views"""
+        with self._lock:
+            for team_id, score in scores.items():
+                entry = self._views.get(team_id)
+                if entry is not None:
+                    self._views[team_id] = (entry[0], dict(entry[1], score=score))
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_team_views(db):
+    """Return the process-wide team view cache for ``db``"""
+    cache = _caches.get(id(db))
+    if cache is not None:
+        return cache
+
+    with _caches_lock:
+        cache = _caches.get(id(db))
+        if cache is None:
+            cache = _caches[id(db)] = TeamViewCache(db)
+    return cache
@@ -0,0 +1,69 @@
+import threading
+from utils.live_collection import LiveCollection
+from utils.repository import LEGACY_SOLVE_ARRAYS, teams_collection
+
+# Seconds between reloads when the Teams listener isn't working
+POLL_TTL = 30
+# Fields consumers read from team documents when polling
+TEAM_FIELDS = ('name', 'solvedBits', *LEGACY_SOLVE_ARRAYS)
+
+class TeamsFeed(LiveCollection):
+    """The process's one Teams listener, shared by every consumer.
+
+    The team registry and the scoring engine both follow the Teams
+    collection; one listener feeds both, so each solve is delivered (and
+    billed) once per process. Consumers implement ``load_teams(docs)``
+    for a full set of team documents and ``apply_team_changes(changes)``
+    for listener updates.
+    """
+
+    label = 'Teams'
+
+    def __init__(self, db, ttl=POLL_TTL):
+        super().__init__(db, ttl)
+        self._docs = {}
+        self._consumers = []
+        self._lock = threading.RLock()
+
+    def query(self):
+        return teams_collection(self.db)
+
+    def read(self):
+        return self.query().select(list(TEAM_FIELDS)).get()
+
+    def attach(self, consumer):
+        """Load the current teams into ``consumer`` and keep it updated"""
+        with self._lock:
+            consumer.load_teams(list(self._docs.values()))
+            self._consumers.append(consumer)
+
+    def load(self, docs):
+        with self._lock:
+            self._docs = {doc.id: doc for doc in docs}
+            for consumer in self._consumers:
+                consumer.load_teams(list(self._docs.values()))
+
+    def apply_snapshot(self, col_snapshot, changes):
+        with self._lock:
+            for change in changes:
+                if change.type.name == 'REMOVED':
+                    self._docs.pop(change.document.id, None)
+                else:
+                    self._docs[change.document.id] = change.document
+            for consumer in self._consumers:
+                consumer.apply_team_changes(changes)
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+def get_teams_feed(db):
+    """Return the process-wide Teams feed for ``db``, starting it on first use"""
+    feed = _feeds.get(id(db))
+    if feed is not None:
+        return feed
+
+    with _feeds_lock:
+        feed = _feeds.get(id(db))
+        if feed is None:
+            feed = _feeds[id(db)] = TeamsFeed(db).start()
+    return feed
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+# Public keys Firebase signs ID tokens with (x509 PEM keyed by key id)
+FIREBASE_CERTS_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+ISSUER_PREFIX = 'https://securetoken.google.com/'
+# Used when the cert response carries no Cache-Control max-age
+DEFAULT_MAX_AGE = 3600
+# Refresh once this fraction of the max-age has passed
+REFRESH_AT = 0.8
+# Minimum seconds between refreshes triggered by unknown key ids, so a
+# stream of tokens with bogus kids can't keep us fetching
+KID_REFRESH_INTERVAL = 60
+MAX_CACHED_TOKENS = 10000
+CLOCK_SKEW = 10
+
+def fetch_certs(url=FIREBASE_CERTS_URL):
+    """Download the signing certs; returns ({kid: pem}, max_age seconds)"""
+    with urllib.request.urlopen(url, timeout=10) as response:
+        certs = json.loads(response.read().decode('utf-8'))
+        match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+    return certs, int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+class CertStore:
+    """Local copy of the token signing certs, refreshed in the background.
+
+    Only the very first lookup waits for the network; afterwards a
+    daemon thread refreshes the certs before their max-age runs out,
+    and an unknown key id triggers an early refresh (key rotation), at
+    most once per KID_REFRESH_INTERVAL.
+    """
+
+    def __init__(self, fetch=fetch_certs, kid_refresh_interval=KID_REFRESH_INTERVAL):
+        self.fetch = fetch
+        self.kid_refresh_interval = kid_refresh_interval
+        self._last_kid_refresh = None
+        self._certs = {}
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._refresh_now = threading.Event()
+        self._worker = None
+
+    def certs(self):
+        """Return {kid: pem}, fetching synchronously only if none are cached"""
+        if not self._certs:
+            with self._lock:
+                if not self._certs:
+                    self._refresh()
+            self._start_worker()
+        return self._certs
+
+    def request_refresh(self):
+        """Ask the background thread to refresh now (e.g. for an unknown kid).
+
+        Returns False without refreshing if the last requested refresh was
+        less than ``kid_refresh_interval`` seconds ago.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._last_kid_refresh is not None and now - self._last_kid_refresh < self.kid_refresh_interval:
+                return False
+            self._last_kid_refresh = now
+        self._refresh_now.set()
+        return True
+
+    def _refresh(self):
+        certs, max_age = self.fetch()
+        self._certs = certs
+        self._expires = time.monotonic() + max_age
+        self._max_age = max_age
+
+    def _start_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='cert-refresh', daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            wait = self._expires - time.monotonic() - self._max_age * (1 - REFRESH_AT)
+            self._refresh_now.wait(max(wait, 1.0))
+            self._refresh_now.clear()
+            try:
+                self._refresh()
+            except Exception as e:
+                # Keep the old certs; retry in a minute
+                print(f"Cert refresh failed: {str(e)}")
+                self._expires = time.monotonic() + 60 + self._max_age * (1 - REFRESH_AT)
+
+class TokenVerifier:
+    """Firebase ID-token verification with a per-token result cache.
+
+    Verified claims are cached by SHA-256 of the token until its ``exp``,
+    so repeated checks of the same token are a dict lookup. Verification
+    itself (signature, exp/iat, audience, issuer, subject) runs locally
+    against the CertStore. Revocation is not checked.
+    """
+
+    def __init__(self, project_id, cert_store=None, max_cached=MAX_CACHED_TOKENS):
+        self.project_id = project_id
+        self.cert_store = cert_store or CertStore()
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, id_token):
+        """Return the token's claims, or raise ValueError if it isn't valid"""
+        key = hashlib.sha256(id_token.encode('utf-8')).hexdigest()
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached['exp'] > now:
+                    return dict(cached)
+                del self._cache[key]
+
+        claims = self._decode(id_token)
+        with self._lock:
+            self._cache[key] = claims
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return dict(claims)
+
+    def _decode(self, id_token):
+        from google.auth import jwt
+
+        certs = self.cert_store.certs()
+        header = jwt.decode_header(id_token)
+        if header.get('alg') != 'RS256':
+            raise ValueError("ID token must be signed with RS256")
+        if header.get('kid') not in certs:
+            self.cert_store.request_refresh()
+            raise ValueError("ID token signed with an unknown key")
+
+        claims = jwt.decode(id_token, certs=certs, audience=self.project_id, clock_skew_in_seconds=CLOCK_SKEW)
+        if claims.get('iss') != ISSUER_PREFIX + self.project_id:
+            raise ValueError("ID token has an incorrect issuer")
+        if not claims.get('sub') or len(claims['sub']) > 128:
+            raise ValueError("ID token has an invalid subject")
+        claims['uid'] = claims['sub']
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IDLE = 'idle'
+WARMING = 'warming'
+READY = 'ready'
+FAILED = 'failed'
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_state = {'status': IDLE, 'timings': {}, 'error': None}
+
+def start():
+    """Start background warm-up once per process (again after a failure)"""
+    with _lock:
+        if _state['status'] in (WARMING, READY):
+            return
+        _state.update(status=WARMING, timings={}, error=None)
+    threading.Thread(target=_run, name='warmup', daemon=True).start()
+
+def _step(name, func):
+    start_time = time.perf_counter()
+    result = func()
+    _state['timings'][name] = round((time.perf_counter() - start_time) * 1000, 1)
+    return result
+
+def _run():
+    # Imported here so the first request doesn't pay for it in the script thread
+    import firebase_init
+    from utils.flag_index import get_flag_index
+    from utils.scoreboard_hub import get_scoreboard_hub
+    from utils.team_registry import get_team_registry
+    from utils.scoring import get_scoring_engine
+
+    started = time.perf_counter()
+    try:
+        db = _step('client', firebase_init.get_db)
+        if db is None:
+            raise RuntimeError("Firestore client could not be created")
+        if not _step('probe', firebase_init.health_check):
+            raise RuntimeError("Firestore health check failed")
+        _step('catalog_and_flag_index', lambda: get_flag_index(db))
+        _step('scoreboard', lambda: get_scoreboard_hub(db))
+        _step('teams', lambda: get_team_registry(db))
+        _step('scoring', lambda: get_scoring_engine(db))
+    except Exception as e:
+        with _lock:
+            _state.update(status=FAILED, error=str(e))
+        logger.error("Warm-up failed after %.0f ms: %s", (time.perf_counter() - started) * 1000, e)
+        return
+
+    _state['timings']['total'] = round((time.perf_counter() - started) * 1000, 1)
+    with _lock:
+        _state['status'] = READY
+    _ready.set()
+    logger.info("Warm-up complete", extra={'event': 'warmup', 'timings': _state['timings'], 'keep': True})
+
+def is_ready():
+    """Return True once the client, catalog, flag index, scoreboard and teams are primed"""
+    return _ready.is_set()
+
+def wait(timeout):
+    """Block up to ``timeout`` seconds for warm-up; returns is_ready()"""
+    return _ready.wait(timeout)
+
+def status():
+    """Return a copy of the warm-up status, error and per-step timings (ms)"""
+    with _lock:
+        return dict(_state, timings=dict(_state['timings']))